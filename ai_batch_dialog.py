@@ -0,0 +1,94 @@
+# ai_batch_dialog.py
+# Berisi QDialog pratinjau untuk impor banyak data hasil AI sekaligus
+# (misalnya seluruh anggota satu Kartu Keluarga)
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox
+)
+from PyQt6.QtGui import QColor
+
+import bulk_import
+from repository import repo
+
+# Warna latar untuk setiap keputusan di grid pratinjau
+WARNA_KEPUTUSAN = {
+    bulk_import.KEPUTUSAN_TAMBAH: QColor("#dff0d8"),
+    bulk_import.KEPUTUSAN_PERBARUI: QColor("#fcf8e3"),
+    bulk_import.KEPUTUSAN_LEWATI: QColor("#f2dede"),
+}
+
+
+class AiBatchDialog(QDialog):
+    """Menampilkan keputusan Tambah/Perbarui/Lewati per record sebelum disimpan."""
+
+    def __init__(self, rencana, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Pratinjau Impor JSON (Banyak Data)")
+        self.setMinimumSize(750, 400)
+
+        self.rencana = rencana
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        jumlah = {k: 0 for k in WARNA_KEPUTUSAN}
+        for keputusan, _, _ in self.rencana:
+            jumlah[keputusan] += 1
+
+        ringkasan = QLabel(
+            f"{len(self.rencana)} data ditemukan: "
+            f"{jumlah[bulk_import.KEPUTUSAN_TAMBAH]} baru, "
+            f"{jumlah[bulk_import.KEPUTUSAN_PERBARUI]} diperbarui (berdasarkan NIK), "
+            f"{jumlah[bulk_import.KEPUTUSAN_LEWATI]} dilewati."
+        )
+        ringkasan.setWordWrap(True)
+
+        headers = ["Keputusan", "Nama", "NIK", "Status Hub.", "No KK", "Keterangan"]
+        self.table = QTableWidget(len(self.rencana), len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+
+        for row, (keputusan, record, alasan) in enumerate(self.rencana):
+            nilai = [
+                keputusan, record.get('nama', ''), record.get('nik', ''),
+                record.get('status_hubungan', ''), record.get('no_kk', ''), alasan,
+            ]
+            for col, teks in enumerate(nilai):
+                item = QTableWidgetItem(str(teks))
+                item.setBackground(WARNA_KEPUTUSAN[keputusan])
+                self.table.setItem(row, col, item)
+
+        # --- Tombol Aksi ---
+        tombol_layout = QHBoxLayout()
+        self.save_btn = QPushButton("Simpan Semua")
+        self.save_btn.setStyleSheet("background-color: #4CAF50; color: white; padding: 8px; border-radius: 4px;")
+        self.save_btn.setEnabled(jumlah[bulk_import.KEPUTUSAN_LEWATI] < len(self.rencana))
+        self.save_btn.clicked.connect(self.on_save)
+        self.cancel_btn = QPushButton("Batal")
+        self.cancel_btn.setStyleSheet("background-color: #f44336; color: white; padding: 8px; border-radius: 4px;")
+        self.cancel_btn.clicked.connect(self.reject)
+        tombol_layout.addStretch()
+        tombol_layout.addWidget(self.cancel_btn)
+        tombol_layout.addWidget(self.save_btn)
+
+        layout.addWidget(ringkasan)
+        layout.addWidget(self.table)
+        layout.addLayout(tombol_layout)
+
+    def on_save(self):
+        """Menyimpan semua record Tambah/Perbarui dalam satu transaksi."""
+        records = [
+            record for keputusan, record, _ in self.rencana
+            if keputusan != bulk_import.KEPUTUSAN_LEWATI
+        ]
+        success, message = repo.upsert_batch(records)
+        if success:
+            QMessageBox.information(self, "Sukses", message)
+            self.accept()
+        else:
+            QMessageBox.critical(self, "Database Error", message)
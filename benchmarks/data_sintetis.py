@@ -0,0 +1,206 @@
+# data_sintetis.py
+# Pembuat data pendaftar sintetis untuk benchmark. NIK dan No KK berformat
+# 16 digit seperti aslinya (kode wilayah 6 digit + tanggal 6 digit + nomor
+# urut 4 digit; tanggal lahir perempuan ditambah 40), dan pendaftar
+# dikelompokkan per Kartu Keluarga (kepala keluarga, istri, anak, ...)
+# sehingga tampilan per KK dan filter facet diuji dengan sebaran realistis.
+# Opsional: folder dokumen dummy (scan KK yang sama untuk seluruh keluarga,
+# scan KTP per orang) lewat doc_manager. Modul ini tidak mengimpor PyQt6.
+
+import random
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+# Folder kode aplikasi (induk folder benchmarks) agar modul aplikasi bisa diimpor
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db_manager  # noqa: E402
+import doc_manager  # noqa: E402
+
+# Jumlah baris per panggilan save_data_batch (satu transaksi per potongan)
+UKURAN_POTONGAN = 10000
+
+# Kode wilayah (provinsi + kab/kota + kecamatan) beserta nama kotanya
+WILAYAH = [
+    ("717101", "Manado"), ("717102", "Manado"), ("717103", "Manado"),
+    ("717201", "Bitung"), ("717301", "Tomohon"), ("710601", "Minahasa Utara"),
+    ("710201", "Minahasa"), ("710501", "Minahasa Selatan"),
+]
+
+NAMA_DEPAN_PRIA = [
+    "Andi", "Budi", "Christian", "Daniel", "Eko", "Fransiskus", "Gerald", "Hendra",
+    "Irfan", "Johan", "Kevin", "Lukas", "Michael", "Novri", "Ricky", "Steven",
+    "Teddy", "Yohanes", "Rizal", "Agus",
+]
+NAMA_DEPAN_WANITA = [
+    "Angelina", "Dewi", "Elisabeth", "Fitri", "Grace", "Indah", "Jessica", "Maria",
+    "Natalia", "Olivia", "Putri", "Ratna", "Sari", "Tiara", "Vanessa", "Wulan",
+    "Yuliana", "Siti", "Novita", "Meiske",
+]
+NAMA_KELUARGA = [
+    "Lumenta", "Rondonuwu", "Sumampouw", "Wowor", "Pangemanan", "Tambuwun", "Mandagi",
+    "Kaunang", "Runtuwene", "Sondakh", "Lengkong", "Tumbelaka", "Rumengan", "Saerang",
+    "Wuisan", "Mokoagow", "Pontoh", "Gerung", "Manoppo", "Karundeng",
+]
+PEKERJAAN = [
+    "Karyawan Swasta", "Wiraswasta", "Pegawai Negeri Sipil", "Petani/Pekebun", "Nelayan",
+    "Mengurus Rumah Tangga", "Pelajar/Mahasiswa", "Guru", "Buruh Harian Lepas", "Pedagang",
+]
+JALAN = [
+    "Jl. Sam Ratulangi", "Jl. Piere Tendean", "Jl. 17 Agustus", "Jl. Babe Palar",
+    "Jl. Walanda Maramis", "Jl. Toar", "Jl. Bethesda", "Jl. Ahmad Yani",
+]
+# Sebaran status pendaftaran (nilai kosong = belum diproses)
+STATUS = ["", "", "Berhasil", "Berhasil", "Berhasil", "Pengawasan", "Gagal"]
+# Bobot jumlah anggota per KK (1 s.d. 7 orang)
+BOBOT_ANGGOTA = [10, 18, 24, 24, 14, 6, 4]
+
+
+class PembuatNomor:
+    """Membuat NIK/No KK unik berformat wilayah(6) + DDMMYY + urut(4)."""
+
+    def __init__(self):
+        self._terpakai = set()
+
+    def buat(self, wilayah, tanggal, perempuan=False):
+        hari = tanggal.day + (40 if perempuan else 0)
+        awalan = f"{wilayah}{hari:02d}{tanggal.month:02d}{tanggal.year % 100:02d}"
+        urut = 1
+        while f"{awalan}{urut:04d}" in self._terpakai:
+            urut += 1
+        nomor = f"{awalan}{urut:04d}"
+        self._terpakai.add(nomor)
+        return nomor
+
+
+def _tanggal_acak(rng, tahun_awal, tahun_akhir):
+    awal = date(tahun_awal, 1, 1)
+    return awal + timedelta(days=rng.randrange((date(tahun_akhir, 12, 31) - awal).days + 1))
+
+
+def _orang(rng, nomor, wilayah, kota, no_kk, status_hubungan, perempuan, nama_keluarga,
+           tahun_lahir):
+    lahir = _tanggal_acak(rng, *tahun_lahir)
+    depan = rng.choice(NAMA_DEPAN_WANITA if perempuan else NAMA_DEPAN_PRIA)
+    nama = f"{depan} {nama_keluarga}"
+    dewasa = lahir.year <= 2006
+    return {
+        'nama': nama,
+        'status': rng.choice(STATUS),
+        'keterangan': "",
+        'status_hubungan': status_hubungan,
+        'nik': nomor.buat(wilayah, lahir, perempuan),
+        'nik_kk': "",  # Diisi NIK kepala keluarga oleh buat_keluarga
+        'no_kk': no_kk,
+        'tempat_lahir': kota,
+        'tanggal_lahir': lahir.isoformat(),
+        'alamat': "",  # Sama untuk satu keluarga, diisi oleh buat_keluarga
+        'pekerjaan': rng.choice(PEKERJAAN) if dewasa else "Pelajar/Mahasiswa",
+        'nama_ibu': "",
+        'email': f"{depan.lower()}.{nama_keluarga.lower()}{rng.randrange(1000)}@mail.com" if dewasa else "",
+        'password': f"Npwp{rng.randrange(10**6):06d}" if dewasa else "",
+        'no_hp': f"08{rng.randrange(10**10):010d}" if dewasa else "",
+        'catatan': "",
+    }
+
+
+def buat_keluarga(rng, nomor):
+    """Satu Kartu Keluarga: list dict pendaftar (kepala keluarga lebih dulu)."""
+    wilayah, kota = rng.choice(WILAYAH)
+    no_kk = nomor.buat(wilayah, _tanggal_acak(rng, 2005, 2024))
+    nama_keluarga = rng.choice(NAMA_KELUARGA)
+    jumlah = rng.choices(range(1, len(BOBOT_ANGGOTA) + 1), BOBOT_ANGGOTA)[0]
+
+    kepala_perempuan = jumlah == 1 and rng.random() < 0.3
+    anggota = [_orang(rng, nomor, wilayah, kota, no_kk, "Kepala Keluarga",
+                      kepala_perempuan, nama_keluarga, (1950, 1995))]
+    if jumlah > 1:
+        anggota.append(_orang(rng, nomor, wilayah, kota, no_kk, "Istri", True,
+                              nama_keluarga, (1955, 1998)))
+    for _ in range(jumlah - 2):
+        perempuan = rng.random() < 0.5
+        anggota.append(_orang(rng, nomor, wilayah, kota, no_kk, "Anak", perempuan,
+                              nama_keluarga, (1975, 2020)))
+
+    ibu = anggota[1]['nama'] if jumlah > 1 else ""
+    alamat = f"{rng.choice(JALAN)} No. {rng.randrange(1, 300)}, {kota}"
+    for orang in anggota:
+        orang['nik_kk'] = anggota[0]['nik']
+        orang['alamat'] = alamat
+        if orang['status_hubungan'] == "Anak":
+            orang['nama_ibu'] = ibu
+    return anggota
+
+
+def iter_pendaftar(jumlah, seed=0):
+    """Menghasilkan tepat `jumlah` dict pendaftar, dikelompokkan per keluarga."""
+    rng = random.Random(seed)
+    nomor = PembuatNomor()
+    dibuat = 0
+    while dibuat < jumlah:
+        for orang in buat_keluarga(rng, nomor)[:jumlah - dibuat]:
+            yield orang
+            dibuat += 1
+
+
+def isi_database(jumlah, seed=0, progress_cb=None):
+    """
+    Mengisi database aktif (db_manager.DB_NAME di folder kerja saat ini)
+    dengan `jumlah` pendaftar lewat save_data_batch, per potongan.
+    Mengembalikan jumlah baris yang tersimpan.
+    """
+    tersimpan = 0
+    potongan = []
+    for i, data in enumerate(iter_pendaftar(jumlah, seed), start=1):
+        potongan.append((i, data))
+        if len(potongan) >= UKURAN_POTONGAN:
+            tersimpan += _simpan_potongan(potongan)
+            potongan = []
+            if progress_cb:
+                progress_cb(tersimpan, jumlah)
+    if potongan:
+        tersimpan += _simpan_potongan(potongan)
+    if progress_cb:
+        progress_cb(tersimpan, jumlah)
+    return tersimpan
+
+
+def _simpan_potongan(potongan):
+    success, hasil = db_manager.save_data_batch(potongan)
+    if not success:
+        raise RuntimeError(hasil)
+    return hasil[0]
+
+
+def buat_dokumen_dummy(proporsi=0.2, seed=0, ukuran_kb=64):
+    """
+    Membuat folder dokumen untuk sebagian keluarga: satu scan KK bersama
+    (tersimpan sekali sebagai blob) dan satu scan KTP per anggota, lalu
+    mencatatnya di tabel dokumen. Mengembalikan jumlah file yang dibuat.
+    """
+    rng = random.Random(seed)
+    conn = db_manager.get_connection()
+    keluarga = conn.execute(
+        "SELECT no_kk, GROUP_CONCAT(nik, ',') FROM pendaftaran "
+        "WHERE no_kk != '' GROUP BY no_kk"
+    ).fetchall()
+
+    dibuat = 0
+    with tempfile.TemporaryDirectory(prefix="npwp_dummy_") as sumber:
+        for no_kk, daftar_nik in keluarga:
+            if rng.random() >= proporsi:
+                continue
+            scan_kk = Path(sumber) / f"KK_{no_kk}.pdf"
+            scan_kk.write_bytes(b"%PDF-1.4\n" + rng.randbytes(ukuran_kb * 1024))
+            for nik in daftar_nik.split(','):
+                scan_ktp = Path(sumber) / f"KTP_{nik}.jpg"
+                scan_ktp.write_bytes(rng.randbytes(ukuran_kb * 1024))
+                rencana = doc_manager.rencana_salinan(nik, [str(scan_kk), str(scan_ktp)])
+                gagal = doc_manager.salin_semua(rencana)
+                db_manager.catat_dokumen(nik, [dest.name for _, dest in rencana])
+                dibuat += len(rencana) - len(gagal)
+                scan_ktp.unlink()
+            scan_kk.unlink()
+    return dibuat
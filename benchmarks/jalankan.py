@@ -0,0 +1,265 @@
+# jalankan.py
+# Benchmark operasi database dan tampilan daftar pada beberapa ukuran data.
+#
+#   python benchmarks/jalankan.py                       # 1rb, 100rb, 1jt baris
+#   python benchmarks/jalankan.py --jumlah 1000 --dokumen 0.2
+#   python benchmarks/jalankan.py --folder-kerja ~/bench  # DB dipakai ulang
+#   python benchmarks/jalankan.py --bandingkan benchmarks/hasil/lama.json
+#
+# Setiap ukuran memakai folder kerja sendiri (database + dokumen_npwp),
+# diisi oleh data_sintetis.py. Yang diukur: db_manager.load_data (semua
+# baris), pencarian (load_data dan count_data + load_page seperti tabel
+# daftar), get_data_by_id, save_data, update_data, delete_data, dan
+# ViewWidget.load_data sampai tabel selesai digambar (platform Qt
+# offscreen). Hasil ditulis sebagai JSON ke benchmarks/hasil/ agar bisa
+# dibandingkan antar-run dengan --bandingkan.
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import data_sintetis  # Juga menambahkan folder kode aplikasi ke sys.path
+import db_manager
+
+FOLDER_BENCHMARK = Path(__file__).resolve().parent
+FOLDER_HASIL = FOLDER_BENCHMARK / "hasil"
+
+UKURAN_DEFAULT = [1000, 100000, 1000000]
+
+# Operasi yang membaca seluruh tabel cukup diulang beberapa kali saja
+ULANG_BERAT = 3
+
+
+def ukur(fungsi, ulang):
+    """Menjalankan fungsi(i) sebanyak `ulang` kali; ringkasan durasi (ms)."""
+    durasi = []
+    for i in range(ulang):
+        mulai = time.perf_counter()
+        hasil = fungsi(i)
+        durasi.append((time.perf_counter() - mulai) * 1000)
+        if isinstance(hasil, tuple) and hasil and hasil[0] is False:
+            raise RuntimeError(hasil[1])
+    durasi.sort()
+    return {
+        'n': len(durasi),
+        'min_ms': round(durasi[0], 3),
+        'median_ms': round(statistics.median(durasi), 3),
+        'p95_ms': round(durasi[min(len(durasi) - 1, int(len(durasi) * 0.95))], 3),
+        'max_ms': round(durasi[-1], 3),
+        'rata_rata_ms': round(statistics.fmean(durasi), 3),
+    }
+
+
+def siapkan_database(folder, jumlah, args):
+    """
+    Pindah ke folder kerja, inisialisasi DB, lalu isi sampai `jumlah` baris
+    jika belum. Mengembalikan info pengisian (dict).
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    os.chdir(folder)
+    db_manager.close_connections()
+    success, pesan = db_manager.init_db()
+    if not success:
+        raise RuntimeError(pesan)
+
+    info = {'folder': str(folder)}
+    ada = db_manager.get_connection().execute("SELECT COUNT(*) FROM pendaftaran").fetchone()[0]
+    if ada == 0:
+        print(f"  Membuat {jumlah} pendaftar sintetis...")
+        mulai = time.perf_counter()
+        data_sintetis.isi_database(
+            jumlah, seed=args.seed,
+            progress_cb=lambda n, total: print(f"    {n}/{total}", end="\r", flush=True),
+        )
+        info['pengisian_detik'] = round(time.perf_counter() - mulai, 2)
+        print()
+        if args.dokumen:
+            mulai = time.perf_counter()
+            info['jumlah_dokumen'] = data_sintetis.buat_dokumen_dummy(args.dokumen, seed=args.seed)
+            info['dokumen_detik'] = round(time.perf_counter() - mulai, 2)
+    elif ada != jumlah:
+        raise RuntimeError(f"Folder {folder} sudah berisi {ada} baris, bukan {jumlah}.")
+    info['jumlah_baris'] = jumlah
+    return info
+
+
+def ukur_database(jumlah, args):
+    """Mengukur operasi db_manager pada database di folder kerja saat ini."""
+    rng = random.Random(args.seed)
+    conn = db_manager.get_connection()
+    maks_id = conn.execute("SELECT MAX(id) FROM pendaftaran").fetchone()[0]
+    contoh = conn.execute(
+        "SELECT nik, nama FROM pendaftaran WHERE id IN (?, ?, ?)",
+        (1, maks_id // 2 or 1, maks_id)
+    ).fetchall()
+
+    # Kata kunci: nama keluarga (banyak hasil), nama depan + awalan, awalan NIK
+    kata_kunci = [contoh[0]['nama'].split()[-1], contoh[-1]['nama'].split()[0][:3],
+                  contoh[len(contoh) // 2]['nik'][:8]]
+    hasil = {}
+
+    hasil['load_data'] = ukur(lambda i: db_manager.load_data(""), ULANG_BERAT)
+    hasil['cari_load_data'] = ukur(
+        lambda i: db_manager.load_data(kata_kunci[i % len(kata_kunci)]),
+        ULANG_BERAT * len(kata_kunci)
+    )
+
+    def cari_halaman(i):
+        term = kata_kunci[i % len(kata_kunci)]
+        db_manager.count_data(term)
+        return db_manager.load_page(None, 200, term)
+    hasil['cari_halaman'] = ukur(cari_halaman, args.ulang)
+
+    id_acak = [rng.randint(1, maks_id) for _ in range(args.ulang)]
+    hasil['get_data_by_id'] = ukur(lambda i: db_manager.get_data_by_id(id_acak[i]), args.ulang)
+
+    # Pendaftar baru dari seed lain; NIK yang kebetulan sudah terdaftar dilewati
+    baru = []
+    for data in data_sintetis.iter_pendaftar(args.ulang * 3, seed=args.seed + 1):
+        if db_manager.get_data_by_nik(data['nik'])[0]:
+            continue
+        baru.append(data)
+        if len(baru) == args.ulang:
+            break
+    hasil['save_data'] = ukur(lambda i: db_manager.save_data(baru[i], copy_files=False), len(baru))
+
+    rows = [dict(db_manager.get_data_by_id(i)[1]) for i in id_acak if db_manager.get_data_by_id(i)[0]]
+    def ubah(i):
+        data = dict(rows[i], old_nik=rows[i]['nik'], keterangan=f"benchmark {i}")
+        return db_manager.update_data(rows[i]['id'], data, copy_files=False)
+    hasil['update_data'] = ukur(ubah, len(rows))
+
+    id_baru = [db_manager.get_data_by_nik(data['nik'])[1]['id'] for data in baru]
+    hasil['delete_data'] = ukur(lambda i: db_manager.delete_data(id_baru[i]), len(id_baru))
+    return hasil
+
+
+def ukur_tampilan(args):
+    """Mengukur ViewWidget.load_data sampai tabel selesai digambar (offscreen)."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    from view_widget import ViewWidget
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    view = ViewWidget()
+    view.change_timer.stop()  # Polling perubahan tidak ikut diukur
+    view.resize(1280, 800)
+    view.show()
+    app.processEvents()
+
+    def muat(i):
+        view.load_data()
+        view.grab()  # Memaksa seluruh tabel (baris yang terlihat) digambar
+        app.processEvents()
+
+    hasil = {'view_load_data': ukur(muat, max(ULANG_BERAT, args.ulang // 10))}
+
+    view.group_kk_check.setChecked(True)  # Tampilan per KK (load_data memuat pohon)
+    hasil['view_load_data_per_kk'] = ukur(muat, ULANG_BERAT)
+    view.group_kk_check.setChecked(False)
+
+    view.close()
+    view.deleteLater()
+    app.processEvents()
+    return hasil
+
+
+def _commit_git():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=FOLDER_BENCHMARK,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def bandingkan(lama, baru):
+    """Mencetak rasio median (baru / lama) per ukuran dan operasi."""
+    print(f"\nPerbandingan dengan {lama.get('waktu')} (commit {lama.get('commit')}):")
+    print(f"{'Baris':>9}  {'Operasi':<24}{'Lama':>11}{'Baru':>11}{'Rasio':>8}")
+    for jumlah, hasil in baru['hasil'].items():
+        hasil_lama = lama.get('hasil', {}).get(jumlah, {})
+        for operasi, ringkasan in hasil['operasi'].items():
+            sebelum = hasil_lama.get('operasi', {}).get(operasi)
+            if not sebelum:
+                continue
+            rasio = ringkasan['median_ms'] / sebelum['median_ms'] if sebelum['median_ms'] else 0
+            print(f"{jumlah:>9}  {operasi:<24}{sebelum['median_ms']:>9.2f}ms"
+                  f"{ringkasan['median_ms']:>9.2f}ms{rasio:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NPWP Manager dengan data sintetis.")
+    parser.add_argument("--jumlah", type=int, nargs="+", default=UKURAN_DEFAULT,
+                        help="Jumlah baris per run (default: 1000 100000 1000000)")
+    parser.add_argument("--ulang", type=int, default=50,
+                        help="Pengulangan untuk operasi per baris (default: 50)")
+    parser.add_argument("--dokumen", type=float, default=0.0,
+                        help="Proporsi keluarga yang diberi folder dokumen dummy (0-1)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tanpa-ui", action="store_true", help="Lewati pengukuran ViewWidget")
+    parser.add_argument("--folder-kerja", type=Path,
+                        help="Simpan database di sini agar bisa dipakai ulang (default: folder sementara)")
+    parser.add_argument("--keluaran", type=Path, help="File JSON hasil")
+    parser.add_argument("--bandingkan", type=Path, help="File JSON hasil run sebelumnya")
+    args = parser.parse_args()
+
+    # Path relatif harus diselesaikan sebelum pindah ke folder kerja
+    keluaran = (args.keluaran or FOLDER_HASIL / f"hasil_{datetime.now():%Y%m%d_%H%M%S}.json").resolve()
+    pembanding = args.bandingkan.resolve() if args.bandingkan else None
+    folder_sementara = None
+    if args.folder_kerja:
+        folder_kerja = args.folder_kerja.expanduser().resolve()
+    else:
+        folder_sementara = tempfile.TemporaryDirectory(prefix="npwp_bench_")
+        folder_kerja = Path(folder_sementara.name)
+
+    laporan = {
+        'waktu': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit_git(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'argumen': {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+        'hasil': {},
+    }
+    folder_awal = Path.cwd()
+    try:
+        for jumlah in args.jumlah:
+            print(f"== {jumlah} baris ==")
+            info = siapkan_database(folder_kerja / f"n_{jumlah}", jumlah, args)
+            operasi = ukur_database(jumlah, args)
+            if not args.tanpa_ui:
+                operasi.update(ukur_tampilan(args))
+            for nama, ringkasan in operasi.items():
+                print(f"  {nama:<24} median {ringkasan['median_ms']:>10.2f} ms"
+                      f"   p95 {ringkasan['p95_ms']:>10.2f} ms")
+            info.pop('folder')
+            laporan['hasil'][str(jumlah)] = dict(info, operasi=operasi)
+            db_manager.close_connections()
+    finally:
+        os.chdir(folder_awal)
+        if folder_sementara:
+            folder_sementara.cleanup()
+
+    keluaran.parent.mkdir(parents=True, exist_ok=True)
+    keluaran.write_text(json.dumps(laporan, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Hasil ditulis ke {keluaran}")
+
+    if pembanding:
+        bandingkan(json.loads(pembanding.read_text(encoding="utf-8")), laporan)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,18 @@
 #!/bin/bash
 
+# Pemakaian:
+#   ./build.sh           -> mode folder (onedir, default): dist/AplikasiNPWP/
+#   ./build.sh onefile   -> satu file exe: dist/AplikasiNPWP(.exe)
+# Mode folder dibuka lebih cepat karena tidak perlu mengekstrak seluruh
+# isi aplikasi ke folder sementara setiap kali dijalankan.
+MODE="${1:-onedir}"
+if [ "$MODE" != "onedir" ] && [ "$MODE" != "onefile" ]; then
+    echo "Error: mode tidak dikenal '$MODE' (pilih 'onedir' atau 'onefile')."
+    exit 1
+fi
+
 # Menampilkan pesan bahwa proses dimulai
-echo "Memulai proses build AplikasiNPWP..."
+echo "Memulai proses build AplikasiNPWP (mode: $MODE)..."
 
 # 1. Tentukan path ke virtual environment
 VENV_DIR=".env"
@@ -18,10 +29,12 @@ fi
 
 # 3. Jalankan perintah PyInstaller
 echo "Menjalankan PyInstaller..."
-pyinstaller --onefile \
+pyinstaller --$MODE \
+            --noconfirm \
             --windowed \
             --name=AplikasiNPWP \
             --add-data=".myenv:." \
+            --add-data="assets:assets" \
             --icon="assets/icon.png" \
             main.py
 
@@ -29,7 +42,11 @@ pyinstaller --onefile \
 if [ $? -eq 0 ]; then
     echo "==================================================="
     echo "Build SUKSES!"
-    echo "Aplikasi Anda ada di folder: dist/AplikasiNPWP"
+    if [ "$MODE" = "onedir" ]; then
+        echo "Aplikasi Anda ada di folder: dist/AplikasiNPWP/ (bagikan seluruh foldernya)"
+    else
+        echo "Aplikasi Anda ada di: dist/AplikasiNPWP"
+    fi
     echo "==================================================="
 else
     echo "==================================================="
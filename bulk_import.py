@@ -0,0 +1,379 @@
+# bulk_import.py
+# Mesin impor massal data pendaftar dari file CSV atau JSONL.
+# File dibaca secara streaming (baris per baris), dipetakan ke
+# FIELD_UNTUK_INSERT, lalu disimpan per potongan (chunk) lewat
+# db_manager.save_data_batch. Modul ini sengaja tidak mengimpor PyQt6.
+
+import csv
+import io
+import json
+import os
+import re
+from datetime import datetime
+
+import db_manager
+from config import FIELD_UNTUK_INSERT
+
+# Jumlah baris per transaksi
+DEFAULT_CHUNK_SIZE = 500
+
+# Nama kolom alternatif yang sering dipakai di file dari kantor desa
+ALIAS_KOLOM = {
+    'nama_lengkap': 'nama',
+    'status_pendaftaran': 'status',
+    'status_hub_keluarga': 'status_hubungan',
+    'status_hubungan_keluarga': 'status_hubungan',
+    'hubungan': 'status_hubungan',
+    'hubungan_keluarga': 'status_hubungan',
+    'nik_kepala_keluarga': 'nik_kk',
+    'nomor_kk': 'no_kk',
+    'nomor_kartu_keluarga': 'no_kk',
+    'no_kartu_keluarga': 'no_kk',
+    'kk': 'no_kk',
+    'tgl_lahir': 'tanggal_lahir',
+    'nama_ibu_kandung': 'nama_ibu',
+    'nomor_hp': 'no_hp',
+    'no_telp': 'no_hp',
+    'telepon': 'no_hp',
+    'e_mail': 'email',
+}
+
+FORMAT_TANGGAL = ["%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d"]
+
+POLA_NIK = re.compile(r"^\d{16}$")
+
+
+def normalisasi_nama_kolom(nama):
+    """'Nama Lengkap' -> 'nama_lengkap' -> 'nama' (lewat ALIAS_KOLOM)."""
+    kunci = re.sub(r"[^0-9a-z]+", "_", str(nama).strip().lower()).strip("_")
+    return ALIAS_KOLOM.get(kunci, kunci)
+
+
+def petakan_kolom(headers):
+    """
+    Memetakan header file ke FIELD_UNTUK_INSERT.
+    Mengembalikan (dict indeks->field, daftar header yang diabaikan).
+    """
+    pemetaan = {}
+    diabaikan = []
+    for i, header in enumerate(headers):
+        field = normalisasi_nama_kolom(header)
+        if field in FIELD_UNTUK_INSERT and field not in pemetaan.values():
+            pemetaan[i] = field
+        else:
+            diabaikan.append(header)
+    return pemetaan, diabaikan
+
+
+def normalisasi_tanggal(nilai):
+    """Mengubah berbagai format tanggal menjadi YYYY-MM-DD (format DB)."""
+    for fmt in FORMAT_TANGGAL:
+        try:
+            return datetime.strptime(nilai, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return nilai
+
+
+def bersihkan_record(record):
+    """
+    Membersihkan satu record hasil pemetaan: trim spasi, buang apostrof
+    pembuka dari Excel, dan seragamkan format tanggal.
+    """
+    hasil = {}
+    for field in FIELD_UNTUK_INSERT:
+        nilai = record.get(field)
+        if nilai is None:
+            hasil[field] = ""
+            continue
+        nilai = str(nilai).strip()
+        if nilai.startswith("'"):
+            nilai = nilai[1:]
+        if field == 'tanggal_lahir' and nilai:
+            nilai = normalisasi_tanggal(nilai)
+        hasil[field] = nilai
+    return hasil
+
+
+def validasi_record(record):
+    """Mengembalikan pesan error (str) atau None jika record valid."""
+    if not record.get('nama'):
+        return "Nama kosong"
+    if not record.get('nik'):
+        return "NIK kosong"
+    if not POLA_NIK.match(record['nik']):
+        return "Format NIK tidak valid (harus 16 digit)"
+    return None
+
+
+# --- PEMBACA STREAMING ---
+class _PelacakPosisi:
+    """Menyimpan file biner yang sedang dibaca untuk menghitung progres (byte)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.ukuran = os.path.getsize(path) or 1
+        self.raw = open(path, 'rb')
+        self.teks = None
+
+    def buka_teks(self, **kwargs):
+        """Membungkus file biner sebagai teks (disimpan agar tidak ikut tertutup)."""
+        self.teks = io.TextIOWrapper(self.raw, **kwargs)
+        return self.teks
+
+    def posisi(self):
+        if self.raw.closed:
+            return self.ukuran
+        return self.raw.tell()
+
+    def close(self):
+        if self.teks is not None:
+            self.teks.close()
+        else:
+            self.raw.close()
+
+
+def _baca_csv(pelacak, info):
+    teks = pelacak.buka_teks(encoding='utf-8-sig', newline='')
+    contoh = teks.read(4096)
+    teks.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(contoh, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+
+    reader = csv.reader(teks, dialect)
+    headers = next(reader, None)
+    if headers is None:
+        return
+    pemetaan, info['kolom_diabaikan'] = petakan_kolom(headers)
+    info['kolom_dipetakan'] = list(pemetaan.values())
+
+    for nomor_baris, baris in enumerate(reader, start=2):
+        if not any(sel.strip() for sel in baris):
+            continue  # Lewati baris kosong
+        record = {field: baris[i] for i, field in pemetaan.items() if i < len(baris)}
+        yield nomor_baris, record, None
+
+
+def _baca_jsonl(pelacak, info):
+    teks = pelacak.buka_teks(encoding='utf-8-sig')
+    diabaikan = set()
+    for nomor_baris, baris in enumerate(teks, start=1):
+        baris = baris.strip()
+        if not baris:
+            continue
+        try:
+            objek = json.loads(baris)
+        except json.JSONDecodeError as e:
+            yield nomor_baris, None, f"JSON tidak valid: {e}"
+            continue
+        if not isinstance(objek, dict):
+            yield nomor_baris, None, "Baris bukan objek JSON"
+            continue
+        record = {}
+        for kunci, nilai in objek.items():
+            field = normalisasi_nama_kolom(kunci)
+            if field in FIELD_UNTUK_INSERT:
+                record[field] = nilai
+                if field not in info['kolom_dipetakan']:
+                    info['kolom_dipetakan'].append(field)
+            elif kunci not in diabaikan:
+                diabaikan.add(kunci)
+                info['kolom_diabaikan'] = sorted(diabaikan)
+        yield nomor_baris, record, None
+
+
+def iter_records(pelacak, info):
+    """Memilih pembaca berdasarkan ekstensi file (.csv atau .jsonl/.ndjson)."""
+    ekstensi = os.path.splitext(pelacak.path)[1].lower()
+    if ekstensi == '.csv':
+        return _baca_csv(pelacak, info)
+    if ekstensi in ('.jsonl', '.ndjson'):
+        return _baca_jsonl(pelacak, info)
+    raise ValueError(f"Format file '{ekstensi}' tidak didukung. Gunakan CSV atau JSONL.")
+
+
+def import_file(path, chunk_size=DEFAULT_CHUNK_SIZE, progress_cb=None, cancel_check=None):
+    """
+    Mengimpor file CSV/JSONL ke database.
+
+    progress_cb(persen, diproses, disimpan) dipanggil setiap satu chunk
+    selesai. cancel_check() boleh mengembalikan True untuk berhenti setelah
+    chunk yang sedang berjalan (chunk yang sudah tersimpan tetap tersimpan).
+
+    Mengembalikan (success, laporan) dengan laporan berupa dict:
+    diproses, disimpan, konflik [(baris, nik, alasan)], dibatalkan,
+    kolom_dipetakan, kolom_diabaikan.
+    """
+    laporan = {
+        'diproses': 0, 'disimpan': 0, 'konflik': [], 'dibatalkan': False,
+        'kolom_dipetakan': [], 'kolom_diabaikan': [],
+    }
+    try:
+        pelacak = _PelacakPosisi(path)
+    except OSError as e:
+        return False, f"Gagal membuka file: {e}"
+
+    def simpan_chunk(chunk):
+        success, hasil = db_manager.save_data_batch(chunk)
+        if not success:
+            raise RuntimeError(hasil)
+        tersimpan, konflik = hasil
+        laporan['disimpan'] += tersimpan
+        laporan['konflik'].extend(konflik)
+        if progress_cb is not None:
+            persen = int(pelacak.posisi() * 100 / pelacak.ukuran)
+            progress_cb(min(persen, 100), laporan['diproses'], laporan['disimpan'])
+
+    try:
+        chunk = []
+        for nomor_baris, record, error in iter_records(pelacak, laporan):
+            laporan['diproses'] += 1
+            if error is None:
+                record = bersihkan_record(record)
+                error = validasi_record(record)
+            if error is not None:
+                nik = record.get('nik', '') if record else ''
+                laporan['konflik'].append((nomor_baris, nik, error))
+                continue
+
+            chunk.append((nomor_baris, record))
+            if len(chunk) >= chunk_size:
+                simpan_chunk(chunk)
+                chunk = []
+                if cancel_check is not None and cancel_check():
+                    laporan['dibatalkan'] = True
+                    break
+
+        if chunk and not laporan['dibatalkan']:
+            simpan_chunk(chunk)
+        laporan['konflik'].sort()
+        return True, laporan
+    except Exception as e:
+        return False, f"Impor berhenti di tengah jalan ({laporan['disimpan']} data sudah tersimpan): {e}"
+    finally:
+        pelacak.close()
+
+
+# --- IMPOR AI BATCH (ARRAY / JSONL) ---
+KEPUTUSAN_TAMBAH = "Tambah"
+KEPUTUSAN_PERBARUI = "Perbarui"
+KEPUTUSAN_LEWATI = "Lewati"
+
+TIPE_SKEMA = {
+    "string": str, "object": dict, "array": list,
+    "integer": int, "number": (int, float), "boolean": bool,
+}
+
+
+def parse_json_records(json_text):
+    """
+    Mem-parse hasil AI yang berupa satu objek JSON, array objek, atau JSONL
+    (satu objek per baris). Blok ```json ... ``` dibuang terlebih dahulu.
+    Mengembalikan list objek; melempar ValueError jika tidak bisa di-parse.
+    """
+    teks = json_text.strip()
+    if teks.startswith("```"):
+        teks = teks[3:]
+        if teks.lower().startswith("json"):
+            teks = teks[4:]
+        if teks.rstrip().endswith("```"):
+            teks = teks.rstrip()[:-3]
+        teks = teks.strip()
+
+    try:
+        hasil = json.loads(teks)
+    except json.JSONDecodeError as e_json:
+        # Coba sebagai JSONL
+        hasil = []
+        for nomor, baris in enumerate(teks.splitlines(), start=1):
+            baris = baris.strip().rstrip(",")
+            if not baris:
+                continue
+            try:
+                hasil.append(json.loads(baris))
+            except json.JSONDecodeError:
+                raise ValueError(str(e_json)) from None
+        if not hasil:
+            raise ValueError(str(e_json)) from None
+
+    if isinstance(hasil, dict):
+        return [hasil]
+    if isinstance(hasil, list):
+        return hasil
+    raise ValueError("JSON harus berupa objek, array objek, atau JSONL.")
+
+
+def validasi_skema(record, schema):
+    """
+    Memvalidasi satu record terhadap skema JSON yang dibangun di
+    FormWidget._generate_ai_prompt_assets (tipe, field wajib, dan properti).
+    Mengembalikan pesan error (str) atau None.
+    """
+    if not isinstance(record, dict):
+        return "Bukan objek JSON"
+
+    for field in schema.get("required", []):
+        if not record.get(field):
+            return f"Field wajib '{field}' kosong"
+
+    for field, aturan in schema.get("properties", {}).items():
+        nilai = record.get(field)
+        if nilai is None:
+            continue
+        tipe = TIPE_SKEMA.get(aturan.get("type"))
+        if tipe is not None and not isinstance(nilai, tipe):
+            return f"Field '{field}' harus bertipe {aturan.get('type')}"
+
+    return validasi_record(bersihkan_record(record))
+
+
+def rencanakan_upsert(records, schema):
+    """
+    Menentukan keputusan untuk setiap record: Tambah (NIK baru), Perbarui
+    (NIK sudah ada dan ada field yang berubah), atau Lewati (tidak valid,
+    NIK ganda di input, atau tidak ada perubahan).
+    Mengembalikan (success, list (keputusan, record_bersih, alasan)).
+    """
+    rencana = []
+    kandidat = []
+    for record in records:
+        error = validasi_skema(record, schema)
+        if error is not None:
+            bersih = bersihkan_record(record) if isinstance(record, dict) else {}
+            rencana.append([KEPUTUSAN_LEWATI, bersih, error])
+        else:
+            bersih = bersihkan_record(record)
+            rencana.append([None, bersih, ""])
+            kandidat.append(bersih['nik'])
+
+    success, terdaftar = db_manager.get_data_by_niks(kandidat)
+    if not success:
+        return False, terdaftar
+
+    nik_terlihat = set()
+    for item in rencana:
+        keputusan, record, _ = item
+        if keputusan is not None:
+            continue
+        nik = record['nik']
+        if nik in nik_terlihat:
+            item[0], item[2] = KEPUTUSAN_LEWATI, "NIK ganda di input"
+            continue
+        nik_terlihat.add(nik)
+
+        lama = terdaftar.get(nik)
+        if lama is None:
+            item[0] = KEPUTUSAN_TAMBAH
+            continue
+        berubah = [
+            field for field in FIELD_UNTUK_INSERT
+            if record.get(field) and record.get(field) != (lama[field] or "")
+        ]
+        if berubah:
+            item[0], item[2] = KEPUTUSAN_PERBARUI, "Berubah: " + ", ".join(berubah)
+        else:
+            item[0], item[2] = KEPUTUSAN_LEWATI, "Tidak ada perubahan"
+
+    return True, [tuple(item) for item in rencana]
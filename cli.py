@@ -0,0 +1,431 @@
+# cli.py
+# Alat baris perintah tanpa GUI untuk pekerjaan terjadwal (cron/Task
+# Scheduler) dan perbaikan massal. Dibangun di atas db_manager dan modul
+# lain yang tidak mengimpor PyQt6, jadi tidak perlu sesi desktop dan tidak
+# membayar waktu startup Qt.
+#
+#   python cli.py impor data_desa.csv
+#   python cli.py ekspor hasil.xlsx --cari lumenta --status Berhasil
+#   python cli.py ekspor - --format jsonl | gzip > semua.jsonl.gz
+#   python cli.py cari "7171 budi" --batas 20
+#   python cli.py reindex
+#   python cli.py periksa [--cepat]
+#   python cli.py optimasi [--tanpa-vacuum]
+#   python cli.py sinkron-dokumen
+#   python cli.py bersihkan-sampah [--retensi HARI]
+#
+# Opsi umum (sebelum nama perintah): --folder DIR (folder berisi database
+# dan dokumen_npwp; default folder saat ini) dan --json (progres dan
+# ringkasan sebagai JSON per baris di stderr). stdout hanya berisi data
+# (hasil cari, ekspor ke '-', konflik impor, masalah integritas) sehingga
+# aman dialirkan ke program lain. Baris dialirkan per batch, jadi memori
+# tetap datar untuk jutaan baris.
+#
+# Kode keluar: lihat KELUAR_* di bawah.
+
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+
+import bulk_import
+import db_manager
+import export_manager
+from config import KOLOM_DAFTAR, KOLOM_DB, RETENSI_SAMPAH_HARI, JEDA_PEMBERSIH_DETIK
+
+KELUAR_SUKSES = 0
+KELUAR_GAGAL = 1
+KELUAR_ARGUMEN = 2        # Dipakai argparse untuk argumen yang salah
+KELUAR_ADA_MASALAH = 3    # Selesai, tetapi ada konflik impor / masalah integritas
+KELUAR_DIBATALKAN = 130   # Ctrl+C atau SIGTERM
+
+# Jeda minimum antar-laporan progres (detik)
+JEDA_PROGRES = 0.5
+
+# Jumlah baris per batch saat mengalirkan hasil
+UKURAN_BATCH = 1000
+
+
+class Pelapor:
+    """Menulis progres, pesan, dan ringkasan ke stderr (teks atau JSON per baris)."""
+
+    def __init__(self, mode_json=False, file=sys.stderr):
+        self.mode_json = mode_json
+        self.file = file
+        self.interaktif = file.isatty() and not mode_json
+        self._terakhir = 0.0
+        self._ada_baris_progres = False
+
+    def _tulis_json(self, data):
+        self.file.write(json.dumps(data, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def progres(self, perintah, selesai, total, keterangan=None):
+        sekarang = time.monotonic()
+        if selesai != total and sekarang - self._terakhir < JEDA_PROGRES:
+            return
+        self._terakhir = sekarang
+        persen = round(selesai * 100 / total, 1) if total else None
+        if self.mode_json:
+            data = {'jenis': 'progres', 'perintah': perintah, 'selesai': selesai, 'total': total, 'persen': persen}
+            if keterangan:
+                data['keterangan'] = keterangan
+            self._tulis_json(data)
+            return
+        teks = f"{keterangan or perintah}: {selesai}/{total}" + (f" ({persen}%)" if persen is not None else "")
+        if self.interaktif:
+            self.file.write(f"\r{teks}\033[K")
+            self._ada_baris_progres = True
+        else:
+            self.file.write(teks + "\n")
+        self.file.flush()
+
+    def pesan(self, teks):
+        self._akhiri_progres()
+        if self.mode_json:
+            self._tulis_json({'jenis': 'pesan', 'pesan': teks})
+        else:
+            self.file.write(teks + "\n")
+            self.file.flush()
+
+    def hasil(self, perintah, kode, pesan, **data):
+        self._akhiri_progres()
+        if self.mode_json:
+            self._tulis_json(dict({'jenis': 'hasil', 'perintah': perintah, 'kode_keluar': kode, 'pesan': pesan}, **data))
+        else:
+            self.file.write(pesan + "\n")
+            self.file.flush()
+        return kode
+
+    def sebagai_file(self):
+        """Objek mirip file untuk print() modul lain: setiap baris menjadi pesan."""
+        if not self.mode_json:
+            return self.file
+        pelapor = self
+
+        class _FilePesan:
+            def write(self, teks):
+                for baris in teks.splitlines():
+                    if baris.strip():
+                        pelapor.pesan(baris)
+                return len(teks)
+
+            def flush(self):
+                pass
+        return _FilePesan()
+
+    def _akhiri_progres(self):
+        if self._ada_baris_progres:
+            self.file.write("\n")
+            self._ada_baris_progres = False
+
+
+# --- PEMBATALAN ---
+_dibatalkan = threading.Event()
+
+
+def _tangani_sinyal(signum, frame):
+    if _dibatalkan.is_set():
+        # Sinyal kedua: hentikan sekarang juga (mis. di tengah VACUUM)
+        raise KeyboardInterrupt
+    _dibatalkan.set()
+
+
+def _filter_dari_args(args):
+    filters = {}
+    for kolom in ('status', 'status_hubungan', 'no_kk'):
+        nilai = getattr(args, kolom, None)
+        if nilai:
+            filters[kolom] = nilai[0] if len(nilai) == 1 else nilai
+    return filters
+
+
+def _siapkan_stdout(stdout):
+    """stdout data: UTF-8 dan tanpa terjemahan baris baru (CSV memakai \\r\\n sendiri)."""
+    if hasattr(stdout, 'reconfigure'):
+        stdout.reconfigure(encoding='utf-8', newline='')
+    return stdout
+
+
+# --- PERINTAH ---
+def cmd_impor(args, pelapor, stdout):
+    success, laporan = bulk_import.import_file(
+        args.file, chunk_size=args.ukuran_batch,
+        progress_cb=lambda persen, diproses, disimpan: pelapor.progres(
+            'impor', persen, 100, f"Impor ({diproses} dibaca, {disimpan} disimpan)"),
+        cancel_check=_dibatalkan.is_set,
+    )
+    if not success:
+        return pelapor.hasil('impor', KELUAR_GAGAL, laporan)
+
+    if laporan['konflik']:
+        stdout = _siapkan_stdout(stdout)
+        penulis = export_manager.penulis_stream(stdout, 'jsonl' if pelapor.mode_json else 'csv',
+                                                ['baris', 'nik', 'alasan'])
+        penulis.tulis(laporan['konflik'])
+        stdout.flush()
+
+    kode = KELUAR_SUKSES
+    if laporan['dibatalkan']:
+        kode = KELUAR_DIBATALKAN
+    elif laporan['konflik']:
+        kode = KELUAR_ADA_MASALAH
+    status = "dibatalkan" if laporan['dibatalkan'] else "selesai"
+    return pelapor.hasil(
+        'impor', kode,
+        f"Impor {status}: {laporan['diproses']} baris dibaca, {laporan['disimpan']} disimpan, "
+        f"{len(laporan['konflik'])} dilewati.",
+        diproses=laporan['diproses'], disimpan=laporan['disimpan'],
+        dilewati=len(laporan['konflik']), kolom_diabaikan=laporan['kolom_diabaikan'],
+    )
+
+
+def cmd_ekspor(args, pelapor, stdout):
+    filters = _filter_dari_args(args)
+    fmt = args.format or os.path.splitext(args.tujuan)[1].lstrip('.').lower() or 'csv'
+
+    if args.tujuan != '-':
+        success, pesan = export_manager.export_data(
+            args.tujuan, fmt, args.cari, args.password,
+            progress_cb=lambda ditulis, total: pelapor.progres('ekspor', ditulis, total),
+            cancel_check=_dibatalkan.is_set, batch_size=args.ukuran_batch, filters=filters,
+        )
+        if success:
+            return pelapor.hasil('ekspor', KELUAR_SUKSES, pesan, file=args.tujuan)
+        return pelapor.hasil('ekspor', KELUAR_DIBATALKAN if _dibatalkan.is_set() else KELUAR_GAGAL, pesan)
+
+    columns = export_manager.kolom_ekspor(args.password)
+    ditulis = _alirkan(args, pelapor, stdout, fmt, columns, filters, 'ekspor')
+    if ditulis is None:
+        return KELUAR_DIBATALKAN if _dibatalkan.is_set() else KELUAR_GAGAL
+    return pelapor.hasil('ekspor', KELUAR_SUKSES, f"{ditulis} data diekspor.", ditulis=ditulis)
+
+
+def cmd_cari(args, pelapor, stdout):
+    columns = args.kolom.split(',') if args.kolom else list(KOLOM_DAFTAR)
+    tidak_dikenal = [kol for kol in columns if kol not in KOLOM_DB]
+    if tidak_dikenal:
+        return pelapor.hasil('cari', KELUAR_GAGAL, f"Kolom tidak dikenal: {', '.join(tidak_dikenal)}")
+    ditulis = _alirkan(args, pelapor, stdout, args.format, columns, _filter_dari_args(args), 'cari')
+    if ditulis is None:
+        return KELUAR_DIBATALKAN if _dibatalkan.is_set() else KELUAR_GAGAL
+    return pelapor.hasil('cari', KELUAR_SUKSES, f"{ditulis} data ditemukan.", ditemukan=ditulis)
+
+
+def _alirkan(args, pelapor, stdout, fmt, columns, filters, perintah):
+    """Menulis hasil iter_data ke stdout per batch. Mengembalikan jumlah baris, atau None jika gagal."""
+    success, total = db_manager.count_data(args.cari, cancel_check=_dibatalkan.is_set, filters=filters)
+    if not success:
+        pelapor.hasil(perintah, KELUAR_GAGAL, total)
+        return None
+    batas = getattr(args, 'batas', None)
+    if batas is not None:
+        total = min(total, batas)
+
+    stdout = _siapkan_stdout(stdout)
+    if fmt == 'tsv':
+        def tulis(rows):
+            stdout.writelines(
+                "\t".join("" if v is None else str(v).replace("\t", " ").replace("\n", " ") for v in row) + "\n"
+                for row in rows
+            )
+        stdout.write("\t".join(columns) + "\n")
+    else:
+        try:
+            tulis = export_manager.penulis_stream(stdout, fmt, columns).tulis
+        except ValueError as e:
+            pelapor.hasil(perintah, KELUAR_GAGAL, str(e))
+            return None
+
+    ditulis = 0
+    try:
+        for rows in db_manager.iter_data(args.cari, columns, args.ukuran_batch,
+                                         _dibatalkan.is_set, filters):
+            if batas is not None and ditulis + len(rows) > batas:
+                rows = rows[:batas - ditulis]
+            tulis(rows)
+            ditulis += len(rows)
+            pelapor.progres(perintah, ditulis, total)
+            if batas is not None and ditulis >= batas:
+                break
+        stdout.flush()
+    except BrokenPipeError:
+        raise
+    except Exception as e:
+        pesan = "Dibatalkan." if _dibatalkan.is_set() else f"Gagal membaca data: {e}"
+        pelapor.hasil(perintah, KELUAR_DIBATALKAN if _dibatalkan.is_set() else KELUAR_GAGAL,
+                      pesan, ditulis=ditulis)
+        return None
+    return ditulis
+
+
+def cmd_reindex(args, pelapor, stdout):
+    pelapor.pesan("Membangun ulang indeks pencarian...")
+    success, pesan = db_manager.rebuild_search_index()
+    return pelapor.hasil('reindex', KELUAR_SUKSES if success else KELUAR_GAGAL, pesan)
+
+
+def cmd_periksa(args, pelapor, stdout):
+    pelapor.pesan("Memeriksa integritas database...")
+    success, masalah = db_manager.periksa_integritas(lengkap=not args.cepat)
+    if not success:
+        return pelapor.hasil('periksa', KELUAR_GAGAL, masalah)
+    stdout = _siapkan_stdout(stdout)
+    for baris in masalah:
+        stdout.write(baris + "\n")
+    stdout.flush()
+    if masalah:
+        return pelapor.hasil('periksa', KELUAR_ADA_MASALAH, f"Ditemukan {len(masalah)} masalah.",
+                             jumlah_masalah=len(masalah))
+    return pelapor.hasil('periksa', KELUAR_SUKSES, "Database sehat.", jumlah_masalah=0)
+
+
+def cmd_optimasi(args, pelapor, stdout):
+    pelapor.pesan("Mengoptimasi database" + ("" if args.tanpa_vacuum else " (VACUUM)") + "...")
+    success, laporan = db_manager.optimasi_database(vacuum=not args.tanpa_vacuum)
+    if not success:
+        return pelapor.hasil('optimasi', KELUAR_GAGAL, laporan)
+    mb = 1024 * 1024
+    return pelapor.hasil(
+        'optimasi', KELUAR_SUKSES,
+        f"Database dioptimasi: {laporan['ukuran_sebelum'] / mb:.1f} MB -> {laporan['ukuran_sesudah'] / mb:.1f} MB.",
+        **laporan
+    )
+
+
+def cmd_sinkron_dokumen(args, pelapor, stdout):
+    success, laporan = db_manager.reconcile_dokumen(
+        progress_cb=lambda selesai, total: pelapor.progres('sinkron-dokumen', selesai, total)
+    )
+    if not success:
+        return pelapor.hasil('sinkron-dokumen', KELUAR_GAGAL, laporan)
+    return pelapor.hasil(
+        'sinkron-dokumen', KELUAR_SUKSES,
+        f"Indeks dokumen disinkronkan: {laporan['ditambah']} ditambah, "
+        f"{laporan['diperbarui']} diperbarui, {laporan['dihapus']} dihapus.",
+        **laporan
+    )
+
+
+def cmd_bersihkan_sampah(args, pelapor, stdout):
+    pelapor.pesan(f"Menghapus permanen data yang lebih dari {args.retensi:g} hari di Tempat Sampah...")
+    total = 0
+    while not _dibatalkan.is_set():
+        success, hasil = db_manager.bersihkan_sampah(retensi_hari=args.retensi)
+        if not success:
+            return pelapor.hasil('bersihkan-sampah', KELUAR_GAGAL, hasil, dihapus=total)
+        jumlah, masih_ada = hasil
+        total += jumlah
+        if not masih_ada:
+            break
+        _dibatalkan.wait(JEDA_PEMBERSIH_DETIK)
+    if _dibatalkan.is_set():
+        return pelapor.hasil('bersihkan-sampah', KELUAR_DIBATALKAN, "Dibatalkan.", dihapus=total)
+    return pelapor.hasil('bersihkan-sampah', KELUAR_SUKSES,
+                         f"{total} data dihapus permanen dari Tempat Sampah.", dihapus=total)
+
+
+# --- ARGUMEN ---
+def _tambah_opsi_filter(parser):
+    parser.add_argument("--cari", default="", help="Teks pencarian (sama seperti kotak cari di aplikasi)")
+    parser.add_argument("--status", action="append", help="Filter status (boleh diulang; '' = kosong)")
+    parser.add_argument("--status-hubungan", action="append", help="Filter status hubungan (boleh diulang)")
+    parser.add_argument("--no-kk", action="append", help="Filter No KK (boleh diulang)")
+    parser.add_argument("--ukuran-batch", type=int, default=UKURAN_BATCH, help=argparse.SUPPRESS)
+
+
+def buat_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli.py", description="Alat baris perintah Aplikasi Pendaftaran NPWP (tanpa GUI).",
+        epilog=f"Kode keluar: {KELUAR_SUKSES} sukses, {KELUAR_GAGAL} gagal, {KELUAR_ARGUMEN} argumen salah, "
+               f"{KELUAR_ADA_MASALAH} selesai dengan konflik/masalah, {KELUAR_DIBATALKAN} dibatalkan.",
+    )
+    parser.add_argument("--folder", help="Folder data (berisi database dan dokumen_npwp)")
+    parser.add_argument("--json", action="store_true", help="Progres dan ringkasan sebagai JSON per baris di stderr")
+    sub = parser.add_subparsers(dest="perintah", required=True, metavar="PERINTAH")
+
+    p = sub.add_parser("impor", aliases=["import"], help="Impor massal file CSV/JSONL")
+    p.add_argument("file")
+    p.add_argument("--ukuran-batch", type=int, default=bulk_import.DEFAULT_CHUNK_SIZE,
+                   help="Baris per transaksi")
+    p.set_defaults(fungsi=cmd_impor)
+
+    p = sub.add_parser("ekspor", aliases=["export"], help="Ekspor data ke CSV/JSONL/XLSX ('-' = stdout)")
+    p.add_argument("tujuan", help="File tujuan, atau '-' untuk stdout (CSV/JSONL)")
+    p.add_argument("--format", choices=export_manager.FORMAT_EKSPOR, help="Default: dari ekstensi file")
+    p.add_argument("--password", action="store_true", help="Sertakan kolom password")
+    _tambah_opsi_filter(p)
+    p.set_defaults(fungsi=cmd_ekspor)
+
+    p = sub.add_parser("cari", aliases=["search"], help="Cari data dan tulis hasilnya ke stdout")
+    p.add_argument("cari", help="Teks pencarian ('' = semua)")
+    p.add_argument("--format", choices=("tsv",) + export_manager.FORMAT_STREAM, default="tsv")
+    p.add_argument("--kolom", help=f"Kolom dipisah koma (default: {','.join(KOLOM_DAFTAR)})")
+    p.add_argument("--batas", type=int, help="Jumlah maksimal baris")
+    _tambah_opsi_filter(p)
+    p.set_defaults(fungsi=cmd_cari)
+
+    p = sub.add_parser("reindex", help="Bangun ulang indeks pencarian dan jumlah filter")
+    p.set_defaults(fungsi=cmd_reindex)
+
+    p = sub.add_parser("periksa", aliases=["check"], help="Periksa integritas database")
+    p.add_argument("--cepat", action="store_true", help="quick_check, bukan integrity_check lengkap")
+    p.set_defaults(fungsi=cmd_periksa)
+
+    p = sub.add_parser("optimasi", aliases=["vacuum"], help="ANALYZE dan VACUUM")
+    p.add_argument("--tanpa-vacuum", action="store_true", help="Hanya ANALYZE (tidak mengunci lama)")
+    p.set_defaults(fungsi=cmd_optimasi)
+
+    p = sub.add_parser("sinkron-dokumen", aliases=["reconcile"],
+                       help="Samakan indeks dokumen dengan isi folder dokumen_npwp")
+    p.set_defaults(fungsi=cmd_sinkron_dokumen)
+
+    p = sub.add_parser("bersihkan-sampah", aliases=["purge"],
+                       help="Hapus permanen data Tempat Sampah yang melewati masa simpan")
+    p.add_argument("--retensi", type=float, default=RETENSI_SAMPAH_HARI,
+                   help=f"Masa simpan dalam hari (default: {RETENSI_SAMPAH_HARI})")
+    p.set_defaults(fungsi=cmd_bersihkan_sampah)
+    return parser
+
+
+def main(argv=None):
+    args = buat_parser().parse_args(argv)
+    pelapor = Pelapor(args.json)
+    stdout = sys.stdout
+
+    signal.signal(signal.SIGINT, _tangani_sinyal)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, _tangani_sinyal)
+
+    try:
+        if args.folder:
+            os.chdir(args.folder)
+        # print() dari modul lain ke stderr, agar stdout hanya berisi data
+        with redirect_stdout(pelapor.sebagai_file()):
+            success, pesan = db_manager.init_db(
+                progress_cb=lambda ket, selesai, total: pelapor.progres('migrasi', selesai, total, ket),
+                cancel_check=_dibatalkan.is_set,
+            )
+            if not success:
+                kode = KELUAR_DIBATALKAN if _dibatalkan.is_set() else KELUAR_GAGAL
+                return pelapor.hasil('migrasi', kode, pesan)
+            return args.fungsi(args, pelapor, stdout)
+    except KeyboardInterrupt:
+        return pelapor.hasil(args.perintah, KELUAR_DIBATALKAN, "Dihentikan.")
+    except BrokenPipeError:
+        # Pembaca stdout berhenti lebih dulu (mis. `| head`): bukan kesalahan
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return KELUAR_SUKSES
+    except OSError as e:
+        return pelapor.hasil(args.perintah, KELUAR_GAGAL, str(e))
+    finally:
+        with redirect_stdout(pelapor.sebagai_file()):
+            db_manager.close_connections()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,9 +9,17 @@ NAMA_TABEL = 'pendaftaran'
 KOLOM_DB = [
     "id", "nama", "status", "keterangan", "status_hubungan", "nik", "nik_kk", 
     "no_kk", "tempat_lahir", "tanggal_lahir", "alamat", 
-    "pekerjaan", "nama_ibu", "email", "password", "no_hp", "catatan" # <-- Ditambahkan
+    "pekerjaan", "nama_ibu", "email", "password", "no_hp", "catatan", # <-- Ditambahkan
+    "created_at", "updated_at" # Diisi otomatis oleh DB (default/trigger)
 ]
 
+# Kolom panjang/sensitif yang tidak diambil untuk daftar (tabel) kecuali
+# diminta; isi lengkapnya dimuat saat satu baris dibuka (get_data_by_id)
+KOLOM_TIDAK_DI_DAFTAR = ["alamat", "catatan", "password", "created_at"]
+
+# Kolom default untuk halaman daftar (proyeksi load_page)
+KOLOM_DAFTAR = [kol for kol in KOLOM_DB if kol not in KOLOM_TIDAK_DI_DAFTAR]
+
 # Daftar lengkap field untuk INSERT ke DB
 # --- DIPERBARUI ---
 FIELD_UNTUK_INSERT = [
@@ -22,4 +30,62 @@ FIELD_UNTUK_INSERT = [
 
 # --- BARIS BARU ---
 # Nama folder utama untuk menyimpan semua dokumen
-BASE_DOC_FOLDER = 'dokumen_npwp'
\ No newline at end of file
+BASE_DOC_FOLDER = 'dokumen_npwp'
+
+# Subfolder penyimpanan blob (content-addressed, nama file = hash SHA-256).
+# File di folder NIK adalah hardlink ke blob di sini.
+BLOB_FOLDER = '.blobs'
+
+# Jumlah maksimal record pendaftar yang disimpan di cache repository (LRU)
+KAPASITAS_CACHE_RECORD = 500
+
+# Folder cache thumbnail/pratinjau dokumen (boleh dihapus kapan saja)
+THUMBNAIL_FOLDER = 'cache_thumbnail'
+# Batas ukuran cache thumbnail (byte); file terlama dibuang lebih dulu
+UKURAN_CACHE_THUMBNAIL = 200 * 1024 * 1024
+
+# Kolom yang bisa difilter per nilai di tabel daftar (facet), beserta
+# tabel cache jumlah per nilai yang diperbarui oleh trigger
+KOLOM_FACET = ['status', 'status_hubungan']
+NAMA_TABEL_AGREGAT = 'pendaftaran_agregat'
+
+# Log perubahan baris pendaftaran (diisi trigger), dipakai tampilan daftar
+# untuk menerapkan perubahan per baris, termasuk dari workstation lain.
+# Hanya sejumlah entri terakhir yang disimpan.
+NAMA_TABEL_PERUBAHAN = 'pendaftaran_perubahan'
+BATAS_LOG_PERUBAHAN = 10000
+
+# Nama tabel indeks dokumen (satu baris per file di folder NIK)
+NAMA_TABEL_DOKUMEN = 'dokumen'
+
+# Nama tabel virtual FTS5 untuk pencarian teks penuh
+NAMA_TABEL_FTS = 'pendaftaran_fts'
+
+# Kolom yang diindeks oleh FTS5 (bisa dicari lewat kotak pencarian)
+KOLOM_FTS = ['nama', 'nik', 'alamat', 'pekerjaan', 'keterangan', 'catatan']
+
+# Instrumentasi (lihat instrumentasi.py): pernyataan SQL yang lebih lama
+# dari batas ini ditulis ke file log beserta EXPLAIN QUERY PLAN-nya
+BATAS_KUERI_LAMBAT_MS = 250
+FILE_LOG_KUERI_LAMBAT = 'kueri_lambat.log'
+UKURAN_MAKS_LOG_KUERI_LAMBAT = 1024 * 1024  # Lebih dari ini, log lama di-rename ke .1
+
+# Mode server (server.py / klien_server.py): port default API HTTP dan
+# jumlah koneksi baca paralel di server (penulisan selalu satu koneksi)
+PORT_SERVER = 8765
+JUMLAH_PEMBACA_SERVER = 4
+
+# Jurnal operasi folder dokumen (lihat jurnal.py). Entri dari komputer
+# lain baru diambil alih saat startup jika lebih tua dari batas ini;
+# hasil pemulihan juga ditambahkan ke file log.
+UMUR_MIN_PEMULIHAN_JURNAL_DETIK = 600
+FILE_LOG_PEMULIHAN = 'pemulihan_jurnal.log'
+
+# Tempat sampah: data yang dihapus dari daftar hanya ditandai (dihapus_pada)
+# dan bisa dipulihkan. Setelah masa simpan, pembersih latar belakang
+# menghapusnya permanen beserta folder dokumennya, per batch kecil dengan
+# jeda di antaranya.
+RETENSI_SAMPAH_HARI = 30
+UKURAN_BATCH_PEMBERSIH = 20
+JEDA_PEMBERSIH_DETIK = 1.0
+INTERVAL_PEMBERSIH_MENIT = 60
@@ -0,0 +1,70 @@
+# conflict_dialog.py
+# Berisi QDialog yang ditampilkan saat update_data menolak penyimpanan
+# karena data yang sama sudah diubah di tempat lain (workstation lain)
+# sejak formulir dibuka. Menampilkan perbedaan per field dan pilihan
+# untuk menimpa, memuat ulang data tersimpan, atau kembali mengedit.
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget,
+    QTableWidgetItem, QHeaderView
+)
+from PyQt6.QtGui import QBrush, QColor
+
+
+class ConflictDialog(QDialog):
+    """Perbedaan field antara isi formulir dan data yang tersimpan saat ini."""
+
+    # Hasil exec()
+    BATAL = 0
+    TIMPA = 1
+    MUAT_ULANG = 2
+
+    KOLOM = ["Field", "Nilai Anda", "Nilai Tersimpan", "Saat Dibuka"]
+
+    def __init__(self, konflik, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Data Diubah di Tempat Lain")
+        self.setMinimumSize(700, 300)
+        self.init_ui(konflik)
+
+    def init_ui(self, konflik):
+        layout = QVBoxLayout(self)
+
+        label = QLabel(
+            f"{konflik['pesan']}\n\n"
+            "Field di bawah diubah oleh Anda dan juga di tempat lain. Perubahan lain "
+            "yang tidak bentrok akan tetap digabungkan."
+        )
+        label.setWordWrap(True)
+        layout.addWidget(label)
+
+        table = QTableWidget(len(konflik['perbedaan']), len(self.KOLOM))
+        table.setHorizontalHeaderLabels(self.KOLOM)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        sorot = QBrush(QColor(255, 235, 200))
+        for row, (field, nilai_anda, nilai_tersimpan, nilai_awal) in enumerate(konflik['perbedaan']):
+            nilai = [field.replace("_", " ").title(), nilai_anda, nilai_tersimpan, nilai_awal]
+            for col, teks in enumerate(nilai):
+                item = QTableWidgetItem("" if teks is None else str(teks))
+                item.setToolTip(item.text())
+                if col in (1, 2):
+                    item.setBackground(sorot)
+                table.setItem(row, col, item)
+        layout.addWidget(table)
+
+        tombol_layout = QHBoxLayout()
+        timpa_btn = QPushButton("Simpan Nilai Saya")
+        timpa_btn.setToolTip("Menimpa field yang bentrok dengan isi formulir")
+        timpa_btn.clicked.connect(lambda: self.done(self.TIMPA))
+        muat_btn = QPushButton("Buang Perubahan Saya")
+        muat_btn.setToolTip("Memuat ulang formulir dengan data yang tersimpan saat ini")
+        muat_btn.clicked.connect(lambda: self.done(self.MUAT_ULANG))
+        batal_btn = QPushButton("Kembali Mengedit")
+        batal_btn.clicked.connect(self.reject)
+        tombol_layout.addWidget(timpa_btn)
+        tombol_layout.addWidget(muat_btn)
+        tombol_layout.addStretch()
+        tombol_layout.addWidget(batal_btn)
+        layout.addLayout(tombol_layout)
@@ -0,0 +1,123 @@
+# copy_dialog.py
+# Berisi QDialog (non-modal) yang menampilkan antrean salin dokumen
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+    QTableWidget, QTableWidgetItem, QHeaderView, QProgressBar
+)
+from PyQt6.QtCore import pyqtSlot
+
+from workers import DocumentCopyManager
+
+
+class DocumentCopyDialog(QDialog):
+    """Menampilkan progres per file, dengan tombol batal dan coba lagi."""
+
+    def __init__(self, copy_manager: DocumentCopyManager, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Penyalinan Dokumen")
+        self.setMinimumSize(600, 300)
+        self.setModal(False)
+
+        self.copy_manager = copy_manager
+        self.rows = {}  # task_id -> nomor baris tabel
+
+        self.init_ui()
+
+        copy_manager.task_added.connect(self.on_task_added)
+        copy_manager.task_progress.connect(self.on_task_progress)
+        copy_manager.task_status_changed.connect(self.on_task_status_changed)
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.summary_label = QLabel("Tidak ada dokumen yang sedang disalin.")
+
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(["File", "Tujuan", "Progres", "Status"])
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+
+        tombol_layout = QHBoxLayout()
+        self.cancel_btn = QPushButton("Batalkan Semua")
+        self.cancel_btn.setStyleSheet("background-color: #f44336; color: white; padding: 6px; border-radius: 4px;")
+        self.cancel_btn.clicked.connect(self.copy_manager.cancel_all)
+        self.retry_btn = QPushButton("Coba Lagi yang Gagal")
+        self.retry_btn.setStyleSheet("background-color: #0275d8; color: white; padding: 6px; border-radius: 4px;")
+        self.retry_btn.clicked.connect(self.copy_manager.retry_failed)
+        self.clear_btn = QPushButton("Bersihkan yang Selesai")
+        self.clear_btn.clicked.connect(self.on_clear_finished)
+        self.close_btn = QPushButton("Tutup")
+        self.close_btn.clicked.connect(self.hide)
+        tombol_layout.addWidget(self.cancel_btn)
+        tombol_layout.addWidget(self.retry_btn)
+        tombol_layout.addStretch()
+        tombol_layout.addWidget(self.clear_btn)
+        tombol_layout.addWidget(self.close_btn)
+
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.table)
+        layout.addLayout(tombol_layout)
+
+    @pyqtSlot(int, str, str)
+    def on_task_added(self, task_id, nama_file, folder_tujuan):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.table.setItem(row, 0, QTableWidgetItem(nama_file))
+        self.table.setItem(row, 1, QTableWidgetItem(folder_tujuan))
+        progress = QProgressBar()
+        progress.setRange(0, 100)
+        self.table.setCellWidget(row, 2, progress)
+        self.table.setItem(row, 3, QTableWidgetItem(DocumentCopyManager.MENUNGGU))
+        self.rows[task_id] = row
+        self._update_summary()
+
+    @pyqtSlot(int, int, int)
+    def on_task_progress(self, task_id, disalin, total):
+        row = self.rows.get(task_id)
+        if row is None:
+            return
+        progress = self.table.cellWidget(row, 2)
+        progress.setValue(int(disalin * 100 / total) if total else 100)
+
+    @pyqtSlot(int, str, str)
+    def on_task_status_changed(self, task_id, status, message):
+        row = self.rows.get(task_id)
+        if row is None:
+            return
+        item = QTableWidgetItem(f"{status}: {message}" if message else status)
+        item.setToolTip(message)
+        self.table.setItem(row, 3, item)
+        if status == DocumentCopyManager.MENYALIN:
+            self.table.cellWidget(row, 2).setValue(0)
+        self._update_summary()
+
+    @pyqtSlot()
+    def on_clear_finished(self):
+        """Menghapus baris yang sudah selesai dan menyusun ulang tabel."""
+        self.copy_manager.clear_finished()
+        self.table.setRowCount(0)
+        self.rows.clear()
+        for task_id, task in self.copy_manager.tasks.items():
+            self.on_task_added(task_id, task['source'].name, str(task['dest'].parent))
+            self.on_task_status_changed(task_id, task['status'], "")
+        self._update_summary()
+
+    def _update_summary(self):
+        berjalan = self.copy_manager.pending_count()
+        gagal = sum(
+            1 for task in self.copy_manager.tasks.values()
+            if task['status'] in (DocumentCopyManager.GAGAL, DocumentCopyManager.DIBATALKAN)
+        )
+        if berjalan:
+            teks = f"Menyalin {berjalan} dokumen di latar belakang..."
+        else:
+            teks = "Semua penyalinan selesai."
+        if gagal:
+            teks += f" {gagal} dokumen gagal/dibatalkan."
+        self.summary_label.setText(teks)
+        self.cancel_btn.setEnabled(berjalan > 0)
+        self.retry_btn.setEnabled(gagal > 0)
@@ -2,87 +2,940 @@
 # Mengurus semua logika koneksi dan query database
 
 import sqlite3
+import json
+import mimetypes
 import os
-import shutil
+import re
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from config import DB_NAME, NAMA_TABEL, KOLOM_DB, FIELD_UNTUK_INSERT, BASE_DOC_FOLDER
+import doc_manager
+import instrumentasi
+import jurnal
+import migrasi
+from config import (
+    DB_NAME, NAMA_TABEL, KOLOM_DB, KOLOM_DAFTAR, KOLOM_FACET, NAMA_TABEL_AGREGAT, FIELD_UNTUK_INSERT, BASE_DOC_FOLDER, NAMA_TABEL_DOKUMEN,
+    NAMA_TABEL_FTS, KOLOM_FTS, NAMA_TABEL_PERUBAHAN, BATAS_LOG_PERUBAHAN,
+    UMUR_MIN_PEMULIHAN_JURNAL_DETIK, FILE_LOG_PEMULIHAN, RETENSI_SAMPAH_HARI, UKURAN_BATCH_PEMBERSIH
+)
 
-def init_db():
-    """Membuat database, tabel, dan folder dokumen utama jika belum ada.
-    Juga menangani migrasi skema (menambah kolom baru jika perlu)."""
+# Status ketersediaan indeks FTS5 (None = belum dicek)
+_fts_tersedia = None
+
+# --- MANAJER KONEKSI ---
+# Satu koneksi persisten per thread (GUI dan setiap pekerja latar belakang),
+# supaya setiap operasi tidak perlu membuka file, mem-parse skema, dan
+# memanaskan cache dari nol.
+BUSY_TIMEOUT_DETIK = 5.0
+UKURAN_CACHE_STATEMENT = 256
+
+PRAGMA_KONEKSI = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -20000",     # ~20 MB cache halaman
+    "PRAGMA mmap_size = 268435456",   # 256 MB memory-mapped I/O
+    "PRAGMA temp_store = MEMORY",
+]
+
+# Koneksi dipetakan dari ident thread, bukan threading.local: di thread
+# QThreadPool data thread-local hilang setiap kali run() selesai, sehingga
+# setiap tugas membuka koneksi baru dan yang lama tertinggal terbuka.
+# Kumpulan thread yang hidup sepanjang aplikasi dibuat tidak pernah
+# kedaluwarsa (setExpiryTimeout(-1)) agar jumlah koneksi tetap terbatas;
+# pekerja di kumpulan milik dialog menutup koneksinya sendiri
+# (tutup_koneksi_thread).
+_koneksi_per_thread = {}  # ident thread -> (koneksi, DB_NAME saat dibuka)
+_semua_koneksi = []
+_kunci_koneksi = threading.Lock()
+
+def _buka_koneksi():
+    """Membuka koneksi baru dan menerapkan PRAGMA penyetelan."""
+    conn = sqlite3.connect(
+        DB_NAME,
+        timeout=BUSY_TIMEOUT_DETIK,
+        cached_statements=UKURAN_CACHE_STATEMENT,
+        check_same_thread=False,  # Hanya agar close_connections() bisa menutupnya
+        factory=instrumentasi.KoneksiTerukur,  # Setiap pernyataan SQL diukur
+    )
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMA_KONEKSI:
+        conn.execute(pragma)
+    return conn
+
+def get_connection():
+    """
+    Mengembalikan koneksi milik thread saat ini (dibuat saat pertama kali
+    dipakai). Koneksi tidak boleh dibagikan ke thread lain.
+    """
+    ident = threading.get_ident()
+    entri = _koneksi_per_thread.get(ident)
+    if entri is not None and entri[1] == DB_NAME:
+        return entri[0]
+
+    if entri is not None:
+        tutup_koneksi_thread()  # DB_NAME diganti: koneksi ke file lama tidak dipakai lagi
+    conn = _buka_koneksi()
+    with _kunci_koneksi:
+        _koneksi_per_thread[ident] = (conn, DB_NAME)
+        _semua_koneksi.append(conn)
+    return conn
+
+def tutup_koneksi_thread():
+    """
+    Menutup koneksi milik thread saat ini (jika ada). Dipanggil pekerja yang
+    berjalan di thread berumur pendek, agar koneksinya tidak tertinggal
+    terbuka setelah thread-nya berhenti.
+    """
+    with _kunci_koneksi:
+        entri = _koneksi_per_thread.pop(threading.get_ident(), None)
+        if entri is None:
+            return
+        if entri[0] in _semua_koneksi:
+            _semua_koneksi.remove(entri[0])
+    try:
+        entri[0].close()
+    except Exception as e:
+        print(f"Gagal menutup koneksi database: {e}")
+
+def close_connections():
+    """
+    Hook penutupan aplikasi: menjalankan PRAGMA optimize lalu menutup
+    semua koneksi yang pernah dibuka oleh thread mana pun.
+    """
+    with _kunci_koneksi:
+        daftar = list(_semua_koneksi)
+        _semua_koneksi.clear()
+        _koneksi_per_thread.clear()
+
+    for i, conn in enumerate(daftar):
+        try:
+            if i == 0:
+                conn.execute("PRAGMA optimize")
+            conn.close()
+        except Exception as e:
+            print(f"Gagal menutup koneksi database: {e}")
+
+def init_db(progress_cb=None, cancel_check=None):
+    """
+    Membuat folder dokumen utama lalu menjalankan langkah migrasi skema yang
+    belum diterapkan (lihat MIGRASI dan migrasi.py). Jika skema sudah
+    terbaru, tidak ada pekerjaan migrasi sama sekali.
+    progress_cb(keterangan, selesai, total) untuk dialog progres.
+    Mengembalikan (success, pesan).
+    """
     try:
-        # 1. Buat folder dokumen utama
         Path(BASE_DOC_FOLDER).mkdir(exist_ok=True)
-        
-        # 2. Buat database dan tabel (dengan skema LENGKAP terbaru)
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        
-        # --- KUERI DIPERBARUI ---
-        query_buat_tabel = f'''
-        CREATE TABLE IF NOT EXISTS {NAMA_TABEL} (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nama TEXT NOT NULL,
-            status TEXT,
-            keterangan TEXT,
-            status_hubungan TEXT, 
-            nik TEXT UNIQUE NOT NULL,
-            nik_kk TEXT,
-            no_kk TEXT,
-            tempat_lahir TEXT,
-            tanggal_lahir TEXT,
-            alamat TEXT,
-            pekerjaan TEXT,
-            nama_ibu TEXT,
-            email TEXT,
-            password TEXT,
-            no_hp TEXT,
-            catatan TEXT 
+        conn = get_connection()
+        success, message = migrasi.jalankan(conn, MIGRASI, progress_cb, cancel_check)
+        if not success:
+            print(message)
+            return False, message
+        _pangkas_log_perubahan(conn)
+        _pulihkan_jurnal(conn)
+        print(f"Database {DB_NAME} (skema versi {migrasi.versi_skema(conn)}) dan folder {BASE_DOC_FOLDER} siap.")
+        return True, message
+    except Exception as e:
+        print(f"Error saat inisialisasi DB: {e}")
+        return False, f"Gagal menginisialisasi database: {e}"
+
+def perlu_migrasi():
+    """True jika ada langkah migrasi yang belum diterapkan pada DB ini."""
+    return migrasi.perlu_migrasi(get_connection(), MIGRASI)
+
+# --- LANGKAH MIGRASI SKEMA ---
+# Setiap langkah menerima migrasi.KonteksLangkah dan harus idempoten, karena
+# DB yang dibuat sebelum ada user_version menjalankan semua langkah sekali.
+def _migrasi_tabel_utama(ctx):
+    """Versi 1: tabel pendaftaran, termasuk kolom yang ditambahkan belakangan."""
+    cursor = ctx.conn.cursor()
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS {NAMA_TABEL} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nama TEXT NOT NULL,
+        status TEXT,
+        keterangan TEXT,
+        status_hubungan TEXT, 
+        nik TEXT UNIQUE NOT NULL,
+        nik_kk TEXT,
+        no_kk TEXT,
+        tempat_lahir TEXT,
+        tanggal_lahir TEXT,
+        alamat TEXT,
+        pekerjaan TEXT,
+        nama_ibu TEXT,
+        email TEXT,
+        password TEXT,
+        no_hp TEXT,
+        catatan TEXT,
+        created_at TEXT DEFAULT (datetime('now', 'localtime')),
+        updated_at TEXT DEFAULT (datetime('now', 'localtime'))
+    )
+    ''')
+
+    # DB dari versi aplikasi lama: tambahkan kolom yang belum ada
+    cursor.execute(f"PRAGMA table_info({NAMA_TABEL})")
+    columns = [row[1] for row in cursor.fetchall()]
+    for kolom in ('status_hubungan', 'catatan'):
+        if kolom not in columns:
+            print(f"Menambahkan kolom '{kolom}'...")
+            cursor.execute(f"ALTER TABLE {NAMA_TABEL} ADD COLUMN {kolom} TEXT")
+
+def _migrasi_indeks_keluarga(ctx):
+    """Versi 4: indeks untuk tampilan per Kartu Keluarga."""
+    daftar_kolom = ('no_kk', 'nik_kk')
+    for i, kolom in enumerate(daftar_kolom):
+        ctx.lapor(i, len(daftar_kolom), f"Membuat indeks {kolom}...")
+        ctx.cek_batal()
+        ctx.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{NAMA_TABEL}_{kolom} ON {NAMA_TABEL}({kolom})")
+    ctx.lapor(len(daftar_kolom), len(daftar_kolom))
+
+# --- FUNGSI BARU (FTS5) ---
+def _migrasi_fts(ctx):
+    """
+    Versi 2: tabel FTS5 (external content) di atas tabel pendaftaran beserta
+    trigger sinkronisasinya. Jika tabel FTS baru dibuat, indeks diisi dari
+    data yang sudah ada per potongan id (bisa dilanjutkan jika terputus).
+    Jika SQLite tidak mendukung FTS5, pencarian kembali memakai LIKE.
+    """
+    global _fts_tersedia
+    conn = ctx.conn
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (NAMA_TABEL_FTS,))
+    sudah_ada = cursor.fetchone() is not None
+
+    kolom_fts = ', '.join(KOLOM_FTS)
+    kolom_new = ', '.join(f"new.{k}" for k in KOLOM_FTS)
+    kolom_old = ', '.join(f"old.{k}" for k in KOLOM_FTS)
+    try:
+        if not sudah_ada:
+            # Rencana pengisian dan tabel FTS dibuat dalam satu transaksi.
+            # Baris dengan id di atas batas sudah ditangani trigger di bawah.
+            with conn:
+                batas = cursor.execute(f"SELECT MAX(id) FROM {NAMA_TABEL}").fetchone()[0]
+                ctx.rencanakan_pengisian(batas)
+                cursor.execute(f"""
+                CREATE VIRTUAL TABLE {NAMA_TABEL_FTS} USING fts5(
+                    {kolom_fts},
+                    content='{NAMA_TABEL}', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+                """)
+    except sqlite3.OperationalError as e:
+        print(f"FTS5 tidak tersedia, pencarian memakai LIKE: {e}")
+        _fts_tersedia = False
+        return
+
+    # Trigger agar indeks selalu sinkron dengan tabel utama
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {NAMA_TABEL_FTS}_ai AFTER INSERT ON {NAMA_TABEL} BEGIN
+        INSERT INTO {NAMA_TABEL_FTS}(rowid, {kolom_fts}) VALUES (new.id, {kolom_new});
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {NAMA_TABEL_FTS}_ad AFTER DELETE ON {NAMA_TABEL} BEGIN
+        INSERT INTO {NAMA_TABEL_FTS}({NAMA_TABEL_FTS}, rowid, {kolom_fts}) VALUES ('delete', old.id, {kolom_old});
+    END
+    """)
+    # Hanya saat kolom yang diindeks berubah (bukan updated_at dsb.); dibuat
+    # ulang agar DB lama yang trigger-nya masih 'AFTER UPDATE' ikut diperbarui
+    cursor.execute(f"DROP TRIGGER IF EXISTS {NAMA_TABEL_FTS}_au")
+    cursor.execute(f"""
+    CREATE TRIGGER {NAMA_TABEL_FTS}_au AFTER UPDATE OF {kolom_fts} ON {NAMA_TABEL} BEGIN
+        INSERT INTO {NAMA_TABEL_FTS}({NAMA_TABEL_FTS}, rowid, {kolom_fts}) VALUES ('delete', old.id, {kolom_old});
+        INSERT INTO {NAMA_TABEL_FTS}(rowid, {kolom_fts}) VALUES (new.id, {kolom_new});
+    END
+    """)
+
+    ctx.jalankan_pengisian(f"""
+    INSERT INTO {NAMA_TABEL_FTS}(rowid, {kolom_fts})
+    SELECT id, {kolom_fts} FROM {NAMA_TABEL} WHERE id > ? AND id <= ?
+    """)
+    _fts_tersedia = True
+
+def _cek_fts(cursor):
+    """Mengembalikan True jika tabel FTS5 ada (hasil dicache per proses)."""
+    global _fts_tersedia
+    if _fts_tersedia is None:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (NAMA_TABEL_FTS,))
+        _fts_tersedia = cursor.fetchone() is not None
+    return _fts_tersedia
+
+def rebuild_search_index():
+    """Membangun ulang seluruh indeks FTS5 (dan cache jumlah facet) dari tabel pendaftaran."""
+    try:
+        conn = get_connection()
+        if not _cek_fts(conn.cursor()):
+            return False, "Indeks pencarian FTS5 tidak tersedia di SQLite ini."
+        with conn:
+            conn.execute(f"INSERT INTO {NAMA_TABEL_FTS}({NAMA_TABEL_FTS}) VALUES ('rebuild')")
+            conn.execute(f"INSERT INTO {NAMA_TABEL_FTS}({NAMA_TABEL_FTS}) VALUES ('optimize')")
+            _hitung_ulang_agregat(conn.cursor())
+        return True, "Indeks pencarian berhasil dibangun ulang."
+    except Exception as e:
+        return False, f"Gagal membangun ulang indeks pencarian: {e}"
+
+# --- FUNGSI BARU (LOG PERUBAHAN) ---
+def _migrasi_perubahan(ctx):
+    """
+    Versi 6: kolom created_at/updated_at dan tabel log perubahan (seq,
+    pendaftaran_id, operasi I/U/D) yang diisi trigger pada tabel pendaftaran.
+    Karena diisi trigger, penulisan dari workstation lain (atau versi aplikasi
+    lain) yang memakai file DB yang sama ikut tercatat.
+    """
+    cursor = ctx.conn.cursor()
+    # ALTER TABLE tidak mengizinkan default non-konstan; baris baru di DB
+    # lama diisi oleh trigger di bawah, baris lama tetap NULL
+    cursor.execute(f"PRAGMA table_info({NAMA_TABEL})")
+    columns = [row[1] for row in cursor.fetchall()]
+    for kolom_waktu in ('created_at', 'updated_at'):
+        if kolom_waktu not in columns:
+            cursor.execute(f"ALTER TABLE {NAMA_TABEL} ADD COLUMN {kolom_waktu} TEXT")
+
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {NAMA_TABEL_PERUBAHAN} (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        pendaftaran_id INTEGER NOT NULL,
+        operasi TEXT NOT NULL,
+        waktu TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+    )
+    """)
+    kolom_isi = ', '.join(FIELD_UNTUK_INSERT)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {NAMA_TABEL_PERUBAHAN}_ai AFTER INSERT ON {NAMA_TABEL} BEGIN
+        INSERT INTO {NAMA_TABEL_PERUBAHAN} (pendaftaran_id, operasi) VALUES (new.id, 'I');
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {NAMA_TABEL_PERUBAHAN}_au AFTER UPDATE OF {kolom_isi} ON {NAMA_TABEL} BEGIN
+        INSERT INTO {NAMA_TABEL_PERUBAHAN} (pendaftaran_id, operasi) VALUES (new.id, 'U');
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {NAMA_TABEL_PERUBAHAN}_ad AFTER DELETE ON {NAMA_TABEL} BEGIN
+        INSERT INTO {NAMA_TABEL_PERUBAHAN} (pendaftaran_id, operasi) VALUES (old.id, 'D');
+    END
+    """)
+
+    # Stempel waktu. Tabel hasil migrasi (ALTER) tidak punya DEFAULT, jadi
+    # created_at diisi di sini jika masih kosong. Trigger updated_at hanya
+    # bereaksi pada kolom isi, sehingga UPDATE di dalamnya tidak berulang.
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {NAMA_TABEL}_created_at AFTER INSERT ON {NAMA_TABEL}
+    WHEN new.created_at IS NULL BEGIN
+        UPDATE {NAMA_TABEL} SET created_at = datetime('now', 'localtime'),
+            updated_at = datetime('now', 'localtime') WHERE id = new.id;
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {NAMA_TABEL}_updated_at AFTER UPDATE OF {kolom_isi} ON {NAMA_TABEL} BEGIN
+        UPDATE {NAMA_TABEL} SET updated_at = datetime('now', 'localtime') WHERE id = new.id;
+    END
+    """)
+
+# --- FUNGSI BARU (VERSI BARIS) ---
+def _migrasi_versi_baris(ctx):
+    """
+    Versi 7: kolom row_version untuk optimistic concurrency. update_data
+    menaikkannya sendiri dan hanya menulis jika versinya masih sama dengan
+    yang dibaca; trigger menaikkannya untuk penulis lain (upsert_data_batch,
+    versi aplikasi lama) agar perubahan mereka juga terdeteksi.
+    """
+    cursor = ctx.conn.cursor()
+    cursor.execute(f"PRAGMA table_info({NAMA_TABEL})")
+    if 'row_version' not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {NAMA_TABEL} ADD COLUMN row_version INTEGER NOT NULL DEFAULT 1")
+    kolom_isi = ', '.join(FIELD_UNTUK_INSERT)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {NAMA_TABEL}_row_version AFTER UPDATE OF {kolom_isi} ON {NAMA_TABEL}
+    WHEN new.row_version = old.row_version BEGIN
+        UPDATE {NAMA_TABEL} SET row_version = old.row_version + 1 WHERE id = new.id;
+    END
+    """)
+
+def _pangkas_log_perubahan(conn):
+    """Menyisakan BATAS_LOG_PERUBAHAN entri log terakhir (dipanggil saat aplikasi dibuka)."""
+    with conn:
+        conn.execute(f"""
+        DELETE FROM {NAMA_TABEL_PERUBAHAN}
+        WHERE seq <= (SELECT MAX(seq) FROM {NAMA_TABEL_PERUBAHAN}) - ?
+        """, (BATAS_LOG_PERUBAHAN,))
+
+def get_seq_perubahan():
+    """Nomor urut log perubahan terakhir (0 jika belum ada perubahan)."""
+    try:
+        cursor = get_connection().cursor()
+        cursor.execute(f"SELECT COALESCE(MAX(seq), 0) FROM {NAMA_TABEL_PERUBAHAN}")
+        return True, cursor.fetchone()[0]
+    except Exception as e:
+        return False, f"Gagal membaca log perubahan: {e}"
+
+def get_perubahan_sejak(seq, batas=1000):
+    """
+    Perubahan setelah nomor urut `seq`. Mengembalikan (True, (perubahan,
+    seq_terbaru)); perubahan adalah list (id, operasi) satu entri per id:
+    'I' (baru), 'U' (diubah), atau 'D' (dihapus). perubahan bernilai None
+    jika tidak bisa diberikan secara lengkap (log sudah dipangkas melewati
+    `seq`, DB diganti, atau lebih dari `batas` entri); pemanggil sebaiknya
+    memuat ulang semuanya.
+    """
+    try:
+        cursor = get_connection().cursor()
+        cursor.execute(f"SELECT MIN(seq), MAX(seq) FROM {NAMA_TABEL_PERUBAHAN}")
+        seq_awal, seq_akhir = cursor.fetchone()
+        if seq_akhir is None:
+            return True, ([] if seq == 0 else None, 0)
+        if seq_akhir == seq:
+            return True, ([], seq)
+        if seq > seq_akhir or seq < seq_awal - 1 or seq_akhir - seq > batas:
+            return True, (None, seq_akhir)
+
+        cursor.execute(f"""
+        SELECT pendaftaran_id, operasi FROM {NAMA_TABEL_PERUBAHAN}
+        WHERE seq > ? AND seq <= ? ORDER BY seq
+        """, (seq, seq_akhir))
+        per_id = {}
+        for id_pendaftar, operasi in cursor.fetchall():
+            sebelumnya = per_id.get(id_pendaftar)
+            # Baru lalu diubah tetap dianggap baru; dihapus selalu menang
+            if sebelumnya == 'I' and operasi == 'U':
+                continue
+            per_id[id_pendaftar] = operasi
+        return True, (list(per_id.items()), seq_akhir)
+    except Exception as e:
+        return False, f"Gagal membaca log perubahan: {e}"
+
+# --- FUNGSI BARU (FILTER FACET) ---
+def _migrasi_agregat(ctx):
+    """
+    Versi 3: indeks untuk setiap kolom facet dan tabel cache jumlah baris per
+    nilai (kolom, nilai, jumlah). Cache diperbarui secara inkremental oleh
+    trigger INSERT/UPDATE/DELETE, jadi jumlah per facet tidak perlu dihitung
+    ulang dengan GROUP BY. Nilai NULL dicatat sebagai ''.
+    """
+    conn = ctx.conn
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (NAMA_TABEL_AGREGAT,))
+    if cursor.fetchone() is None:
+        with conn:
+            ctx.rencanakan_pengisian(0)  # Penanda: cache perlu dihitung
+            cursor.execute(f"""
+            CREATE TABLE {NAMA_TABEL_AGREGAT} (
+                kolom TEXT NOT NULL,
+                nilai TEXT NOT NULL,
+                jumlah INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (kolom, nilai)
+            ) WITHOUT ROWID
+            """)
+
+    tambah = (f"INSERT INTO {NAMA_TABEL_AGREGAT} (kolom, nilai, jumlah) VALUES ('{{kolom}}', COALESCE({{baris}}.{{kolom}}, ''), 1) "
+              f"ON CONFLICT(kolom, nilai) DO UPDATE SET jumlah = jumlah + 1;")
+    kurang = (f"UPDATE {NAMA_TABEL_AGREGAT} SET jumlah = jumlah - 1 "
+              f"WHERE kolom = '{{kolom}}' AND nilai = COALESCE({{baris}}.{{kolom}}, '');")
+    for i, kolom in enumerate(KOLOM_FACET):
+        ctx.lapor(i, len(KOLOM_FACET), f"Membuat indeks {kolom}...")
+        ctx.cek_batal()
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{NAMA_TABEL}_{kolom} ON {NAMA_TABEL}({kolom})")
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {NAMA_TABEL_AGREGAT}_{kolom}_ai AFTER INSERT ON {NAMA_TABEL} BEGIN
+            {tambah.format(kolom=kolom, baris='new')}
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {NAMA_TABEL_AGREGAT}_{kolom}_ad AFTER DELETE ON {NAMA_TABEL} BEGIN
+            {kurang.format(kolom=kolom, baris='old')}
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {NAMA_TABEL_AGREGAT}_{kolom}_au AFTER UPDATE OF {kolom} ON {NAMA_TABEL}
+        WHEN COALESCE(old.{kolom}, '') IS NOT COALESCE(new.{kolom}, '') BEGIN
+            {kurang.format(kolom=kolom, baris='old')}
+            {tambah.format(kolom=kolom, baris='new')}
+        END
+        """)
+
+    if ctx.ada_pengisian():
+        ctx.lapor(0, 1, "Menghitung jumlah per status...")
+        with conn:
+            _hitung_ulang_agregat(cursor, hanya_aktif=False)  # Kolom dihapus_pada baru ada di versi 9
+
+def _hitung_ulang_agregat(cursor, hanya_aktif=True):
+    """
+    Mengisi ulang cache jumlah facet dari tabel utama (satu kali GROUP BY).
+    Data di Tempat Sampah tidak ikut dihitung.
+    """
+    kondisi = " WHERE dihapus_pada IS NULL" if hanya_aktif else ""
+    cursor.execute(f"DELETE FROM {NAMA_TABEL_AGREGAT}")
+    for kolom in KOLOM_FACET:
+        cursor.execute(f"""
+        INSERT INTO {NAMA_TABEL_AGREGAT} (kolom, nilai, jumlah)
+        SELECT '{kolom}', COALESCE({kolom}, ''), COUNT(*) FROM {NAMA_TABEL}{kondisi}
+        GROUP BY COALESCE({kolom}, '')
+        """)
+
+def get_facet_counts():
+    """
+    Jumlah data per nilai untuk setiap kolom facet, dibaca dari cache
+    (bukan GROUP BY). Mengembalikan (True, {kolom: [(nilai, jumlah), ...]}).
+    """
+    try:
+        conn = get_connection()
+        hasil = {kolom: [] for kolom in KOLOM_FACET}
+        cursor = conn.execute(
+            f"SELECT kolom, nilai, jumlah FROM {NAMA_TABEL_AGREGAT} "
+            f"WHERE jumlah > 0 ORDER BY kolom, jumlah DESC, nilai"
         )
-        '''
-        # --- AKHIR PERUBAHAN ---
-        cursor.execute(query_buat_tabel)
-        
-        # --- BLOK MIGRASI BARU ---
-        # Cek apakah database lama perlu diperbarui
-        
-        # 1. Dapatkan info skema tabel saat ini
-        cursor.execute(f"PRAGMA table_info({NAMA_TABEL})")
-        # Buat daftar nama kolom yang ada
-        columns = [row[1] for row in cursor.fetchall()] 
-        
-        # 2. Cek apakah kolom 'status_hubungan' ada
-        if 'status_hubungan' not in columns:
-            try:
-                print("Menjalankan migrasi: Menambahkan kolom 'status_hubungan'...")
-                cursor.execute(f"ALTER TABLE {NAMA_TABEL} ADD COLUMN status_hubungan TEXT")
-                print("Migrasi 'status_hubungan' berhasil.")
-            except Exception as e:
-                print(f"Migrasi 'status_hubungan' GAGAL: {e}")
-
-        # --- MIGRASI BARU UNTUK CATATAN ---
-        if 'catatan' not in columns:
+        for kolom, nilai, jumlah in cursor:
+            if kolom in hasil:
+                hasil[kolom].append((nilai, jumlah))
+        return True, hasil
+    except Exception as e:
+        return False, f"Gagal memuat jumlah filter: {e}"
+
+# --- FUNGSI BARU (INDEKS DOKUMEN) ---
+def _migrasi_dokumen(ctx):
+    """
+    Versi 5: tabel dokumen (metadata file di folder NIK) agar daftar file,
+    total ukuran, dan kueri "siapa yang belum punya scan KTP" tidak perlu
+    membaca folder satu per satu. Tabel baru diisi dengan reconcile_dokumen
+    (aman diulang jika migrasi terputus).
+    """
+    conn = ctx.conn
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (NAMA_TABEL_DOKUMEN,))
+    if cursor.fetchone() is None:
+        with conn:
+            ctx.rencanakan_pengisian(0)  # Penanda: folder dokumen perlu diindeks
+            cursor.execute(f"""
+            CREATE TABLE {NAMA_TABEL_DOKUMEN} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                pendaftaran_id INTEGER NOT NULL,
+                filename TEXT NOT NULL,
+                ukuran INTEGER,
+                mtime REAL,
+                hash TEXT,
+                mime TEXT,
+                UNIQUE (pendaftaran_id, filename)
+            )
+            """)
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{NAMA_TABEL_DOKUMEN}_hash ON {NAMA_TABEL_DOKUMEN}(hash)")
+    # Baris dokumen ikut terhapus bersama data pendaftarnya
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {NAMA_TABEL_DOKUMEN}_ad AFTER DELETE ON {NAMA_TABEL} BEGIN
+        DELETE FROM {NAMA_TABEL_DOKUMEN} WHERE pendaftaran_id = old.id;
+    END
+    """)
+    if ctx.ada_pengisian():
+        success, hasil = reconcile_dokumen(
+            lambda selesai, total: ctx.lapor(selesai, total, "Mengindeks dokumen yang sudah ada...")
+        )
+        if not success:
+            raise RuntimeError(hasil)
+
+# --- FUNGSI BARU (JURNAL OPERASI FOLDER) ---
+def _migrasi_jurnal(ctx):
+    """Versi 8: tabel jurnal operasi folder dokumen (lihat jurnal.py)."""
+    jurnal.buat_tabel(ctx.conn.cursor())
+
+# --- FUNGSI BARU (TEMPAT SAMPAH) ---
+def _migrasi_sampah(ctx):
+    """
+    Versi 9: kolom dihapus_pada (NULL = aktif) untuk tempat sampah. Trigger
+    cache jumlah facet diganti agar hanya menghitung data aktif, dan
+    memindahkan ke / memulihkan dari sampah dicatat di log perubahan sebagai
+    'D' / 'I' sehingga tampilan daftar (juga di workstation lain) ikut
+    diperbarui per baris. Semua baris lama aktif, jadi cache tidak perlu
+    dihitung ulang.
+    """
+    cursor = ctx.conn.cursor()
+    cursor.execute(f"PRAGMA table_info({NAMA_TABEL})")
+    if 'dihapus_pada' not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {NAMA_TABEL} ADD COLUMN dihapus_pada TEXT")
+    # Indeks parsial: hanya berisi data di sampah (dipakai tampilan sampah dan pembersih)
+    cursor.execute(f"""
+    CREATE INDEX IF NOT EXISTS idx_{NAMA_TABEL}_dihapus_pada ON {NAMA_TABEL}(dihapus_pada)
+    WHERE dihapus_pada IS NOT NULL
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {NAMA_TABEL_PERUBAHAN}_sampah AFTER UPDATE OF dihapus_pada ON {NAMA_TABEL}
+    WHEN (old.dihapus_pada IS NULL) != (new.dihapus_pada IS NULL) BEGIN
+        INSERT INTO {NAMA_TABEL_PERUBAHAN} (pendaftaran_id, operasi)
+        VALUES (new.id, CASE WHEN new.dihapus_pada IS NULL THEN 'I' ELSE 'D' END);
+    END
+    """)
+
+    tambah = (f"INSERT INTO {NAMA_TABEL_AGREGAT} (kolom, nilai, jumlah) "
+              f"SELECT '{{kolom}}', COALESCE({{baris}}.{{kolom}}, ''), 1 WHERE {{baris}}.dihapus_pada IS NULL "
+              f"ON CONFLICT(kolom, nilai) DO UPDATE SET jumlah = jumlah + 1;")
+    kurang = (f"UPDATE {NAMA_TABEL_AGREGAT} SET jumlah = jumlah - 1 "
+              f"WHERE kolom = '{{kolom}}' AND nilai = COALESCE({{baris}}.{{kolom}}, '') "
+              f"AND {{baris}}.dihapus_pada IS NULL;")
+    for kolom in KOLOM_FACET:
+        for akhiran in ('ai', 'ad', 'au'):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {NAMA_TABEL_AGREGAT}_{kolom}_{akhiran}")
+        cursor.execute(f"""
+        CREATE TRIGGER {NAMA_TABEL_AGREGAT}_{kolom}_ai AFTER INSERT ON {NAMA_TABEL} BEGIN
+            {tambah.format(kolom=kolom, baris='new')}
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER {NAMA_TABEL_AGREGAT}_{kolom}_ad AFTER DELETE ON {NAMA_TABEL} BEGIN
+            {kurang.format(kolom=kolom, baris='old')}
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER {NAMA_TABEL_AGREGAT}_{kolom}_au AFTER UPDATE OF {kolom}, dihapus_pada ON {NAMA_TABEL}
+        WHEN COALESCE(old.{kolom}, '') IS NOT COALESCE(new.{kolom}, '')
+          OR (old.dihapus_pada IS NULL) != (new.dihapus_pada IS NULL) BEGIN
+            {kurang.format(kolom=kolom, baris='old')}
+            {tambah.format(kolom=kolom, baris='new')}
+        END
+        """)
+
+def _nik_terdaftar(nik):
+    # Data di Tempat Sampah masih memiliki foldernya (bisa dipulihkan)
+    return get_connection().execute(f"SELECT 1 FROM {NAMA_TABEL} WHERE nik = ?", (nik,)).fetchone() is not None
+
+def _nik_di_sampah(nik):
+    return get_connection().execute(
+        f"SELECT 1 FROM {NAMA_TABEL} WHERE nik = ? AND dihapus_pada IS NOT NULL", (nik,)
+    ).fetchone() is not None
+
+def _hapus_sisa_salinan(folder, filename):
+    """Menghapus file sementara '.<filename>.*.part' yang tertinggal dari salinan terputus."""
+    if folder.exists():
+        for sisa in folder.glob(f".{filename}.*.part"):
+            sisa.unlink(missing_ok=True)
+
+# Langkah jurnal: fungsi(nik, pemulihan, **argumen) -> keterangan tindakan.
+# Semuanya idempoten; `pemulihan` True saat diulang ketika aplikasi dibuka.
+def _jurnal_rename_folder(nik, lama, pemulihan=False):
+    """Folder NIK `lama` menjadi folder NIK `nik` (NIK diubah)."""
+    folder_lama = doc_manager.folder_dokumen(lama)
+    folder_baru = doc_manager.folder_dokumen(nik)
+    if not _nik_terdaftar(nik):
+        # Data sudah dihapus setelah NIK diubah: folder lama tidak dipakai lagi
+        if folder_lama.exists() and not _nik_terdaftar(lama):
+            doc_manager.hapus_folder(folder_lama)
+            return f"NIK {nik} sudah dihapus, folder {lama} dihapus"
+        return "dilewati, NIK sudah tidak terdaftar"
+    if not folder_lama.exists():
+        folder_baru.mkdir(parents=True, exist_ok=True)
+        return "folder sudah di-rename"
+    if not folder_baru.exists():
+        os.rename(folder_lama, folder_baru)
+        return f"folder {lama} di-rename ke {nik}"
+    # Keduanya ada (mis. dokumen baru sudah disalin ke folder baru): gabungkan
+    dipindah = []
+    for path in folder_lama.iterdir():
+        if path.is_file() and not doc_manager.is_file_sementara(path) and not (folder_baru / path.name).exists():
+            doc_manager.simpan_dokumen(path, folder_baru / path.name)
+            dipindah.append(path.name)
+    catat_dokumen(nik, dipindah)
+    doc_manager.hapus_folder(folder_lama)
+    return f"{len(dipindah)} dokumen dari folder {lama} digabung ke {nik}"
+
+def _jurnal_hapus_folder(nik, pemulihan=False):
+    """Folder NIK dihapus setelah datanya dihapus."""
+    if _nik_terdaftar(nik):
+        return "dilewati, NIK sudah terdaftar lagi"
+    if not doc_manager.folder_dokumen(nik).exists():
+        return "folder sudah terhapus"
+    doc_manager.hapus_folder(doc_manager.folder_dokumen(nik))
+    return "folder dihapus"
+
+def _jurnal_hapus_dokumen(nik, filename, pemulihan=False):
+    if Path(filename).name != filename:
+        raise ValueError(f"Nama dokumen tidak valid: {filename!r}")
+    folder = doc_manager.folder_dokumen(nik)
+    if not folder.exists():
+        return f"dokumen {filename} sudah tidak ada"
+    doc_manager.hapus_dokumen(folder, filename)
+    return f"dokumen {filename} dihapus"
+
+def _jurnal_salin_dokumen(nik, sumber, filename, lewati_jika_ada=False, pemulihan=False):
+    """Menyalin satu file ke folder NIK lalu mencatatnya di tabel dokumen."""
+    folder = doc_manager.folder_dokumen(nik)
+    if pemulihan:
+        _hapus_sisa_salinan(folder, filename)
+    if not _nik_terdaftar(nik):
+        return "dibatalkan, NIK sudah tidak terdaftar"
+    tujuan = folder / filename
+    if lewati_jika_ada and tujuan.exists():
+        return f"dokumen {filename} sudah ada"
+    if pemulihan and not Path(sumber).exists():
+        return f"dibatalkan, file sumber {sumber} sudah tidak ada"
+    doc_manager.simpan_dokumen(sumber, tujuan)
+    catat_dokumen(nik, [filename])
+    return f"dokumen {filename} disalin"
+
+LANGKAH_JURNAL = {
+    'rename_folder': _jurnal_rename_folder,
+    'hapus_folder': _jurnal_hapus_folder,
+    'hapus_dokumen': _jurnal_hapus_dokumen,
+    'salin_dokumen': _jurnal_salin_dokumen,
+}
+
+def _langkah_salin(nik, files_to_add, lewati_jika_ada=False):
+    return [
+        ('salin_dokumen', nik, {'sumber': str(src), 'filename': Path(src).name, 'lewati_jika_ada': lewati_jika_ada})
+        for src in files_to_add
+    ]
+
+def jalankan_jurnal(ids=None):
+    """
+    Mengerjakan langkah file yang tertunda milik proses ini (misalnya dari
+    delete_data(..., jalankan_berkas=False)), dari thread mana pun.
+    Mengembalikan daftar (entri, pesan_error) untuk langkah yang gagal.
+    """
+    return jurnal.jalankan(get_connection(), LANGKAH_JURNAL, ids)
+
+def mulai_salinan(source_path, dest_path):
+    """
+    Mencatat penyalinan satu dokumen oleh antrean salin GUI
+    (DocumentCopyManager) di jurnal SEBELUM file disalin, agar salinan yang
+    terputus (aplikasi ditutup paksa, listrik padam) diulang saat aplikasi
+    dibuka lagi. Entri diakhiri dengan akhiri_salinan(). Mengembalikan id
+    entri jurnal (None jika gagal dicatat; penyalinan tetap berjalan).
+    """
+    dest_path = Path(dest_path)
+    try:
+        return jurnal.pegang(get_connection(), [
+            ('salin_dokumen', dest_path.parent.name, {'sumber': str(source_path), 'filename': dest_path.name})
+        ])[0]
+    except Exception as e:
+        print(f"Gagal mencatat salinan {dest_path.name} di jurnal: {e}")
+        return None
+
+def akhiri_salinan(id_jurnal, pesan_gagal=None):
+    """
+    Mengakhiri entri dari mulai_salinan(): dihapus jika salinan selesai atau
+    dibatalkan; jika `pesan_gagal` diisi, entri ditandai gagal dan diulang
+    saat aplikasi dibuka lagi.
+    """
+    if id_jurnal is None:
+        return
+    try:
+        jurnal.lepas(get_connection(), id_jurnal, pesan_gagal)
+    except Exception as e:
+        print(f"Gagal memperbarui jurnal salinan {id_jurnal}: {e}")
+
+def _hasil_jurnal(awalan, gagal):
+    """Pesan sukses untuk operasi yang sebagian langkah filenya gagal (None jika tidak ada)."""
+    if not gagal:
+        return None
+    salin = [(json.loads(e['argumen'])['sumber'], pesan) for e, pesan in gagal if e['operasi'] == 'salin_dokumen']
+    lain = [f"- {e['operasi']}: {pesan}" for e, pesan in gagal if e['operasi'] != 'salin_dokumen']
+    if salin and not lain:
+        return _pesan_salinan_gagal(awalan, salin)
+    return (f"{awalan}, tetapi {len(gagal)} langkah folder dokumen gagal dan akan diulang "
+            f"saat aplikasi dibuka lagi:\n" + "\n".join(lain + [f"- salin {Path(s).name}: {p}" for s, p in salin]))
+
+_laporan_pemulihan = []
+
+def _pulihkan_jurnal(conn):
+    """Mengulang langkah jurnal yang tertinggal dari sesi sebelumnya dan mencatat laporannya."""
+    laporan = jurnal.pulihkan(conn, LANGKAH_JURNAL, UMUR_MIN_PEMULIHAN_JURNAL_DETIK)
+    _laporan_pemulihan[:] = laporan
+    if not laporan:
+        return
+    baris = jurnal.format_laporan(laporan)
+    print("Pemulihan jurnal operasi:\n" + "\n".join(baris))
+    try:
+        with open(FILE_LOG_PEMULIHAN, "a", encoding="utf-8") as f:
+            f.write("".join(f"{b}\n" for b in baris))
+    except OSError as e:
+        print(f"Gagal menulis {FILE_LOG_PEMULIHAN}: {e}")
+
+def get_laporan_pemulihan():
+    """Laporan pemulihan jurnal dari init_db terakhir (list dict, lihat jurnal.pulihkan)."""
+    return list(_laporan_pemulihan)
+
+# Urutan langkah migrasi: (versi, deskripsi, fungsi). Versi = nilai
+# PRAGMA user_version setelah langkah selesai. Perubahan skema berikutnya
+# ditambahkan sebagai langkah baru di akhir; langkah lama jangan diubah.
+MIGRASI = [
+    (1, "Tabel pendaftaran", _migrasi_tabel_utama),
+    (2, "Indeks pencarian FTS5", _migrasi_fts),
+    (3, "Filter status (indeks dan jumlah)", _migrasi_agregat),
+    (4, "Indeks Kartu Keluarga", _migrasi_indeks_keluarga),
+    (5, "Indeks dokumen", _migrasi_dokumen),
+    (6, "Log perubahan dan stempel waktu", _migrasi_perubahan),
+    (7, "Versi baris (deteksi edit bersamaan)", _migrasi_versi_baris),
+    (8, "Jurnal operasi folder dokumen", _migrasi_jurnal),
+    (9, "Tempat sampah", _migrasi_sampah),
+]
+
+def _info_dokumen(path, stat_result, manifest):
+    """Tuple (filename, ukuran, mtime, hash, mime) untuk satu file."""
+    mime, _ = mimetypes.guess_type(path.name)
+    return (path.name, stat_result.st_size, stat_result.st_mtime, manifest.get(path.name), mime)
+
+def catat_dokumen(nik, filenames):
+    """
+    Mencatat (atau memperbarui) file yang baru disimpan ke folder NIK.
+    Dipanggil setelah penyalinan selesai, termasuk dari thread latar belakang.
+    """
+    try:
+        conn = get_connection()
+        row = conn.execute(f"SELECT id FROM {NAMA_TABEL} WHERE nik = ?", (nik,)).fetchone()
+        if row is None:
+            return False, f"NIK '{nik}' tidak ditemukan."
+        folder = doc_manager.folder_dokumen(nik)
+        manifest = doc_manager.hash_tercatat(folder)
+        values = []
+        for filename in filenames:
+            path = folder / filename
             try:
-                print("Menjalankan migrasi: Menambahkan kolom 'catatan'...")
-                cursor.execute(f"ALTER TABLE {NAMA_TABEL} ADD COLUMN catatan TEXT")
-                print("Migrasi 'catatan' berhasil.")
-            except Exception as e:
-                print(f"Migrasi 'catatan' GAGAL: {e}")
-        # --- AKHIR MIGRASI BARU ---
-        
-        conn.commit()
-        conn.close()
-        print(f"Database {DB_NAME}, tabel {NAMA_TABEL}, dan folder {BASE_DOC_FOLDER} berhasil diinisialisasi.")
+                values.append((row['id'],) + _info_dokumen(path, path.stat(), manifest))
+            except FileNotFoundError:
+                continue
+        with conn:
+            conn.executemany(f"""
+            INSERT INTO {NAMA_TABEL_DOKUMEN} (pendaftaran_id, filename, ukuran, mtime, hash, mime)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(pendaftaran_id, filename) DO UPDATE SET
+                ukuran = excluded.ukuran, mtime = excluded.mtime,
+                hash = excluded.hash, mime = excluded.mime
+            """, values)
+        return True, len(values)
     except Exception as e:
-        print(f"Error saat inisialisasi DB: {e}")
+        print(f"Gagal mencatat dokumen NIK {nik}: {e}")
+        return False, f"Gagal mencatat dokumen: {e}"
+
+def get_dokumen(id_pendaftar):
+    """Daftar dokumen milik satu pendaftar (urut nama file)."""
+    try:
+        conn = get_connection()
+        cursor = conn.execute(
+            f"SELECT filename, ukuran, mtime, hash, mime FROM {NAMA_TABEL_DOKUMEN} "
+            f"WHERE pendaftaran_id = ? ORDER BY filename COLLATE NOCASE",
+            (id_pendaftar,)
+        )
+        return True, cursor.fetchall()
+    except Exception as e:
+        return False, f"Gagal memuat daftar dokumen: {e}"
+
+def cermin_dokumen(nik, dokumen):
+    """
+    Menyamakan folder dokumen lokal dengan daftar `dokumen` (hasil
+    get_dokumen). Di mode lokal folder itu sendiri sumbernya, jadi tidak ada
+    yang diunduh; mode server (klien_server) menggantinya dengan pengunduhan.
+    Mengembalikan (True, jumlah_file_diunduh).
+    """
+    return True, 0
+
+def get_total_dokumen():
+    """Jumlah file dan total ukuran dokumen per pendaftar, terbesar dulu."""
+    try:
+        conn = get_connection()
+        cursor = conn.execute(f"""
+        SELECT p.id, p.nama, p.nik, COUNT(d.id) AS jumlah, COALESCE(SUM(d.ukuran), 0) AS total_ukuran
+        FROM {NAMA_TABEL} p LEFT JOIN {NAMA_TABEL_DOKUMEN} d ON d.pendaftaran_id = p.id
+        WHERE p.dihapus_pada IS NULL
+        GROUP BY p.id ORDER BY total_ukuran DESC
+        """)
+        return True, cursor.fetchall()
+    except Exception as e:
+        return False, f"Gagal menghitung total dokumen: {e}"
+
+def get_pendaftar_tanpa_dokumen(pola_nama_file):
+    """
+    Pendaftar yang tidak punya dokumen dengan nama file cocok pola LIKE,
+    misalnya get_pendaftar_tanpa_dokumen('%ktp%').
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.execute(f"""
+        SELECT p.id, p.nama, p.nik FROM {NAMA_TABEL} p
+        WHERE p.dihapus_pada IS NULL AND NOT EXISTS (
+            SELECT 1 FROM {NAMA_TABEL_DOKUMEN} d
+            WHERE d.pendaftaran_id = p.id AND d.filename LIKE ?
+        )
+        ORDER BY p.nama
+        """, (pola_nama_file,))
+        return True, cursor.fetchall()
+    except Exception as e:
+        return False, f"Gagal mencari pendaftar: {e}"
+
+def reconcile_dokumen(progress_cb=None):
+    """
+    Menyamakan tabel dokumen dengan isi folder NIK di filesystem: file baru
+    dicatat, file yang berubah (ukuran/mtime) diperbarui, dan catatan file
+    yang sudah tidak ada dihapus. progress_cb(selesai, total) per pendaftar.
+    Mengembalikan (success, laporan_dict | pesan_error).
+    """
+    laporan = {'ditambah': 0, 'diperbarui': 0, 'dihapus': 0}
+    try:
+        conn = get_connection()
+        pendaftar = conn.execute(f"SELECT id, nik FROM {NAMA_TABEL} ORDER BY id").fetchall()
+        tercatat = {}
+        for row in conn.execute(
+            f"SELECT pendaftaran_id, filename, ukuran, mtime, hash FROM {NAMA_TABEL_DOKUMEN}"
+        ):
+            tercatat.setdefault(row['pendaftaran_id'], {})[row['filename']] = row
+
+        with conn:
+            for i, row in enumerate(pendaftar, start=1):
+                folder = doc_manager.folder_dokumen(row['nik'])
+                lama = tercatat.pop(row['id'], {})
+                ada = set()
+                manifest = None
+                try:
+                    entries = list(os.scandir(folder))
+                except FileNotFoundError:
+                    entries = []
+                for entry in entries:
+                    if not entry.is_file() or doc_manager.is_file_sementara(entry.name):
+                        continue
+                    ada.add(entry.name)
+                    st = entry.stat()
+                    catatan = lama.get(entry.name)
+                    if manifest is None:
+                        manifest = doc_manager.hash_tercatat(folder)
+                    if catatan is not None and catatan['ukuran'] == st.st_size \
+                            and catatan['mtime'] == st.st_mtime \
+                            and catatan['hash'] == manifest.get(entry.name):
+                        continue
+                    conn.execute(f"""
+                    INSERT INTO {NAMA_TABEL_DOKUMEN} (pendaftaran_id, filename, ukuran, mtime, hash, mime)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(pendaftaran_id, filename) DO UPDATE SET
+                        ukuran = excluded.ukuran, mtime = excluded.mtime,
+                        hash = excluded.hash, mime = excluded.mime
+                    """, (row['id'],) + _info_dokumen(Path(entry.path), st, manifest))
+                    laporan['diperbarui' if catatan is not None else 'ditambah'] += 1
+
+                hilang = [(row['id'], nama) for nama in lama if nama not in ada]
+                if hilang:
+                    conn.executemany(
+                        f"DELETE FROM {NAMA_TABEL_DOKUMEN} WHERE pendaftaran_id = ? AND filename = ?", hilang
+                    )
+                    laporan['dihapus'] += len(hilang)
+                if progress_cb is not None:
+                    progress_cb(i, len(pendaftar))
+
+            # Catatan milik pendaftar yang sudah tidak ada
+            for id_yatim, files in tercatat.items():
+                conn.execute(f"DELETE FROM {NAMA_TABEL_DOKUMEN} WHERE pendaftaran_id = ?", (id_yatim,))
+                laporan['dihapus'] += len(files)
+        return True, laporan
+    except Exception as e:
+        return False, f"Gagal menyamakan indeks dokumen: {e}"
 
 # ... (Sisa file db_manager.py tidak perlu diubah karena sudah dinamis) ...
 
-def save_data(data: dict):
-    """Menyimpan data ke DB dan file ke filesystem."""
+def save_data(data: dict, copy_files=True):
+    """
+    Menyimpan data ke DB dan file ke filesystem.
+    Jika copy_files=False, file di 'files_to_add' TIDAK disalin di sini;
+    pemanggil (FormWidget) menyalinnya lewat antrean latar belakang
+    memakai doc_manager.rencana_salinan(nik, files_to_add).
+    """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
+        nik = data.get('nik')
+        if not doc_manager.nik_valid(nik):
+            return False, "Gagal menyimpan. NIK harus 16 digit angka."
+        conn = get_connection()
         
         values_tuple = tuple(data.get(field) for field in FIELD_UNTUK_INSERT)
         placeholders = ', '.join(['?'] * len(FIELD_UNTUK_INSERT))
@@ -90,123 +943,429 @@ def save_data(data: dict):
         
         query = f"INSERT INTO {NAMA_TABEL} ({fields}) VALUES ({placeholders})"
         
-        cursor.execute(query, values_tuple)
-        conn.commit()
-        conn.close()
+        with conn: # Commit otomatis, rollback jika gagal
+            conn.execute(query, values_tuple)
+            # Salinan dokumen dicatat di jurnal dalam transaksi yang sama
+            ids = jurnal.catat(conn, _langkah_salin(nik, data.get('files_to_add', set())) if copy_files else [])
 
         # --- Logika File BARU ---
-        nik = data.get('nik')
-        folder_path = Path(BASE_DOC_FOLDER) / nik
+        folder_path = doc_manager.folder_dokumen(nik)
         folder_path.mkdir(exist_ok=True) # Buat folder NIK
         
-        files_to_add = data.get('files_to_add', set())
-        for source_path_str in files_to_add:
-            source_path = Path(source_path_str)
-            dest_path = folder_path / source_path.name
-            shutil.copy2(source_path, dest_path) # Salin file
-        
-        return True, "Data dan dokumen berhasil disimpan!"
+        pesan = _hasil_jurnal("Data tersimpan", jurnal.jalankan(conn, LANGKAH_JURNAL, ids))
+        return True, pesan or "Data dan dokumen berhasil disimpan!"
         
     except sqlite3.IntegrityError:
+        if _nik_di_sampah(data.get('nik')):
+            return False, (f"Gagal menyimpan. NIK '{data.get('nik')}' ada di Tempat Sampah; "
+                           f"pulihkan data tersebut atau hapus permanen lebih dulu.")
         return False, f"Gagal menyimpan. NIK '{data.get('nik')}' mungkin sudah terdaftar."
     except Exception as e:
         return False, f"Terjadi kesalahan: {e}"
 
-def update_data(id_to_update, data: dict):
-    """Memperbarui data di DB dan mengelola file di filesystem."""
+def _pesan_salinan_gagal(awalan, gagal):
+    daftar = "\n".join(f"- {Path(src).name}: {pesan}" for src, pesan in gagal)
+    return f"{awalan}, tetapi {len(gagal)} dokumen gagal disalin:\n{daftar}"
+
+# --- FUNGSI BARU (IMPOR MASSAL) ---
+def save_data_batch(records):
+    """
+    Menyimpan banyak data sekaligus dalam SATU transaksi dengan executemany.
+    `records` adalah list pasangan (nomor_baris, dict_data). Data yang NIK-nya
+    sudah terdaftar (atau muncul dua kali di batch yang sama) tidak ikut
+    disimpan, melainkan dilaporkan sebagai konflik tanpa membatalkan batch.
+
+    Mengembalikan (True, (jumlah_tersimpan, daftar_konflik)) di mana setiap
+    konflik berbentuk (nomor_baris, nik, alasan).
+    """
     try:
-        # --- Logika Folder BARU ---
-        new_nik = data.get('nik')
-        old_nik = data.get('old_nik') # Kita dapat ini dari form
-        
-        folder_path = Path(BASE_DOC_FOLDER) / old_nik
-        new_folder_path = Path(BASE_DOC_FOLDER) / new_nik
-        
-        # 1. Cek jika NIK berubah -> rename folder
-        if old_nik != new_nik and folder_path.exists():
-            try:
-                os.rename(folder_path, new_folder_path)
-                folder_path = new_folder_path # Update path untuk langkah selanjutnya
-            except Exception as e:
-                print(f"Gagal me-rename folder: {e}")
-                # Jika gagal rename, tetap gunakan path baru untuk file baru
-                folder_path = new_folder_path
+        conn = get_connection()
+        konflik = []
+        if not records:
+            return True, (0, konflik)
+
+        # 1. Cari NIK yang sudah ada di DB (satu kueri per batch)
+        semua_nik = list({data.get('nik') for _, data in records})
+        placeholders_nik = ', '.join(['?'] * len(semua_nik))
+        cursor = conn.execute(
+            f"SELECT nik, dihapus_pada FROM {NAMA_TABEL} WHERE nik IN ({placeholders_nik})", semua_nik
+        )
+        nik_terdaftar = {row[0]: row[1] for row in cursor.fetchall()}
+
+        # 2. Saring konflik, termasuk duplikat di dalam batch itu sendiri
+        baris_valid = []
+        nik_di_batch = set()
+        for nomor_baris, data in records:
+            nik = data.get('nik')
+            if not doc_manager.nik_valid(nik):
+                konflik.append((nomor_baris, nik, "NIK harus 16 digit angka"))
+            elif nik in nik_terdaftar:
+                alasan = "NIK ada di Tempat Sampah" if nik_terdaftar[nik] else "NIK sudah terdaftar"
+                konflik.append((nomor_baris, nik, alasan))
+            elif nik in nik_di_batch:
+                konflik.append((nomor_baris, nik, "NIK ganda di file impor"))
+            else:
+                nik_di_batch.add(nik)
+                values_tuple = tuple(data.get(field) for field in FIELD_UNTUK_INSERT)
+                baris_valid.append((nomor_baris, nik, values_tuple))
+
+        # 3. Simpan sisanya dengan executemany dalam satu transaksi
+        placeholders = ', '.join(['?'] * len(FIELD_UNTUK_INSERT))
+        fields = ', '.join(FIELD_UNTUK_INSERT)
+        query = f"INSERT INTO {NAMA_TABEL} ({fields}) VALUES ({placeholders})"
+        try:
+            with conn:
+                conn.executemany(query, [values for _, _, values in baris_valid])
+            tersimpan = len(baris_valid)
+        except sqlite3.IntegrityError:
+            # NIK didaftarkan workstation lain di antara cek dan insert:
+            # ulangi per baris (tetap satu transaksi) agar konflik tercatat
+            tersimpan = 0
+            with conn:
+                for nomor_baris, nik, values in baris_valid:
+                    try:
+                        conn.execute(query, values)
+                        tersimpan += 1
+                    except sqlite3.IntegrityError:
+                        konflik.append((nomor_baris, nik, "NIK sudah terdaftar"))
+
+        return True, (tersimpan, konflik)
+    except Exception as e:
+        return False, f"Gagal menyimpan batch data: {e}"
+
+# --- FUNGSI BARU (IMPOR AI BATCH) ---
+def get_data_by_niks(niks):
+    """Mengambil data lengkap untuk beberapa NIK sekaligus -> dict nik: Row."""
+    try:
+        niks = list(set(niks))
+        if not niks:
+            return True, {}
+        placeholders = ', '.join(['?'] * len(niks))
+        cursor = get_connection().execute(
+            f"SELECT * FROM {NAMA_TABEL} WHERE nik IN ({placeholders})", niks
+        )
+        return True, {row['nik']: row for row in cursor.fetchall()}
+    except Exception as e:
+        return False, f"Error saat mengambil data by NIK: {e}"
+
+def upsert_data_batch(records):
+    """
+    Menambah atau memperbarui banyak data berdasarkan NIK dalam SATU
+    transaksi. Untuk NIK yang sudah ada, hanya field yang tidak kosong di
+    record baru yang ditimpa (string kosong berarti 'tidak diketahui'),
+    sehingga password/email/status yang sudah tersimpan tidak terhapus.
+    NIK yang ada di Tempat Sampah ikut dipulihkan.
+    """
+    try:
+        fields = ', '.join(FIELD_UNTUK_INSERT)
+        placeholders = ', '.join(['?'] * len(FIELD_UNTUK_INSERT))
+        fields_to_set = ", ".join(
+            f"{field} = COALESCE(NULLIF(excluded.{field}, ''), {field})"
+            for field in FIELD_UNTUK_INSERT if field != 'nik'
+        )
+        query = (
+            f"INSERT INTO {NAMA_TABEL} ({fields}) VALUES ({placeholders}) "
+            f"ON CONFLICT(nik) DO UPDATE SET {fields_to_set}, dihapus_pada = NULL"
+        )
+        values = [tuple(data.get(field) for field in FIELD_UNTUK_INSERT) for data in records]
+
+        conn = get_connection()
+        with conn:
+            conn.executemany(query, values)
+        return True, f"{len(values)} data berhasil disimpan/diperbarui!"
+    except Exception as e:
+        return False, f"Gagal menyimpan batch data: {e}"
+
+def _kolom_diubah(data, pembanding):
+    """Field FIELD_UNTUK_INSERT yang ada di `data` dan nilainya berbeda dari `pembanding`."""
+    return [field for field in FIELD_UNTUK_INSERT if field in data and data[field] != pembanding[field]]
+
+def _konflik_versi(data, awal, sekarang):
+    """
+    Field yang bentrok: diubah oleh pengguna ini DAN oleh penulis lain ke
+    nilai yang berbeda. Tanpa `awal` (nilai saat form dibuka) setiap field
+    yang berbeda dari nilai tersimpan dianggap bentrok.
+    Mengembalikan list (field, nilai_anda, nilai_tersimpan, nilai_awal).
+    """
+    if awal is None:
+        return [(f, data[f], sekarang[f], None) for f in _kolom_diubah(data, sekarang)]
+    return [
+        (f, data[f], sekarang[f], awal.get(f))
+        for f in _kolom_diubah(data, awal)
+        if sekarang[f] != awal.get(f) and sekarang[f] != data[f]
+    ]
+
+def update_data(id_to_update, data: dict, copy_files=True, jalankan_berkas=True):
+    """
+    Memperbarui data di DB dan mengelola file di filesystem.
+    copy_files=False: lihat save_data (file baru disalin oleh pemanggil).
+    Rename folder NIK, hapus, dan salin dokumen dicatat di jurnal dalam
+    transaksi yang sama dengan UPDATE lalu dikerjakan setelah commit;
+    jalankan_berkas=False menyerahkannya ke pemanggil (jalankan_jurnal()
+    di thread latar belakang).
+
+    Hanya field FIELD_UNTUK_INSERT yang ada di `data` dan nilainya berubah
+    yang ditulis; jika tidak ada yang berubah, baris tidak disentuh.
+    Optimistic concurrency (opsional):
+      - data['row_version']: versi baris saat form dibuka. Jika baris sudah
+        diubah penulis lain sejak itu, perubahan tetap digabung selama
+        field yang diubah tidak bentrok,
+      - data['nilai_awal']: nilai field saat form dibuka (dict/Row), dipakai
+        untuk membedakan perubahan sendiri dari perubahan penulis lain.
+    Jika ada field yang bentrok, tidak ada yang ditulis dan hasilnya
+    (False, {'pesan', 'perbedaan', 'baris', 'row_version'}) dengan
+    'perbedaan' berisi (field, nilai_anda, nilai_tersimpan, nilai_awal).
+    """
+    try:
+        if 'nik' in data and not doc_manager.nik_valid(data['nik']):
+            return False, "Gagal update. NIK harus 16 digit angka."
+        if any(Path(str(f)).name != f for f in data.get('files_to_remove', ())):
+            return False, "Gagal update. Nama dokumen yang dihapus tidak valid."
+        conn = get_connection()
+        versi_form = data.get('row_version')
+        awal = data.get('nilai_awal')
+        awal = dict(awal) if awal is not None else None
+
+        # 1. Update Database (compare-and-swap pada row_version; diulang jika
+        #    penulis lain meng-commit di antara SELECT dan UPDATE)
+        for _ in range(3):
+            sekarang = conn.execute(f"SELECT * FROM {NAMA_TABEL} WHERE id = ?", (id_to_update,)).fetchone()
+            if sekarang is None:
+                return False, "Data tidak ditemukan untuk diperbarui."
+            if sekarang['dihapus_pada'] is not None:
+                return False, "Data ini sudah dipindahkan ke Tempat Sampah. Pulihkan dulu untuk mengedit."
+            if versi_form is not None and sekarang['row_version'] != versi_form:
+                bentrok = _konflik_versi(data, awal, sekarang)
+                if bentrok:
+                    return False, {
+                        'pesan': (f"Data NIK '{sekarang['nik']}' sudah diubah di tempat lain sejak dibuka "
+                                  f"({len(bentrok)} field bentrok). Perubahan belum disimpan."),
+                        'perbedaan': bentrok,
+                        'baris': sekarang,
+                        'row_version': sekarang['row_version'],
+                    }
+            kolom = _kolom_diubah(data, awal if awal is not None and versi_form is not None else sekarang)
+            kolom = [field for field in kolom if data[field] != sekarang[field]]
+
+            # 2. Langkah folder: NIK lama diambil dari baris yang sedang diperbarui
+            old_nik = sekarang['nik']
+            new_nik = data.get('nik', old_nik)
+            files_to_remove = data.get('files_to_remove', set())
+            # Folder NIK lama yang tidak valid (data lama) tidak pernah dibuat di dalam folder dokumen
+            langkah = ([('rename_folder', new_nik, {'lama': old_nik})]
+                       if new_nik != old_nik and doc_manager.nik_valid(old_nik) else [])
+            langkah += [('hapus_dokumen', new_nik, {'filename': filename}) for filename in files_to_remove]
+            if copy_files:
+                langkah += _langkah_salin(new_nik, data.get('files_to_add', set()), lewati_jika_ada=True)
+
+            with conn:
+                if kolom:
+                    fields_to_set = ", ".join(f"{field} = ?" for field in kolom)
+                    cursor = conn.execute(
+                        f"UPDATE {NAMA_TABEL} SET {fields_to_set}, row_version = row_version + 1 "
+                        f"WHERE id = ? AND row_version = ?",
+                        tuple(data[field] for field in kolom) + (id_to_update, sekarang['row_version'])
+                    )
+                    if not cursor.rowcount:
+                        continue  # Diubah penulis lain di antaranya: baca ulang
+                if files_to_remove:
+                    conn.executemany(
+                        f"DELETE FROM {NAMA_TABEL_DOKUMEN} WHERE pendaftaran_id = ? AND filename = ?",
+                        [(id_to_update, filename) for filename in files_to_remove]
+                    )
+                ids = jurnal.catat(conn, langkah)
+            break
         else:
-            folder_path = new_folder_path
-            
-        
-        folder_path.mkdir(exist_ok=True)
+            return False, "Gagal update: data terus diubah di tempat lain, silakan coba lagi."
 
-        # 2. Update Database
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        
-        fields_to_set = ", ".join([f"{field} = ?" for field in FIELD_UNTUK_INSERT])
-        values_tuple = tuple(data.get(field) for field in FIELD_UNTUK_INSERT)
-        values_tuple_with_id = values_tuple + (id_to_update,)
-        
-        query = f"UPDATE {NAMA_TABEL} SET {fields_to_set} WHERE id = ?"
-        
-        cursor.execute(query, values_tuple_with_id)
-        conn.commit()
-        conn.close()
-
-        # 3. Kelola File
-        files_to_remove = data.get('files_to_remove', set())
-        for filename in files_to_remove:
-            file_to_del = folder_path / filename
-            if file_to_del.exists():
-                os.remove(file_to_del)
-                
-        files_to_add = data.get('files_to_add', set())
-        for source_path_str in files_to_add:
-            source_path = Path(source_path_str)
-            dest_path = folder_path / source_path.name
-            if not dest_path.exists(): # Hindari duplikat
-                shutil.copy2(source_path, dest_path)
-        
-        return True, "Data dan dokumen berhasil diperbarui!"
+        # 3. Kelola Folder dan File (sesuai jurnal)
+        if new_nik == old_nik:
+            doc_manager.folder_dokumen(new_nik).mkdir(exist_ok=True)
+        if not jalankan_berkas:
+            return True, "Data berhasil diperbarui! Dokumen sedang diproses di latar belakang."
+        pesan = _hasil_jurnal("Data diperbarui", jurnal.jalankan(conn, LANGKAH_JURNAL, ids))
+        return True, pesan or "Data dan dokumen berhasil diperbarui!"
         
     except sqlite3.IntegrityError:
         return False, f"Gagal update. NIK '{data.get('nik')}' mungkin duplikat."
     except Exception as e:
         return False, f"Terjadi kesalahan saat update: {e}"
 
-def delete_data(id_to_delete):
-    """Menghapus data dari DB dan folder terkait dari filesystem."""
+def delete_data(id_to_delete, data_row=None, jalankan_berkas=True):
+    """
+    Menghapus data dari DB dan folder terkait dari filesystem.
+    data_row (opsional) adalah baris yang sudah diambil pemanggil, agar
+    tidak perlu dibaca ulang dari DB. Penghapusan folder dicatat di jurnal
+    bersama DELETE; jalankan_berkas=False menyerahkannya ke pemanggil
+    (jalankan_jurnal() di thread latar belakang).
+    """
     try:
         # 1. Ambil NIK *sebelum* menghapus data
-        success, data_row = get_data_by_id(id_to_delete)
-        if not success:
-            return False, "Data tidak ditemukan untuk dihapus."
+        if data_row is None:
+            success, data_row = get_data_by_id(id_to_delete)
+            if not success:
+                return False, "Data tidak ditemukan untuk dihapus."
             
         nik = data_row['nik']
-        folder_path = Path(BASE_DOC_FOLDER) / nik
 
-        # 2. Hapus data dari Database
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute(f"DELETE FROM {NAMA_TABEL} WHERE id = ?", (id_to_delete,))
-        conn.commit()
-        conn.close()
+        # 2. Hapus data dari Database (langkah hapus folder ikut dicatat)
+        conn = get_connection()
+        with conn:
+            conn.execute(f"DELETE FROM {NAMA_TABEL} WHERE id = ?", (id_to_delete,))
+            # NIK yang bukan 16 digit tidak punya folder di dalam folder dokumen
+            ids = jurnal.catat(conn, [('hapus_folder', nik, {})] if doc_manager.nik_valid(nik) else [])
         
-        # 3. Hapus folder dan isinya
-        if folder_path.exists():
-            shutil.rmtree(folder_path)
-            
-        return True, "Data dan folder dokumen terkait berhasil dihapus!"
+        # 3. Hapus folder dan isinya (blob hanya dibebaskan jika tidak dipakai NIK lain)
+        if not jalankan_berkas:
+            return True, "Data berhasil dihapus! Folder dokumen sedang dihapus di latar belakang."
+        pesan = _hasil_jurnal("Data dihapus", jurnal.jalankan(conn, LANGKAH_JURNAL, ids))
+        return True, pesan or "Data dan folder dokumen terkait berhasil dihapus!"
     except Exception as e:
         return False, f"Gagal menghapus data: {e}"
         
+# --- FUNGSI BARU (TEMPAT SAMPAH) ---
+# Jumlah id per pernyataan IN (...) (batas parameter SQLite lama = 999)
+UKURAN_POTONGAN_ID = 500
+
+def _potong_id(ids):
+    ids = list(dict.fromkeys(int(i) for i in ids))
+    return [ids[i:i + UKURAN_POTONGAN_ID] for i in range(0, len(ids), UKURAN_POTONGAN_ID)]
+
+def _tandai_sampah(ids, nilai, kondisi):
+    """UPDATE dihapus_pada untuk semua `ids` dalam SATU transaksi; mengembalikan jumlah baris."""
+    conn = get_connection()
+    jumlah = 0
+    with conn:
+        for potongan in _potong_id(ids):
+            cursor = conn.execute(
+                f"UPDATE {NAMA_TABEL} SET dihapus_pada = {nilai} "
+                f"WHERE id IN ({', '.join(['?'] * len(potongan))}) AND dihapus_pada IS {kondisi}",
+                potongan
+            )
+            jumlah += cursor.rowcount
+    return jumlah
+
+def pindahkan_ke_sampah(ids):
+    """
+    Memindahkan data ke Tempat Sampah (soft delete). Hanya menandai kolom
+    dihapus_pada dalam satu transaksi, jadi langsung selesai berapa pun
+    jumlah data dan ukuran folder dokumennya; folder tetap ada sampai data
+    dihapus permanen (hapus_permanen / bersihkan_sampah).
+    Mengembalikan (True, jumlah_dipindahkan).
+    """
+    try:
+        return True, _tandai_sampah(ids, "datetime('now', 'localtime')", "NULL")
+    except Exception as e:
+        return False, f"Gagal memindahkan data ke Tempat Sampah: {e}"
+
+def pulihkan_dari_sampah(ids):
+    """Mengembalikan data dari Tempat Sampah ke daftar. Mengembalikan (True, jumlah_dipulihkan)."""
+    try:
+        return True, _tandai_sampah(ids, "NULL", "NOT NULL")
+    except Exception as e:
+        return False, f"Gagal memulihkan data: {e}"
+
+def load_sampah(search_term="", limit=1000):
+    """
+    Data di Tempat Sampah, yang terakhir dihapus lebih dulu; bisa dicari
+    seperti daftar utama. Mengembalikan (True, (total, rows)); setiap baris
+    berisi id, nama, nik, no_kk, status, dihapus_pada.
+    """
+    try:
+        cursor = get_connection().cursor()
+        sumber, params, _ = _buat_filter_pencarian(cursor, search_term, sampah=True)
+        cursor.execute(f"SELECT COUNT(*){sumber}", params)
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT p.id, p.nama, p.nik, p.no_kk, p.status, p.dihapus_pada{sumber} "
+            f"ORDER BY p.dihapus_pada DESC, p.id DESC LIMIT ?", params + [limit]
+        )
+        return True, (total, cursor.fetchall())
+    except Exception as e:
+        return False, f"Gagal memuat Tempat Sampah: {e}"
+
+def hapus_permanen(ids, jalankan_berkas=True):
+    """
+    Menghapus permanen data yang ada di Tempat Sampah (id data aktif
+    diabaikan). DELETE dan langkah hapus folder NIK dicatat di jurnal dalam
+    satu transaksi; jalankan_berkas=False menyerahkan penghapusan folder ke
+    pemanggil (jalankan_jurnal() di thread latar belakang).
+    Mengembalikan (True, daftar_nik_yang_dihapus).
+    """
+    try:
+        conn = get_connection()
+        with conn:
+            # Dikunci sejak SELECT agar data tidak dipulihkan sebelum terhapus
+            conn.execute("BEGIN IMMEDIATE")
+            baris = []
+            for potongan in _potong_id(ids):
+                placeholders = ', '.join(['?'] * len(potongan))
+                baris += conn.execute(
+                    f"SELECT id, nik FROM {NAMA_TABEL} WHERE id IN ({placeholders}) AND dihapus_pada IS NOT NULL",
+                    potongan
+                ).fetchall()
+                conn.execute(
+                    f"DELETE FROM {NAMA_TABEL} WHERE id IN ({placeholders}) AND dihapus_pada IS NOT NULL", potongan
+                )
+            ids_jurnal = jurnal.catat(
+                conn, [('hapus_folder', row['nik'], {}) for row in baris if doc_manager.nik_valid(row['nik'])]
+            )
+
+        if jalankan_berkas:
+            # Langkah yang gagal tetap di jurnal dan diulang saat aplikasi dibuka lagi
+            jurnal.jalankan(conn, LANGKAH_JURNAL, ids_jurnal)
+        return True, [row['nik'] for row in baris]
+    except Exception as e:
+        return False, f"Gagal menghapus permanen: {e}"
+
+def bersihkan_sampah(retensi_hari=RETENSI_SAMPAH_HARI, batas=UKURAN_BATCH_PEMBERSIH):
+    """
+    Satu batch pembersih Tempat Sampah: menghapus permanen paling banyak
+    `batas` data yang sudah lebih dari `retensi_hari` hari di sampah,
+    beserta folder dokumennya. Sengaja per batch kecil; pemanggil
+    (PurgeWorker, server, cli) memberi jeda di antara batch agar penulis
+    lain dan disk tidak tersendat. Mengembalikan (True, (jumlah_dihapus,
+    masih_ada)).
+    """
+    try:
+        rows = get_connection().execute(
+            f"SELECT id FROM {NAMA_TABEL} WHERE dihapus_pada IS NOT NULL "
+            f"AND dihapus_pada <= datetime('now', 'localtime', ?) ORDER BY dihapus_pada LIMIT ?",
+            (f"-{retensi_hari} days", batas)
+        ).fetchall()
+        if not rows:
+            return True, (0, False)
+        success, niks = hapus_permanen([row[0] for row in rows])
+        if not success:
+            return False, niks
+        return True, (len(niks), len(rows) == batas)
+    except Exception as e:
+        return False, f"Gagal membersihkan Tempat Sampah: {e}"
+
+def get_data_by_nik(nik):
+    """Mengambil satu baris data lengkap berdasarkan NIK."""
+    try:
+        cursor = get_connection().execute(f"SELECT * FROM {NAMA_TABEL} WHERE nik = ?", (nik,))
+        data = cursor.fetchone()
+        if data:
+            return True, data
+        return False, "Data tidak ditemukan."
+    except Exception as e:
+        return False, f"Error saat mengambil data by NIK: {e}"
+
+def get_data_version():
+    """
+    Nilai PRAGMA data_version koneksi thread ini. Berubah setiap kali
+    koneksi LAIN (thread lain atau workstation lain) meng-commit perubahan.
+    """
+    return get_connection().execute("PRAGMA data_version").fetchone()[0]
+
 def get_data_by_id(id_to_fetch):
     """Mengambil satu baris data lengkap berdasarkan ID untuk diedit."""
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        cursor = get_connection().cursor()
         cursor.execute(f"SELECT * FROM {NAMA_TABEL} WHERE id = ?", (id_to_fetch,))
         data = cursor.fetchone()
-        conn.close()
         
         if data:
             return True, data
@@ -216,38 +1375,352 @@ def get_data_by_id(id_to_fetch):
     except Exception as e:
         return False, f"Error saat mengambil data by ID: {e}"
 
+def _buat_ekspresi_fts(search_term):
+    """
+    Mengubah teks pencarian menjadi ekspresi MATCH FTS5 dengan pencocokan
+    awalan untuk setiap kata, misalnya 'budi 7101' -> '"budi"* "7101"*'.
+    """
+    kata = re.findall(r"\w+", search_term)
+    return " ".join(f'"{k}"*' for k in kata)
+
+def _buat_kondisi_filter(filters):
+    """
+    Mengubah dict filter {kolom: nilai | list_nilai} menjadi daftar kondisi
+    SQL dan parameternya. Nilai tunggal memakai '=', list memakai IN.
+    Nilai '' juga mencocokkan NULL (sama seperti cache jumlah facet).
+    """
+    kondisi, params = [], []
+    for kolom, nilai in (filters or {}).items():
+        if kolom not in KOLOM_DB:
+            raise ValueError(f"Kolom filter tidak dikenal: {kolom}")
+        if isinstance(nilai, (list, tuple, set, frozenset)):
+            nilai = list(nilai)
+            if not nilai:
+                kondisi.append("0")  # Filter kosong: tidak ada yang cocok
+                continue
+            kondisi.append(f"COALESCE(p.{kolom}, '') IN ({', '.join(['?'] * len(nilai))})"
+                           if '' in nilai else f"p.{kolom} IN ({', '.join(['?'] * len(nilai))})")
+            params.extend(nilai)
+        elif nilai is None:
+            kondisi.append(f"p.{kolom} IS NULL")
+        elif nilai == '':
+            kondisi.append(f"(p.{kolom} IS NULL OR p.{kolom} = '')")
+        else:
+            kondisi.append(f"p.{kolom} = ?")
+            params.append(nilai)
+    return kondisi, params
+
+def _buat_filter_pencarian(cursor, search_term, filters=None, after_id=None, sampah=False):
+    """
+    Membangun klausa FROM/WHERE, parameter, dan ORDER BY untuk pencarian.
+    Dengan FTS5, hasil diurutkan berdasarkan relevansi (bm25); tanpa FTS5
+    kembali ke filter NAMA atau NIK dengan LIKE. `filters` ditambahkan
+    dengan AND; after_id membatasi ke id yang lebih kecil (keyset, lihat
+    load_page). Hanya data aktif, atau hanya data di Tempat Sampah jika
+    sampah=True.
+    """
+    sumber = f" FROM {NAMA_TABEL} AS p"
+    urutan = " ORDER BY p.id DESC"
+    kondisi = ["p.dihapus_pada IS NOT NULL" if sampah else "p.dihapus_pada IS NULL"]
+    params = []
+
+    if search_term:
+        ekspresi = _buat_ekspresi_fts(search_term)
+        if ekspresi and _cek_fts(cursor):
+            sumber = f" FROM {NAMA_TABEL_FTS} JOIN {NAMA_TABEL} AS p ON p.id = {NAMA_TABEL_FTS}.rowid"
+            kondisi.append(f"{NAMA_TABEL_FTS} MATCH ?")
+            params.append(ekspresi)
+            urutan = f" ORDER BY {NAMA_TABEL_FTS}.rank, p.id DESC"
+        else:
+            pola = f"%{search_term}%"
+            kondisi.append("(p.nama LIKE ? OR p.nik LIKE ?)")
+            params.extend([pola, pola])
+
+    kondisi_filter, params_filter = _buat_kondisi_filter(filters)
+    kondisi.extend(kondisi_filter)
+    params.extend(params_filter)
+
+    if after_id is not None:
+        kondisi.append("p.id < ?")
+        params.append(after_id)
+
+    sumber += " WHERE " + " AND ".join(kondisi)
+    return sumber, params, urutan
+
+def _kolom_proyeksi(columns):
+    """Validasi daftar kolom; 'id' selalu ada di posisi pertama."""
+    columns = list(columns) if columns else list(KOLOM_DAFTAR)
+    kolom_tidak_dikenal = [kol for kol in columns if kol not in KOLOM_DB]
+    if kolom_tidak_dikenal:
+        raise ValueError(f"Kolom tidak dikenal: {', '.join(kolom_tidak_dikenal)}")
+    if 'id' in columns:
+        columns.remove('id')
+    return ['id'] + columns
+
+def get_headers(columns=None):
+    """Membuat header yang 'cantik' dari KOLOM_DB (atau kolom yang diberikan)."""
+    return [kol.replace("_", " ").title() for kol in (columns or KOLOM_DB)]
+
 # --- FUNGSI DIPERBARUI ---
 def load_data(search_term=""):
     """
     Mengambil semua data dari database untuk ditampilkan di tabel.
-    Jika search_term diberikan, filter berdasarkan NAMA atau NIK.
+    Jika search_term diberikan, filter lewat indeks FTS5 (nama, NIK,
+    alamat, pekerjaan, keterangan, catatan) dan urutkan menurut relevansi.
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row 
-        cursor = conn.cursor()
+        cursor = get_connection().cursor()
         
-        # Siapkan parameter dan kueri dasar
-        params = []
         # Ambil kolom dari config
-        kolom_str = ', '.join(KOLOM_DB)
-        query = f"SELECT {kolom_str} FROM {NAMA_TABEL}"
+        kolom_str = ', '.join(f"p.{kol}" for kol in KOLOM_DB)
         
-        # Tambahkan filter WHERE jika ada search_term
-        if search_term:
-            query += " WHERE nama LIKE ? OR nik LIKE ?"
-            params.append(f"%{search_term}%")
-            params.append(f"%{search_term}%")
-            
-        query += " ORDER BY id DESC"
+        # Tambahkan filter pencarian jika ada search_term
+        sumber, params, urutan = _buat_filter_pencarian(cursor, search_term)
+        query = f"SELECT {kolom_str}{sumber}{urutan}"
         
         cursor.execute(query, params) # Gunakan params untuk kueri aman
         data = cursor.fetchall() 
-        conn.close()
         
-        # Membuat header yang 'cantik'
-        headers = [kol.replace("_", " ").title() for kol in KOLOM_DB]
-        
-        return True, data, headers
+        return True, data, get_headers()
+    except Exception as e:
+        return False, f"Gagal memuat data: {e}", []
+
+# --- FUNGSI BARU (TABEL VIRTUAL) ---
+@contextmanager
+def _pembatalan(cancel_check):
+    """
+    Memberikan koneksi thread ini dengan progress handler terpasang agar
+    kueri yang sedang berjalan bisa dihentikan (sqlite3.OperationalError
+    'interrupted') saat cancel_check() mengembalikan True. Handler dilepas
+    lagi setelahnya karena koneksi dipakai ulang.
+    """
+    conn = get_connection()
+    if cancel_check is None:
+        yield conn
+        return
+    conn.set_progress_handler(lambda: 1 if cancel_check() else 0, 1000)
+    try:
+        yield conn
+    finally:
+        conn.set_progress_handler(None, 0)
+
+def count_data(search_term="", cancel_check=None, filters=None, after_id=None):
+    """
+    Menghitung jumlah baris yang cocok dengan search_term dan filters
+    (dengan after_id: hanya baris ber-id lebih kecil, lihat load_page).
+    """
+    try:
+        with _pembatalan(cancel_check) as conn:
+            cursor = conn.cursor()
+            sumber, params, _ = _buat_filter_pencarian(cursor, search_term, filters, after_id)
+            cursor.execute(f"SELECT COUNT(*){sumber}", params)
+            total = cursor.fetchone()[0]
+        return True, total
+    except Exception as e:
+        return False, f"Gagal menghitung data: {e}"
+
+def load_data_page(search_term="", offset=0, limit=200, cancel_check=None,
+                   columns=None, filters=None):
+    """
+    Mengambil satu 'jendela' data (LIMIT/OFFSET) dengan urutan yang sama
+    seperti load_data (relevansi jika ada pencarian). Dipakai model tabel
+    untuk hasil pencarian; daftar biasa memakai load_page (keyset).
+    `columns` default KOLOM_DAFTAR (kolom 'id' selalu di posisi pertama).
+    """
+    try:
+        with _pembatalan(cancel_check) as conn:
+            cursor = conn.cursor()
+            kolom_str = ', '.join(f"p.{kol}" for kol in _kolom_proyeksi(columns))
+            sumber, params, urutan = _buat_filter_pencarian(cursor, search_term, filters)
+            query = f"SELECT {kolom_str}{sumber}{urutan} LIMIT ? OFFSET ?"
+            cursor.execute(query, params + [limit, offset])
+            data = cursor.fetchall()
+        return True, data
     except Exception as e:
-        return False, f"Gagal memuat data: {e}", []
\ No newline at end of file
+        return False, f"Gagal memuat halaman data: {e}"
+
+def load_page(after_id=None, limit=200, search_term="", filters=None, columns=None,
+              cancel_check=None):
+    """
+    Mengambil satu halaman data dengan keyset pagination pada primary key:
+    baris diurutkan menurut id menurun dan dimulai setelah `after_id`
+    (None = halaman pertama). Berbeda dengan OFFSET, biaya kueri tetap
+    sama di halaman mana pun.
+
+    `columns` default KOLOM_DAFTAR, tanpa alamat/catatan/password; minta
+    secara eksplisit jika dibutuhkan, atau ambil baris lengkap dengan
+    get_data_by_id saat baris dibuka. `filters` lihat _buat_kondisi_filter.
+    Halaman berikutnya: load_page(after_id=rows[-1]['id'], ...).
+    """
+    try:
+        with _pembatalan(cancel_check) as conn:
+            cursor = conn.cursor()
+            kolom_str = ', '.join(f"p.{kol}" for kol in _kolom_proyeksi(columns))
+            sumber, params, _ = _buat_filter_pencarian(cursor, search_term, filters, after_id)
+            # Selalu urut id (bukan relevansi) agar halaman berikutnya konsisten
+            cursor.execute(f"SELECT {kolom_str}{sumber} ORDER BY p.id DESC LIMIT ?", params + [limit])
+            data = cursor.fetchall()
+        return True, data
+    except Exception as e:
+        return False, f"Gagal memuat halaman data: {e}"
+
+# --- FUNGSI BARU (TAMPILAN PER KARTU KELUARGA) ---
+def _filter_keluarga(cursor, search_term, filters):
+    """
+    Kondisi tambahan: hanya anggota aktif (bukan di Tempat Sampah), dan
+    hanya keluarga yang punya anggota cocok dengan pencarian/filter.
+    """
+    if not search_term and not filters:
+        return " AND g.dihapus_pada IS NULL", []
+    sumber, params, _ = _buat_filter_pencarian(cursor, search_term, filters)
+    return f" AND g.dihapus_pada IS NULL AND g.no_kk IN (SELECT p.no_kk{sumber})", params
+
+def count_keluarga(search_term="", filters=None):
+    """
+    Mengembalikan (True, (jumlah_keluarga, jumlah_tanpa_kk)): jumlah No KK
+    berbeda yang cocok, dan jumlah pendaftar cocok yang No KK-nya kosong.
+    """
+    try:
+        cursor = get_connection().cursor()
+        tambahan, params = _filter_keluarga(cursor, search_term, filters)
+        cursor.execute(
+            f"SELECT COUNT(DISTINCT g.no_kk) FROM {NAMA_TABEL} AS g WHERE g.no_kk > ''{tambahan}", params
+        )
+        jumlah_keluarga = cursor.fetchone()[0]
+        success, tanpa_kk = count_data(search_term, filters=dict(filters or {}, no_kk=''))
+        if not success:
+            return False, tanpa_kk
+        return True, (jumlah_keluarga, tanpa_kk)
+    except Exception as e:
+        return False, f"Gagal menghitung keluarga: {e}"
+
+def load_keluarga_page(after_kk="", limit=200, search_term="", filters=None):
+    """
+    Mengambil satu halaman keluarga (urut No KK) dengan keyset pagination
+    pada No KK. Setiap baris: no_kk, jumlah (anggota), kepala (nama Kepala
+    Keluarga, atau nama pertama), daftar_status (status anggota dipisah
+    karakter \x1f). Memanfaatkan indeks no_kk sehingga GROUP BY berhenti
+    setelah `limit` keluarga. Anggota diambil terpisah saat node dibuka
+    (load_page dengan filters={'no_kk': ...}).
+    """
+    try:
+        cursor = get_connection().cursor()
+        tambahan, params = _filter_keluarga(cursor, search_term, filters)
+        cursor.execute(f"""
+        SELECT g.no_kk, COUNT(*) AS jumlah,
+               COALESCE(MAX(CASE WHEN g.status_hubungan = 'Kepala Keluarga' THEN g.nama END),
+                        MIN(g.nama)) AS kepala,
+               GROUP_CONCAT(COALESCE(g.status, ''), char(31)) AS daftar_status
+        FROM {NAMA_TABEL} AS g
+        WHERE g.no_kk > ?{tambahan}
+        GROUP BY g.no_kk ORDER BY g.no_kk LIMIT ?
+        """, [after_kk or ""] + params + [limit])
+        return True, cursor.fetchall()
+    except Exception as e:
+        return False, f"Gagal memuat daftar keluarga: {e}"
+
+# --- FUNGSI BARU (EKSPOR STREAMING) ---
+def iter_data(search_term="", columns=None, batch_size=1000, cancel_check=None, filters=None):
+    """
+    Generator yang mengalirkan baris hasil pencarian per batch (fetchmany),
+    sehingga memori tetap datar berapa pun ukuran tabel. `columns` adalah
+    subset KOLOM_DB (default semua). Melempar sqlite3.OperationalError
+    ('interrupted') jika cancel_check() mengembalikan True di tengah kueri.
+    """
+    columns = columns or KOLOM_DB
+    kolom_tidak_dikenal = [kol for kol in columns if kol not in KOLOM_DB]
+    if kolom_tidak_dikenal:
+        raise ValueError(f"Kolom tidak dikenal: {', '.join(kolom_tidak_dikenal)}")
+
+    with _pembatalan(cancel_check) as conn:
+        cursor = conn.cursor()
+        kolom_str = ', '.join(f"p.{kol}" for kol in columns)
+        sumber, params, urutan = _buat_filter_pencarian(cursor, search_term, filters)
+        cursor.execute(f"SELECT {kolom_str}{sumber}{urutan}", params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+# --- FUNGSI BARU (PEMELIHARAAN DATABASE) ---
+def periksa_integritas(lengkap=True):
+    """
+    Memeriksa kesehatan database: PRAGMA integrity_check (quick_check jika
+    lengkap=False), foreign_key_check, kesesuaian indeks FTS5 dengan tabel
+    pendaftaran, dan cache jumlah facet dibanding GROUP BY sebenarnya.
+    Mengembalikan (True, daftar_masalah) - daftar kosong berarti sehat.
+    """
+    try:
+        conn = get_connection()
+        masalah = []
+        pragma = "integrity_check" if lengkap else "quick_check"
+        hasil = [row[0] for row in conn.execute(f"PRAGMA {pragma}")]
+        if hasil != ["ok"]:
+            masalah.extend(f"{pragma}: {baris}" for baris in hasil)
+        for row in conn.execute("PRAGMA foreign_key_check"):
+            masalah.append(f"foreign_key_check: tabel {row[0]} baris {row[1]} merujuk {row[2]}")
+
+        if _cek_fts(conn.cursor()):
+            try:
+                with conn:
+                    conn.execute(
+                        f"INSERT INTO {NAMA_TABEL_FTS}({NAMA_TABEL_FTS}, rank) VALUES ('integrity-check', 1)"
+                    )
+            except sqlite3.DatabaseError as e:
+                masalah.append(f"Indeks pencarian tidak sesuai dengan data ({e}). Jalankan reindex.")
+
+        for kolom in KOLOM_FACET:
+            sebenarnya = dict(conn.execute(
+                f"SELECT COALESCE({kolom}, ''), COUNT(*) FROM {NAMA_TABEL} WHERE dihapus_pada IS NULL GROUP BY 1"
+            ).fetchall())
+            tercatat = dict(conn.execute(
+                f"SELECT nilai, jumlah FROM {NAMA_TABEL_AGREGAT} WHERE kolom = ? AND jumlah != 0", (kolom,)
+            ).fetchall())
+            for nilai in sorted(set(sebenarnya) | set(tercatat)):
+                if sebenarnya.get(nilai, 0) != tercatat.get(nilai, 0):
+                    masalah.append(
+                        f"Jumlah {kolom} '{nilai}': tercatat {tercatat.get(nilai, 0)}, "
+                        f"sebenarnya {sebenarnya.get(nilai, 0)}. Jalankan reindex."
+                    )
+        return True, masalah
+    except Exception as e:
+        return False, f"Gagal memeriksa integritas database: {e}"
+
+def _ukuran_file_db():
+    return sum(
+        os.path.getsize(path) for path in (DB_NAME, f"{DB_NAME}-wal") if os.path.exists(path)
+    )
+
+def optimasi_database(vacuum=True, analyze=True):
+    """
+    ANALYZE (statistik untuk query planner) dan/atau VACUUM (memadatkan file
+    setelah banyak penghapusan), lalu checkpoint WAL. VACUUM menulis ulang
+    seluruh file dan mengunci database selama berjalan.
+    Mengembalikan (True, {'ukuran_sebelum', 'ukuran_sesudah'}) dalam byte.
+    """
+    try:
+        conn = get_connection()
+        conn.commit()
+        laporan = {'ukuran_sebelum': _ukuran_file_db()}
+        if analyze:
+            conn.execute("ANALYZE")
+            conn.commit()
+        if vacuum:
+            conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        laporan['ukuran_sesudah'] = _ukuran_file_db()
+        return True, laporan
+    except Exception as e:
+        return False, f"Gagal mengoptimasi database: {e}"
+
+# --- INSTRUMENTASI ---
+# Semua fungsi publik di atas diukur per operasi (histogram dan status
+# gagal, lihat instrumentasi.py). Pengelola koneksi dan get_headers tidak
+# menyentuh DB sehingga tidak perlu diukur.
+instrumentasi.bungkus_modul(
+    globals(), kecuali={'get_connection', 'close_connections', 'tutup_koneksi_thread', 'get_headers'}
+)
@@ -11,8 +11,13 @@ from PyQt6.QtWidgets import (
     QListWidget, QListWidgetItem, QScrollArea, QCheckBox 
 )
 # --- Impor diperbarui ---
-from PyQt6.QtCore import pyqtSignal, Qt, pyqtSlot
+from PyQt6.QtCore import pyqtSignal, Qt, pyqtSlot, QSize, QThreadPool
+from PyQt6.QtGui import QIcon, QImage, QPixmap
 import db_manager
+from repository import repo
+import doc_manager
+import thumbnail_cache
+from workers import MirrorWorker, ThumbnailLoader
 from config import BASE_DOC_FOLDER
 
 class DetailWidget(QScrollArea):
@@ -29,6 +34,10 @@ class DetailWidget(QScrollArea):
         self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
 
         self.current_doc_folder = None
+        self.current_id = None
+        self.file_items = {}  # path dokumen -> QListWidgetItem (untuk thumbnail)
+        self.thumbnail_loader = ThumbnailLoader(self)
+        self.thumbnail_loader.thumbnail_ready.connect(self.on_thumbnail_ready)
         self.init_ui()
 
     def init_ui(self):
@@ -129,9 +138,13 @@ class DetailWidget(QScrollArea):
         group_akun.setLayout(layout_akun)
 
         # --- Grup 4: Dokumen ---
-        group_dokumen = QGroupBox("Dokumen Tersimpan")
+        self.group_dokumen = QGroupBox("Dokumen Tersimpan")
         layout_dokumen = QVBoxLayout()
         self.file_list_widget = QListWidget()
+        ukuran_ikon = thumbnail_cache.UKURAN_THUMBNAIL
+        self.file_list_widget.setIconSize(QSize(ukuran_ikon, ukuran_ikon))
+        self.file_list_widget.setToolTip("Klik dua kali untuk melihat pratinjau.")
+        self.file_list_widget.itemDoubleClicked.connect(self.on_preview_file)
         
         self.open_folder_btn = QPushButton("Buka Folder Dokumen")
         self.open_folder_btn.setStyleSheet("background-color: #5bc0de; color: white; padding: 6px; border-radius: 4px;")
@@ -139,7 +152,7 @@ class DetailWidget(QScrollArea):
         
         layout_dokumen.addWidget(self.open_folder_btn)
         layout_dokumen.addWidget(self.file_list_widget)
-        group_dokumen.setLayout(layout_dokumen)
+        self.group_dokumen.setLayout(layout_dokumen)
 
         # --- Tombol Aksi ---
         layout_tombol = QHBoxLayout()
@@ -153,7 +166,7 @@ class DetailWidget(QScrollArea):
         main_layout.addWidget(group_status)
         main_layout.addWidget(group_data_diri)
         main_layout.addWidget(group_akun)
-        main_layout.addWidget(group_dokumen)
+        main_layout.addWidget(self.group_dokumen)
         main_layout.addLayout(layout_tombol)
 
     # --- FUNGSI BARU ---
@@ -169,7 +182,7 @@ class DetailWidget(QScrollArea):
     def load_data(self, user_id):
         """Ambil data dari DB dan isi semua field."""
         
-        success, data_row = db_manager.get_data_by_id(user_id)
+        success, data_row = repo.get_by_id(user_id)
         if not success:
             QMessageBox.critical(self, "Error", f"Gagal memuat data: {data_row}")
             self.back_requested.emit() # Kembali jika gagal
@@ -203,24 +216,69 @@ class DetailWidget(QScrollArea):
         self.no_hp_display.setText(data_row['no_hp'] or "-")
 
         # Isi daftar file
+        self.current_id = user_id
         self.current_doc_folder = Path(BASE_DOC_FOLDER) / data_row['nik']
         self._populate_file_list()
 
     def _populate_file_list(self):
-        """Helper untuk mengisi list file."""
+        """Helper untuk mengisi list file (dari tabel dokumen, tanpa membaca folder)."""
         self.file_list_widget.clear()
-        if self.current_doc_folder and self.current_doc_folder.exists():
-            files = [f.name for f in self.current_doc_folder.iterdir() if f.is_file()]
-            if files:
-                self.file_list_widget.addItems(files)
-                self.open_folder_btn.setEnabled(True)
-            else:
-                self.file_list_widget.addItem("Tidak ada dokumen tersimpan.")
-                self.open_folder_btn.setEnabled(True) # Folder ada tapi kosong
+        self.file_items.clear()
+        self.thumbnail_loader.reset()
+        self.group_dokumen.setTitle("Dokumen Tersimpan")
+        success, dokumen = db_manager.get_dokumen(self.current_id)
+        if not success:
+            self.file_list_widget.addItem(dokumen)
+            self.open_folder_btn.setEnabled(False)
+            return
+        if dokumen:
+            for doc in dokumen:
+                item = QListWidgetItem(f"{doc['filename']}  ({doc_manager.format_ukuran(doc['ukuran'])})")
+                item.setToolTip(doc['mime'] or "")
+                path = str(self.current_doc_folder / doc['filename'])
+                item.setData(Qt.ItemDataRole.UserRole, (path, doc['hash'], doc['mtime']))
+                self.file_list_widget.addItem(item)
+                self.file_items[path] = item
+                self.thumbnail_loader.request(path, doc['hash'], doc['mtime'])
+            total = sum(doc['ukuran'] or 0 for doc in dokumen)
+            self.group_dokumen.setTitle(
+                f"Dokumen Tersimpan ({len(dokumen)} file, {doc_manager.format_ukuran(total)})"
+            )
+            self.open_folder_btn.setEnabled(True)
+            self._cermin_dokumen(dokumen)
+        elif self.current_doc_folder and self.current_doc_folder.exists():
+            self.file_list_widget.addItem("Tidak ada dokumen tersimpan.")
+            self.open_folder_btn.setEnabled(True) # Folder ada tapi kosong
         else:
             self.file_list_widget.addItem("Folder dokumen tidak ditemukan.")
             self.open_folder_btn.setEnabled(False) # Folder tidak ada
             
+    def _cermin_dokumen(self, dokumen):
+        """Mode server: unduh dokumen yang belum ada di folder lokal di thread lain."""
+        worker = MirrorWorker(self.current_doc_folder.name, dokumen)
+        worker.signals.finished.connect(self.on_mirror_finished)
+        QThreadPool.globalInstance().start(worker)
+
+    @pyqtSlot(str, int)
+    def on_mirror_finished(self, nik, jumlah):
+        # Ada dokumen yang baru diunduh: muat ulang daftar agar thumbnail-nya dibuat
+        if jumlah and self.current_doc_folder is not None and self.current_doc_folder.name == nik:
+            self._populate_file_list()
+
+    @pyqtSlot(str, int, QImage)
+    def on_thumbnail_ready(self, path, ukuran, image):
+        item = self.file_items.get(path)
+        if item is not None:
+            item.setIcon(QIcon(QPixmap.fromImage(image)))
+
+    def on_preview_file(self, item):
+        """Membuka pratinjau dokumen yang diklik dua kali."""
+        info = item.data(Qt.ItemDataRole.UserRole)
+        if info:
+            path, file_hash, mtime = info
+            from preview_dialog import PreviewDialog
+            PreviewDialog(path, file_hash, mtime, self).exec()
+
     def on_open_folder(self):
         """Membuka folder dokumen orang ini di file explorer."""
         if self.current_doc_folder and self.current_doc_folder.exists():
@@ -0,0 +1,156 @@
+# diagnostics_dialog.py
+# Berisi QDialog (non-modal) "Diagnostik": statistik waktu operasi database
+# dan pernyataan SQL (dari instrumentasi.statistik), kueri lambat terakhir,
+# statistik cache repository, dan laporan waktu startup.
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QTabWidget,
+    QTableWidget, QTableWidgetItem, QHeaderView, QPlainTextEdit
+)
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QFont
+
+import instrumentasi
+import startup_timing
+from repository import repo
+
+
+class DiagnosticsDialog(QDialog):
+    """Menampilkan statistik instrumentasi; diperbarui otomatis selama terbuka."""
+
+    REFRESH_MS = 2000
+
+    KOLOM = ["Nama", "Jumlah", "Gagal", "Rata-rata", "p50", "p95", "p99", "Maks", "Sebaran"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnostik")
+        self.setMinimumSize(900, 500)
+        self.setModal(False)
+
+        self.init_ui()
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(self.REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.summary_label = QLabel()
+        self.tabs = QTabWidget()
+        self.operasi_table = self._buat_tabel()
+        self.sql_table = self._buat_tabel()
+        self.lambat_text = self._buat_teks()
+        self.lainnya_text = self._buat_teks()
+        self.tabs.addTab(self.operasi_table, "Operasi")
+        self.tabs.addTab(self.sql_table, "SQL")
+        self.tabs.addTab(self.lambat_text, "Kueri Lambat")
+        self.tabs.addTab(self.lainnya_text, "Cache && Startup")
+
+        tombol_layout = QHBoxLayout()
+        self.reset_btn = QPushButton("Reset Statistik")
+        self.reset_btn.clicked.connect(self.on_reset)
+        self.refresh_btn = QPushButton("Muat Ulang")
+        self.refresh_btn.clicked.connect(self.refresh)
+        self.close_btn = QPushButton("Tutup")
+        self.close_btn.clicked.connect(self.hide)
+        tombol_layout.addWidget(self.reset_btn)
+        tombol_layout.addStretch()
+        tombol_layout.addWidget(self.refresh_btn)
+        tombol_layout.addWidget(self.close_btn)
+
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.tabs)
+        layout.addLayout(tombol_layout)
+
+    def _buat_tabel(self):
+        table = QTableWidget(0, len(self.KOLOM))
+        table.setHorizontalHeaderLabels(self.KOLOM)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeaderItem(len(self.KOLOM) - 1).setToolTip(
+            "Sebaran latensi: "
+            + " | ".join(f"<={b} ms" for b in instrumentasi.BATAS_KOTAK_MS) + " | lebih lambat"
+        )
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        return table
+
+    @staticmethod
+    def _buat_teks():
+        text = QPlainTextEdit()
+        text.setReadOnly(True)
+        text.setFont(QFont("Monospace"))
+        text.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        return text
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        operasi = instrumentasi.statistik.ringkasan('operasi')
+        self._isi_tabel(self.operasi_table, operasi)
+        self._isi_tabel(self.sql_table, instrumentasi.statistik.ringkasan('sql'))
+
+        log = instrumentasi.log_lambat
+        entri = [instrumentasi.format_entri(e) for e in reversed(log.terakhir)]
+        self.lambat_text.setPlainText(
+            f"Batas: {log.batas_ms} ms - log lengkap: {log.path}\n\n"
+            + ("\n\n".join(entri) if entri else "Belum ada kueri lambat.")
+        )
+
+        cache = repo.stats()
+        self.lainnya_text.setPlainText(
+            "Cache record (repository)\n"
+            f"  Hit      : {cache['hits']} ({cache['rasio_hit']:.0%})\n"
+            f"  Miss     : {cache['misses']}\n"
+            f"  Ukuran   : {cache['ukuran']} / {cache['kapasitas']}\n"
+            f"  Invalidasi: {cache['invalidasi']}\n\n"
+            "Waktu startup\n" + startup_timing.laporan()
+        )
+
+        jumlah = sum(r['jumlah'] for r in operasi.values())
+        gagal = sum(r['gagal'] for r in operasi.values())
+        self.summary_label.setText(
+            f"{jumlah} operasi database tercatat, {gagal} gagal, "
+            f"{len(log.terakhir)} kueri lambat (>= {log.batas_ms} ms)."
+        )
+
+    def _isi_tabel(self, table, ringkasan):
+        table.setRowCount(len(ringkasan))
+        for row, (nama, r) in enumerate(ringkasan.items()):
+            nilai = [
+                nama, str(r['jumlah']), str(r['gagal']),
+                f"{r['rata_rata_ms']:.2f} ms", f"{r['p50_ms']:.2f} ms", f"{r['p95_ms']:.2f} ms",
+                f"{r['p99_ms']:.2f} ms", f"{r['maks_ms']:.2f} ms", self._sebaran(r['kotak']),
+            ]
+            for col, teks in enumerate(nilai):
+                item = QTableWidgetItem(teks)
+                if col == 0:
+                    item.setToolTip(nama)
+                else:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                table.setItem(row, col, item)
+
+    @staticmethod
+    def _sebaran(kotak):
+        """Histogram mini: satu karakter per kotak latensi (<=1 ms ... >5 s)."""
+        tingkat = " .:-=+*#"
+        puncak = max(kotak) or 1
+        return "".join(
+            tingkat[min(len(tingkat) - 1, -(-n * (len(tingkat) - 1) // puncak))] for n in kotak
+        )
+
+    def on_reset(self):
+        instrumentasi.statistik.reset()
+        self.refresh()
@@ -0,0 +1,507 @@
+# doc_manager.py
+# Logika penyimpanan dokumen pendaftar di BASE_DOC_FOLDER.
+#
+# Isi file disimpan sekali saja di penyimpanan blob (BLOB_FOLDER, nama file
+# = hash SHA-256). File di BASE_DOC_FOLDER/<nik>/ adalah hardlink ke blob,
+# sehingga scan KK yang sama untuk seluruh anggota keluarga hanya memakan
+# tempat sekali. Jumlah referensi blob = st_nlink - 1; blob dihapus saat
+# referensi terakhirnya hilang. Setiap folder NIK punya '.manifest.json'
+# (nama_file -> hash) agar blob terkait bisa ditemukan tanpa membaca ulang.
+# Karena semua rujukan berbagi isi yang sama, blob (dan dengan begitu setiap
+# dokumen yang ditautkan) dibuat read-only: mengedit dokumen di tempat akan
+# mengubah dokumen semua pendaftar yang berbagi blob dan merusak hash-nya.
+# Dokumen diganti dengan menyimpan file baru, bukan mengedit yang lama.
+#
+# File disalin ke nama sementara lalu di-rename secara atomik, memakai
+# reflink / copy_file_range jika didukung filesystem. Modul ini sengaja
+# tidak mengimpor PyQt6 agar bisa dipakai dari thread mana pun.
+
+import errno
+import hashlib
+import json
+import os
+import re
+import shutil
+import stat
+import sys
+import threading
+import uuid
+from pathlib import Path
+
+from config import BASE_DOC_FOLDER, BLOB_FOLDER
+
+# Ukuran potongan salinan (juga granularitas progres dan pembatalan)
+UKURAN_POTONGAN = 4 * 1024 * 1024
+
+# ioctl FICLONE (Linux: btrfs, XFS, dll.) untuk reflink copy-on-write
+_FICLONE = 0x40049409
+
+NAMA_MANIFEST = ".manifest.json"
+
+# errno saat filesystem tidak mendukung hardlink (FAT32/exFAT, SMB, dll.)
+_ERRNO_TANPA_HARDLINK = (errno.EPERM, errno.EXDEV, errno.EMLINK, errno.EOPNOTSUPP, errno.ENOSYS)
+
+# NIK yang boleh menjadi nama folder dokumen: tepat 16 digit, sehingga
+# folder selalu berada langsung di dalam BASE_DOC_FOLDER ('..', pemisah
+# path, dan nama lain ditolak)
+_POLA_NIK_FOLDER = re.compile(r"[0-9]{16}")
+
+# Melindungi baca-ubah-tulis manifest dari beberapa pekerja sekaligus
+_kunci_manifest = threading.Lock()
+
+
+class SalinanDibatalkan(Exception):
+    """Dilempar saat penyalinan dibatalkan oleh pengguna."""
+
+
+def nik_valid(nik):
+    """True jika `nik` boleh dipakai sebagai nama folder dokumen (16 digit)."""
+    return isinstance(nik, str) and _POLA_NIK_FOLDER.fullmatch(nik) is not None
+
+
+def folder_dokumen(nik):
+    """Folder dokumen milik satu pendaftar. ValueError jika NIK bukan 16 digit."""
+    if not nik_valid(nik):
+        raise ValueError(f"NIK tidak valid untuk folder dokumen: {nik!r}")
+    return Path(BASE_DOC_FOLDER) / nik
+
+
+def rencana_salinan(nik, files_to_add, skip_existing=False):
+    """
+    Membuat daftar pasangan (sumber, tujuan) untuk file yang akan disalin
+    ke folder NIK. Jika skip_existing=True, file yang sudah ada dilewati
+    (perilaku update_data: hindari duplikat).
+    """
+    folder = folder_dokumen(nik)
+    rencana = []
+    for source_path_str in files_to_add:
+        source_path = Path(source_path_str)
+        dest_path = folder / source_path.name
+        if skip_existing and dest_path.exists():
+            continue
+        rencana.append((source_path, dest_path))
+    return rencana
+
+
+def _coba_reflink(src_fd, dst_fd):
+    """Mencoba clone copy-on-write (instan, tanpa menyalin data)."""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        import fcntl
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+        return True
+    except (ImportError, OSError):
+        return False
+
+
+def _salin_isi(src, dst, total, progress_cb, cancel_check):
+    """Menyalin isi file per potongan, memakai copy_file_range jika ada."""
+    disalin = 0
+    pakai_copy_file_range = hasattr(os, "copy_file_range")
+    while True:
+        if cancel_check is not None and cancel_check():
+            raise SalinanDibatalkan()
+
+        n = 0
+        if pakai_copy_file_range:
+            try:
+                n = os.copy_file_range(src.fileno(), dst.fileno(), UKURAN_POTONGAN)
+            except OSError:
+                # Filesystem tidak mendukung (mis. lintas perangkat di kernel lama)
+                pakai_copy_file_range = False
+                src.seek(disalin)
+                dst.seek(disalin)
+                continue
+        else:
+            potongan = src.read(UKURAN_POTONGAN)
+            if potongan:
+                dst.write(potongan)
+                n = len(potongan)
+
+        if n == 0:
+            break
+        disalin += n
+        if progress_cb is not None:
+            progress_cb(disalin, total)
+    return disalin
+
+
+def salin_file_atomik(source_path, dest_path, progress_cb=None, cancel_check=None):
+    """
+    Menyalin satu file ke dest_path lewat file sementara ('.<nama>.part')
+    di folder tujuan, lalu os.replace() sehingga file tujuan tidak pernah
+    terlihat setengah jadi. progress_cb(byte_disalin, total_byte).
+    Melempar SalinanDibatalkan atau OSError jika gagal.
+    """
+    source_path = Path(source_path)
+    dest_path = Path(dest_path)
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _path_sementara(dest_path)
+    total = source_path.stat().st_size
+
+    try:
+        with open(source_path, "rb") as src, open(tmp_path, "wb") as dst:
+            if not _coba_reflink(src.fileno(), dst.fileno()):
+                _salin_isi(src, dst, total, progress_cb, cancel_check)
+            dst.flush()
+            os.fsync(dst.fileno())
+        shutil.copystat(source_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+
+    if progress_cb is not None:
+        progress_cb(total, total)
+    return dest_path
+
+
+def _path_sementara(dest_path):
+    """Nama sementara unik ('.<nama>.<acak>.part') di folder yang sama."""
+    return dest_path.with_name(f".{dest_path.name}.{uuid.uuid4().hex[:8]}.part")
+
+
+# --- PENYIMPANAN BLOB (CONTENT-ADDRESSED) ---
+def folder_blob():
+    return Path(BASE_DOC_FOLDER) / BLOB_FOLDER
+
+
+def path_blob(hash_hex):
+    """Lokasi blob untuk satu hash (dibagi per 2 karakter awal)."""
+    return folder_blob() / hash_hex[:2] / hash_hex
+
+
+def hash_file(path, progress_cb=None, cancel_check=None):
+    """Menghitung SHA-256 isi file per potongan."""
+    h = hashlib.sha256()
+    total = Path(path).stat().st_size
+    dibaca = 0
+    with open(path, "rb") as f:
+        while True:
+            if cancel_check is not None and cancel_check():
+                raise SalinanDibatalkan()
+            potongan = f.read(UKURAN_POTONGAN)
+            if not potongan:
+                break
+            h.update(potongan)
+            dibaca += len(potongan)
+            if progress_cb is not None:
+                progress_cb(dibaca, total)
+    return h.hexdigest()
+
+
+def jumlah_referensi(hash_hex):
+    """Jumlah file di folder NIK yang menunjuk ke blob ini."""
+    try:
+        return path_blob(hash_hex).stat().st_nlink - 1
+    except FileNotFoundError:
+        return 0
+
+
+def _lindungi(blob):
+    """Menjadikan blob (dan semua hardlink-nya) read-only."""
+    try:
+        mode = stat.S_IMODE(os.stat(blob).st_mode)
+        if mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH):
+            os.chmod(blob, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+    except OSError:
+        pass  # Blob sudah terhapus, atau filesystem tanpa izin file
+
+
+def _buka_proteksi(func, path, _exc_info=None):
+    """
+    Windows menolak menghapus/menimpa file read-only: izin tulis dibuka
+    lalu operasinya diulang. Izin itu berlaku untuk semua hardlink blob yang
+    sama, jadi pemanggil memulihkannya lewat hapus_blob_tanpa_referensi().
+    Juga dipakai sebagai onerror shutil.rmtree.
+    """
+    if os.name != "nt" or not os.path.exists(path):
+        raise
+    os.chmod(path, stat.S_IWRITE)
+    func(path)
+
+
+def hapus_file(path):
+    """os.remove yang juga bisa menghapus dokumen read-only di Windows."""
+    try:
+        os.remove(path)
+    except PermissionError:
+        _buka_proteksi(os.remove, path)
+
+
+def ganti_file(src, dest_path):
+    """os.replace yang juga bisa menimpa dokumen read-only di Windows."""
+    try:
+        os.replace(src, dest_path)
+    except PermissionError:
+        _buka_proteksi(lambda path: os.replace(src, path), dest_path)
+
+
+def _tautkan(blob, dest_path):
+    """Membuat hardlink dest_path -> blob secara atomik (menimpa jika ada)."""
+    if dest_path.exists() and os.path.samefile(blob, dest_path):
+        return  # Sudah ditautkan; rename antar-hardlink yang sama tidak menghapus file sementara
+    tmp_path = _path_sementara(dest_path)
+    os.link(blob, tmp_path)
+    try:
+        ganti_file(tmp_path, dest_path)
+    except BaseException:
+        tmp_path.unlink()
+        raise
+
+
+def _baca_manifest(folder):
+    try:
+        with open(Path(folder) / NAMA_MANIFEST, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _tulis_manifest(folder, manifest):
+    path = Path(folder) / NAMA_MANIFEST
+    if not manifest:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        return
+    tmp_path = _path_sementara(path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _ubah_manifest(folder, ubah):
+    """Menjalankan ubah(manifest) di bawah kunci lalu menyimpannya."""
+    with _kunci_manifest:
+        manifest = _baca_manifest(folder)
+        ubah(manifest)
+        _tulis_manifest(folder, manifest)
+
+
+def hash_tercatat(folder):
+    """Peta nama_file -> hash SHA-256 dari manifest folder NIK."""
+    return _baca_manifest(folder)
+
+
+def hapus_blob_tanpa_referensi(hashes):
+    """
+    Menghapus blob yang sudah tidak dirujuk file mana pun (st_nlink == 1)
+    beserta subfolder .blobs/xx yang menjadi kosong. Blob yang masih
+    dirujuk dipastikan read-only lagi.
+    """
+    dihapus = 0
+    for hash_hex in set(hashes):
+        blob = path_blob(hash_hex)
+        try:
+            if blob.stat().st_nlink > 1:
+                _lindungi(blob)
+                continue
+            hapus_file(blob)
+            dihapus += 1
+        except FileNotFoundError:
+            continue
+        try:
+            blob.parent.rmdir()
+        except OSError:
+            pass  # Masih berisi blob lain
+    return dihapus
+
+
+def simpan_dokumen(source_path, dest_path, progress_cb=None, cancel_check=None):
+    """
+    Menyimpan satu dokumen ke folder NIK lewat penyimpanan blob:
+    1. hitung hash sumber,
+    2. jika blob belum ada, salin (atomik) ke penyimpanan blob,
+    3. buat hardlink dest_path -> blob dan catat di manifest folder.
+    Jika filesystem tidak mendukung hardlink (mis. FAT32/exFAT), file
+    disalin biasa ke dest_path tanpa deduplikasi.
+    progress_cb(byte, total) melaporkan hash (paruh pertama) dan salin
+    (paruh kedua).
+    """
+    source_path = Path(source_path)
+    dest_path = Path(dest_path)
+    total = source_path.stat().st_size
+    lapor = (lambda n, _: progress_cb(n, total * 2)) if progress_cb else None
+
+    hash_hex = hash_file(source_path, lapor, cancel_check)
+    blob = path_blob(hash_hex)
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        for percobaan in range(3):
+            try:
+                try:
+                    _tautkan(blob, dest_path)
+                except FileNotFoundError:
+                    # Blob belum ada (atau baru saja dihapus): salin sekali ke store
+                    salin_file_atomik(
+                        source_path, blob,
+                        (lambda n, _: progress_cb(total + n, total * 2)) if progress_cb else None,
+                        cancel_check,
+                    )
+                    _tautkan(blob, dest_path)
+                break
+            except FileNotFoundError:
+                # Blob atau subfoldernya dihapus thread lain di antaranya: ulangi
+                if percobaan == 2:
+                    raise
+        _lindungi(blob)
+    except OSError as e:
+        if e.errno not in _ERRNO_TANPA_HARDLINK:
+            raise
+        print(f"Hardlink tidak didukung, menyalin tanpa deduplikasi: {e}")
+        salin_file_atomik(source_path, dest_path, progress_cb, cancel_check)
+        hapus_blob_tanpa_referensi([hash_hex])
+        hash_hex = None
+
+    hash_lama = []
+
+    def catat(manifest):
+        hash_lama.append(manifest.pop(dest_path.name, None))
+        if hash_hex is not None:
+            manifest[dest_path.name] = hash_hex
+
+    _ubah_manifest(dest_path.parent, catat)
+    hapus_blob_tanpa_referensi([h for h in hash_lama + [hash_hex] if h])
+    if progress_cb is not None:
+        progress_cb(total * 2, total * 2)
+    return dest_path
+
+
+def hapus_dokumen(folder, filename):
+    """Menghapus satu dokumen dari folder NIK dan membebaskan blobnya jika perlu."""
+    folder = Path(folder)
+    file_path = folder / filename
+    hash_lama = []
+    _ubah_manifest(folder, lambda m: hash_lama.append(m.pop(filename, None)))
+    if file_path.exists():
+        hapus_file(file_path)
+    hapus_blob_tanpa_referensi([h for h in hash_lama if h])
+
+
+def hapus_folder(folder):
+    """
+    Menghapus folder NIK beserta isinya (pengganti shutil.rmtree), lalu
+    membebaskan blob yang referensi terakhirnya ada di folder ini.
+    """
+    folder = Path(folder)
+    if not folder.exists():
+        return
+    hashes = list(_baca_manifest(folder).values())
+    shutil.rmtree(folder, onerror=_buka_proteksi)
+    hapus_blob_tanpa_referensi(hashes)
+
+
+def salin_semua(rencana, progress_cb=None):
+    """
+    Menyimpan semua pasangan (sumber, tujuan) secara berurutan di thread
+    pemanggil. Dipakai jika tidak ada antrean latar belakang (mis. skrip).
+    Mengembalikan daftar (sumber, pesan_error) untuk file yang gagal.
+    """
+    gagal = []
+    for source_path, dest_path in rencana:
+        try:
+            simpan_dokumen(source_path, dest_path, progress_cb)
+        except Exception as e:
+            gagal.append((source_path, str(e)))
+    return gagal
+
+
+def format_ukuran(jumlah_byte):
+    """Ukuran file yang mudah dibaca, misal '1.2 MB'."""
+    if jumlah_byte is None:
+        return "-"
+    ukuran = float(jumlah_byte)
+    for satuan in ("B", "KB", "MB", "GB"):
+        if ukuran < 1024 or satuan == "GB":
+            return f"{ukuran:.0f} {satuan}" if satuan == "B" else f"{ukuran:.1f} {satuan}"
+        ukuran /= 1024
+
+
+def is_file_sementara(path):
+    """
+    True untuk file internal yang disembunyikan dari daftar dokumen:
+    file sementara yang sedang disalin dan manifest folder.
+    """
+    nama = Path(path).name
+    return nama == NAMA_MANIFEST or (nama.startswith(".") and nama.endswith(".part"))
+
+
+# --- MIGRASI: DEDUPLIKASI FOLDER LAMA ---
+def migrasi_dedup(progress_cb=None):
+    """
+    Mendeduplikasi pohon dokumen_npwp yang sudah ada secara in-place:
+    setiap file di folder NIK di-hash; file pertama dengan isi tertentu
+    dipindahkan menjadi blob (lewat hardlink, tanpa menyalin data), dan
+    salinan berikutnya diganti hardlink ke blob tersebut.
+
+    progress_cb(folder_selesai, total_folder) dipanggil per folder NIK.
+    Mengembalikan dict: file, duplikat, byte_dihemat, dilewati.
+    """
+    base = Path(BASE_DOC_FOLDER)
+    laporan = {"file": 0, "duplikat": 0, "byte_dihemat": 0, "dilewati": 0}
+    folder_nik = sorted(
+        p for p in base.iterdir() if p.is_dir() and p.name != BLOB_FOLDER
+    ) if base.exists() else []
+
+    for i, folder in enumerate(folder_nik, start=1):
+        manifest = _baca_manifest(folder)
+        for file_path in folder.iterdir():
+            if not file_path.is_file() or is_file_sementara(file_path):
+                continue
+            laporan["file"] += 1
+            hash_tercatat = manifest.get(file_path.name)
+            if hash_tercatat and path_blob(hash_tercatat).exists() \
+                    and os.path.samefile(file_path, path_blob(hash_tercatat)):
+                _lindungi(path_blob(hash_tercatat))  # Blob dari versi lama belum read-only
+                continue  # Sudah ditautkan ke blob
+
+            hash_hex = hash_file(file_path)
+            blob = path_blob(hash_hex)
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                if blob.exists():
+                    if not os.path.samefile(file_path, blob):
+                        ukuran = file_path.stat().st_size
+                        _tautkan(blob, file_path)
+                        laporan["duplikat"] += 1
+                        laporan["byte_dihemat"] += ukuran
+                else:
+                    os.link(file_path, blob)  # File ini menjadi blob
+                _lindungi(blob)
+            except OSError as e:
+                print(f"Lewati {file_path}: {e}")
+                laporan["dilewati"] += 1
+                continue
+            manifest[file_path.name] = hash_hex
+
+        with _kunci_manifest:
+            _tulis_manifest(folder, manifest)
+        if progress_cb is not None:
+            progress_cb(i, len(folder_nik))
+
+    return laporan
+
+
+if __name__ == "__main__":
+    # Alat migrasi: python doc_manager.py --migrasi-dedup
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Alat pemeliharaan folder dokumen NPWP.")
+    parser.add_argument("--migrasi-dedup", action="store_true",
+                        help=f"Deduplikasi isi folder '{BASE_DOC_FOLDER}' secara in-place.")
+    args = parser.parse_args()
+
+    if args.migrasi_dedup:
+        hasil = migrasi_dedup(lambda i, n: print(f"\r{i}/{n} folder", end="", flush=True))
+        print()
+        print(f"{hasil['file']} file diperiksa, {hasil['duplikat']} duplikat ditautkan, "
+              f"{hasil['byte_dihemat'] / (1024 * 1024):.1f} MB dihemat, {hasil['dilewati']} dilewati.")
+    else:
+        parser.print_help()
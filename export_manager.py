@@ -0,0 +1,217 @@
+# export_manager.py
+# Ekspor tabel pendaftaran ke CSV, JSONL, atau XLSX secara streaming.
+# Baris dialirkan dari db_manager.iter_data per batch dan langsung ditulis
+# ke file, jadi pemakaian memori tetap datar berapa pun jumlah datanya.
+# Modul ini sengaja tidak mengimpor PyQt6.
+
+import csv
+import json
+import os
+import re
+import sqlite3
+import zipfile
+from xml.sax.saxutils import escape
+
+import db_manager
+from config import KOLOM_DB
+
+FORMAT_EKSPOR = ('csv', 'jsonl', 'xlsx')
+
+# Batas baris satu worksheet Excel (termasuk baris header)
+MAKS_BARIS_XLSX = 1_048_576
+
+# Karakter kontrol yang tidak boleh ada di XML
+_KARAKTER_ILEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class EksporDibatalkan(Exception):
+    """Dilempar saat pengguna membatalkan ekspor."""
+
+
+def kolom_ekspor(include_password=False):
+    """Kolom yang diekspor: semua KOLOM_DB, password hanya jika diminta."""
+    return [kol for kol in KOLOM_DB if include_password or kol != 'password']
+
+
+# --- PENULIS PER FORMAT ---
+# CSV dan JSONL juga bisa menulis ke file yang sudah terbuka (mis. stdout
+# pada cli.py); file seperti itu tidak ditutup oleh penulis.
+class _PenulisCsv:
+    def __init__(self, path, columns, file=None):
+        # utf-8-sig agar Excel membaca huruf non-ASCII dengan benar
+        self.file = file or open(path, 'w', encoding='utf-8-sig', newline='')
+        self.milik_sendiri = file is None
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def tulis(self, rows):
+        self.writer.writerows(["" if v is None else v for v in row] for row in rows)
+
+    def tutup(self):
+        if self.milik_sendiri:
+            self.file.close()
+
+
+class _PenulisJsonl:
+    def __init__(self, path, columns, file=None):
+        self.file = file or open(path, 'w', encoding='utf-8')
+        self.milik_sendiri = file is None
+        self.columns = columns
+
+    def tulis(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(dict(zip(self.columns, row)), ensure_ascii=False))
+            self.file.write("\n")
+
+    def tutup(self):
+        if self.milik_sendiri:
+            self.file.close()
+
+
+class _PenulisXlsx:
+    """
+    Penulis XLSX minimal tanpa dependensi tambahan. Worksheet ditulis
+    langsung ke dalam arsip zip (inline string), tanpa menyimpan seluruh
+    sheet di memori seperti pustaka spreadsheet pada umumnya.
+    """
+
+    def __init__(self, path, columns):
+        self.zip = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED)
+        self._tulis_metadata()
+        self.sheet = self.zip.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True)
+        self.sheet.write(
+            b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            b'<sheetData>'
+        )
+        self.nomor_baris = 0
+        self._tulis_baris(columns)
+
+    def _tulis_metadata(self):
+        self.zip.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/worksheets/sheet1.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            '</Types>'
+        ))
+        self.zip.writestr('_rels/.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ))
+        self.zip.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            '<sheets><sheet name="Pendaftaran" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'
+        ))
+        self.zip.writestr('xl/_rels/workbook.xml.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            'Target="worksheets/sheet1.xml"/>'
+            '</Relationships>'
+        ))
+
+    def _tulis_baris(self, values):
+        self.nomor_baris += 1
+        if self.nomor_baris > MAKS_BARIS_XLSX:
+            raise ValueError("Jumlah baris melebihi batas satu worksheet Excel. Gunakan CSV atau JSONL.")
+        sel = []
+        for nilai in values:
+            if nilai is None or nilai == "":
+                sel.append('<c/>')
+                continue
+            teks = escape(_KARAKTER_ILEGAL_XML.sub("", str(nilai)))
+            # Semua nilai ditulis sebagai teks agar NIK 16 digit tidak berubah jadi angka
+            sel.append(f'<c t="inlineStr"><is><t xml:space="preserve">{teks}</t></is></c>')
+        self.sheet.write(f'<row r="{self.nomor_baris}">{"".join(sel)}</row>'.encode('utf-8'))
+
+    def tulis(self, rows):
+        for row in rows:
+            self._tulis_baris(row)
+
+    def tutup(self):
+        if self.sheet is not None:
+            self.sheet.write(b'</sheetData></worksheet>')
+            self.sheet.close()
+            self.sheet = None
+        self.zip.close()
+
+
+_PENULIS = {'csv': _PenulisCsv, 'jsonl': _PenulisJsonl, 'xlsx': _PenulisXlsx}
+
+# Format yang bisa dialirkan ke file terbuka (lihat penulis_stream)
+FORMAT_STREAM = ('csv', 'jsonl')
+
+
+def penulis_stream(file, fmt, columns):
+    """Penulis CSV/JSONL ke `file` yang sudah terbuka; panggil .tulis(rows) per batch."""
+    fmt = fmt.lower()
+    if fmt not in FORMAT_STREAM:
+        raise ValueError(f"Format '{fmt}' tidak bisa dialirkan. Gunakan {' atau '.join(FORMAT_STREAM)}.")
+    return _PENULIS[fmt](None, columns, file=file)
+
+
+def export_data(path, fmt, search_term="", include_password=False,
+                progress_cb=None, cancel_check=None, batch_size=1000, filters=None):
+    """
+    Mengekspor data (dengan pencarian dan filter facet yang sama seperti tabel) ke
+    `path`. File ditulis ke nama sementara dan baru di-rename setelah
+    selesai, jadi ekspor yang gagal/dibatalkan tidak meninggalkan file
+    setengah jadi.
+
+    progress_cb(ditulis, total) dipanggil setiap satu batch.
+    Mengembalikan (success, pesan).
+    """
+    fmt = fmt.lower()
+    if fmt not in _PENULIS:
+        return False, f"Format ekspor '{fmt}' tidak didukung."
+
+    success, total = db_manager.count_data(search_term, filters=filters)
+    if not success:
+        return False, total
+
+    columns = kolom_ekspor(include_password)
+    path_sementara = f"{path}.part"
+    ditulis = 0
+    penulis = None
+    try:
+        penulis = _PENULIS[fmt](path_sementara, columns)
+        for rows in db_manager.iter_data(search_term, columns, batch_size, cancel_check, filters):
+            if cancel_check is not None and cancel_check():
+                raise EksporDibatalkan()
+            penulis.tulis(rows)
+            ditulis += len(rows)
+            if progress_cb is not None:
+                progress_cb(ditulis, total)
+        penulis.tutup()
+        penulis = None
+        os.replace(path_sementara, path)
+        return True, f"{ditulis} data berhasil diekspor ke {os.path.basename(path)}."
+    except EksporDibatalkan:
+        return False, "Ekspor dibatalkan."
+    except sqlite3.OperationalError as e:
+        if 'interrupted' in str(e):
+            return False, "Ekspor dibatalkan."
+        return False, f"Gagal mengekspor data: {e}"
+    except Exception as e:
+        return False, f"Gagal mengekspor data: {e}"
+    finally:
+        if penulis is not None:
+            try:
+                penulis.tutup()
+            except Exception:
+                pass
+        if os.path.exists(path_sementara):
+            os.remove(path_sementara)
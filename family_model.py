@@ -0,0 +1,194 @@
+# family_model.py
+# Model pohon (QAbstractItemModel) untuk tampilan per Kartu Keluarga.
+# Tingkat atas adalah satu node per No KK (jumlah anggota + ringkasan
+# status), diambil per halaman saat digulir. Anggota keluarga baru diambil
+# dari DB ketika node dibuka, jadi puluhan ribu keluarga tidak dimuat
+# sekaligus.
+
+from collections import Counter
+
+from PyQt6.QtCore import QAbstractItemModel, QModelIndex, Qt
+
+import db_manager
+
+# Kolom anggota yang diambil (selain id)
+KOLOM_ANGGOTA = ["nik", "nama", "status_hubungan", "status"]
+
+
+class KeluargaTreeModel(QAbstractItemModel):
+    """Model pohon keluarga -> anggota dengan pemuatan bertahap (lazy)."""
+
+    PAGE_SIZE = 200         # Jumlah keluarga per halaman
+    MEMBER_PAGE_SIZE = 200  # Jumlah anggota per pengambilan (untuk grup tanpa KK)
+
+    HEADERS = ["No KK / NIK", "Nama", "Status Hubungan", "Status", "Anggota"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._search_term = ""
+        self._filters = {}
+        self._keluarga = []       # list dict node keluarga
+        self._keluarga_habis = True
+        self._jumlah_keluarga = 0
+        self.last_error = None
+
+    # --- API untuk ViewWidget ---
+    def reload(self, search_term="", filters=None):
+        """Menghitung ulang keluarga dan memuat halaman pertama."""
+        self.beginResetModel()
+        self._search_term = search_term
+        self._filters = dict(filters or {})
+        self._keluarga = []
+        self._keluarga_habis = False
+        self.last_error = None
+
+        success, hasil = db_manager.count_keluarga(search_term, self._filters)
+        if not success:
+            self.last_error = hasil
+            self._keluarga_habis = True
+            self._jumlah_keluarga = 0
+            self.endResetModel()
+            return False
+        self._jumlah_keluarga, tanpa_kk = hasil
+        if tanpa_kk:
+            # Pendaftar tanpa No KK dikumpulkan di satu node khusus
+            self._keluarga.append(self._node(None, tanpa_kk, "", ""))
+        self.endResetModel()
+        return True
+
+    def total_keluarga(self):
+        return self._jumlah_keluarga
+
+    def id_at(self, index):
+        """ID pendaftar untuk baris anggota, atau None untuk node keluarga."""
+        if not index.isValid() or index.internalId() == 0:
+            return None
+        node = self._keluarga[index.internalId() - 1]
+        if index.row() >= len(node["anggota"]):
+            return None
+        return node["anggota"][index.row()][0]
+
+    # --- Implementasi QAbstractItemModel ---
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, 0)
+        # internalId anggota = nomor baris keluarga + 1
+        return self.createIndex(row, column, parent.row() + 1)
+
+    def parent(self, index):
+        if not index.isValid() or index.internalId() == 0:
+            return QModelIndex()
+        return self.createIndex(index.internalId() - 1, 0, 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self._keluarga)
+        if parent.internalId() == 0 and parent.column() == 0:
+            return len(self._keluarga[parent.row()]["anggota"])
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return True
+        if parent.internalId() == 0 and parent.column() == 0:
+            return self._keluarga[parent.row()]["jumlah"] > 0
+        return False
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if index.internalId() == 0:
+            node = self._keluarga[index.row()]
+            nilai = [
+                node["no_kk"] or "(Tanpa No KK)", node["kepala"], "",
+                node["ringkasan"], str(node["jumlah"]),
+            ]
+            return nilai[index.column()]
+
+        node = self._keluarga[index.internalId() - 1]
+        anggota = node["anggota"][index.row()]
+        # anggota = (id, nik, nama, status_hubungan, status)
+        if index.column() < len(KOLOM_ANGGOTA):
+            nilai = anggota[index.column() + 1]
+            return "" if nilai is None else str(nilai)
+        return ""
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return not self._keluarga_habis
+        if parent.internalId() == 0:
+            return not self._keluarga[parent.row()]["habis"]
+        return False
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not parent.isValid():
+            self._muat_keluarga()
+        elif parent.internalId() == 0:
+            self._muat_anggota(parent)
+
+    # --- Pemuatan bertahap ---
+    @staticmethod
+    def _node(no_kk, jumlah, kepala, daftar_status):
+        hitung = Counter(daftar_status.split("\x1f")) if daftar_status else Counter()
+        ringkasan = ", ".join(f"{status or '-'}: {n}" for status, n in hitung.most_common())
+        return {
+            "no_kk": no_kk, "jumlah": jumlah, "kepala": kepala or "",
+            "ringkasan": ringkasan, "anggota": [], "habis": False,
+        }
+
+    def _muat_keluarga(self):
+        terakhir = next((k["no_kk"] for k in reversed(self._keluarga) if k["no_kk"]), "")
+        success, rows = db_manager.load_keluarga_page(
+            terakhir, self.PAGE_SIZE, self._search_term, self._filters
+        )
+        if not success:
+            self.last_error = rows
+            print(rows)
+            self._keluarga_habis = True
+            return
+        if len(rows) < self.PAGE_SIZE:
+            self._keluarga_habis = True
+        if not rows:
+            return
+        awal = len(self._keluarga)
+        self.beginInsertRows(QModelIndex(), awal, awal + len(rows) - 1)
+        self._keluarga.extend(
+            self._node(r["no_kk"], r["jumlah"], r["kepala"], r["daftar_status"]) for r in rows
+        )
+        self.endInsertRows()
+
+    def _muat_anggota(self, parent):
+        node = self._keluarga[parent.row()]
+        if node["no_kk"] is None:
+            # Grup tanpa KK: hanya anggota yang cocok dengan pencarian/filter
+            search_term, filters = self._search_term, dict(self._filters, no_kk="")
+        else:
+            # Keluarga: tampilkan seluruh anggota
+            search_term, filters = "", {"no_kk": node["no_kk"]}
+        after_id = node["anggota"][-1][0] if node["anggota"] else None
+        success, rows = db_manager.load_page(
+            after_id, self.MEMBER_PAGE_SIZE, search_term, filters, KOLOM_ANGGOTA
+        )
+        if not success:
+            self.last_error = rows
+            print(rows)
+            node["habis"] = True
+            return
+        if len(rows) < self.MEMBER_PAGE_SIZE:
+            node["habis"] = True
+        if not rows:
+            return
+        awal = len(node["anggota"])
+        self.beginInsertRows(parent, awal, awal + len(rows) - 1)
+        node["anggota"].extend(tuple(r) for r in rows)
+        self.endInsertRows()
@@ -16,12 +16,17 @@ from PyQt6.QtWidgets import (
     QScrollArea, QCheckBox, QTabWidget, QApplication
 )
 # --- IMPOR DIPERBARUI ---
-from PyQt6.QtCore import QDate, QRegularExpression, pyqtSignal, pyqtSlot, Qt
+from PyQt6.QtCore import QDate, QRegularExpression, pyqtSignal, pyqtSlot, Qt, QSize, QThreadPool
 
-from PyQt6.QtGui import QRegularExpressionValidator
+from PyQt6.QtGui import QRegularExpressionValidator, QIcon, QImage, QPixmap
 
 # --- IMPOR KUSTOM ---
 import db_manager
+from repository import repo
+import bulk_import
+import doc_manager
+import thumbnail_cache
+from workers import DocumentCopyManager, MirrorWorker, ThumbnailLoader
 from config import BASE_DOC_FOLDER, FIELD_UNTUK_INSERT
 
 # --- KELAS FORM WIDGET (DIPERBARUI DENGAN TABS) ---
@@ -33,9 +38,23 @@ class FormWidget(QWidget):
         
         self.current_edit_id = None
         self.current_doc_folder = None
+        # Versi baris dan isi field saat data dibuka untuk diedit (deteksi
+        # perubahan bersamaan dari workstation lain, lihat update_data)
+        self.current_row_version = None
+        self.nilai_awal = None
         self.files_to_add = set()
         self.files_to_remove = set()
         
+        # --- ANTREAN SALIN DOKUMEN (LATAR BELAKANG) ---
+        self.copy_manager = DocumentCopyManager(self)
+        self.copy_dialog = None
+        self.copy_manager.all_finished.connect(self._populate_file_list)
+
+        # --- THUMBNAIL DOKUMEN (LATAR BELAKANG) ---
+        self.file_items = {}  # path dokumen -> QListWidgetItem
+        self.thumbnail_loader = ThumbnailLoader(self)
+        self.thumbnail_loader.thumbnail_ready.connect(self.on_thumbnail_ready)
+        
         # --- DAFTAR STATUS HUBUNGAN BARU ---
         self.STATUS_HUBUNGAN_LIST = [
             "", "Kepala Keluarga", "Suami", "Istri", "Anak", "Menantu", 
@@ -47,7 +66,8 @@ class FormWidget(QWidget):
         # --- DATA BARU UNTUK AI PROMPT ---
         self.ai_system_instruction = ""
         self.ai_json_schema = ""
-        self._generate_ai_prompt_assets()
+        self.ai_schema = {}
+        # Aset prompt dan isi tab AI dibangun saat tab pertama kali dibuka
         # --- AKHIR DATA BARU ---
         
         self.init_ui()
@@ -65,7 +85,8 @@ class FormWidget(QWidget):
             "4. Jika 'status_hubungan' adalah 'Kepala Keluarga', maka 'nik_kk' harus sama dengan 'nik' orang tersebut.\n"
             "5. Untuk data yang tidak ada di KTP/KK (seperti 'email', 'password', 'status', 'keterangan', 'catatan'), kembalikan string kosong \"\".\n"
             "6. 'nama_ibu' biasanya hanya ada di KK.\n"
-            "7. Pastikan 'tanggal_lahir' dalam format YYYY-MM-DD."
+            "7. Pastikan 'tanggal_lahir' dalam format YYYY-MM-DD.\n"
+            "8. Jika gambar berisi lebih dari satu orang (misalnya satu KK), kembalikan ARRAY JSON berisi satu objek per orang."
         )
 
         # Buat properti skema dari FIELD_UNTUK_INSERT di config.py
@@ -85,7 +106,8 @@ class FormWidget(QWidget):
             "required": ["nama", "nik"] # Hanya perlukan yang utama
         }
         
-        # Ubah dict skema menjadi string JSON yang rapi
+        # Simpan skema untuk validasi impor, dan versi string JSON yang rapi
+        self.ai_schema = schema
         self.ai_json_schema = json.dumps(schema, indent=2)
 
     def init_ui(self):
@@ -185,6 +207,9 @@ class FormWidget(QWidget):
         layout_dokumen = QVBoxLayout()
         self.file_list_widget = QListWidget()
         self.file_list_widget.setSelectionMode(QListWidget.SelectionMode.ExtendedSelection)
+        ukuran_ikon = thumbnail_cache.UKURAN_THUMBNAIL
+        self.file_list_widget.setIconSize(QSize(ukuran_ikon, ukuran_ikon))
+        self.file_list_widget.itemDoubleClicked.connect(self.on_preview_file)
         layout_tombol_doc = QHBoxLayout()
         self.add_file_btn = QPushButton("Tambah File...")
         self.add_file_btn.clicked.connect(self.on_add_files)
@@ -223,13 +248,21 @@ class FormWidget(QWidget):
         form_tab_layout.addWidget(form_scroll_area)
         
         # --- Buat Tab 2: Bantuan AI (Eksternal) ---
-        ai_tab = QWidget()
-        ai_layout = QVBoxLayout(ai_tab)
-        self.setup_ai_tab(ai_layout) # Panggil fungsi helper baru
+        # Hanya wadah kosong; isinya dibangun oleh _on_tab_changed
+        self.ai_tab = QWidget()
+        QVBoxLayout(self.ai_tab)
 
         # --- Tambahkan kedua tab ke QTabWidget ---
         self.tab_widget.addTab(form_tab, "Formulir Pendaftaran")
-        self.tab_widget.addTab(ai_tab, "🤖 Bantuan AI (Eksternal)")
+        self.tab_widget.addTab(self.ai_tab, "🤖 Bantuan AI (Eksternal)")
+        self.tab_widget.currentChanged.connect(self._on_tab_changed)
+
+    @pyqtSlot(int)
+    def _on_tab_changed(self, index):
+        """Membangun tab Bantuan AI saat pertama kali dibuka."""
+        if self.tab_widget.widget(index) is self.ai_tab and not hasattr(self, 'ai_json_input'):
+            self._generate_ai_prompt_assets()
+            self.setup_ai_tab(self.ai_tab.layout())
 
     # --- FUNGSI HELPER BARU UNTUK TAB AI ---
     def setup_ai_tab(self, layout: QVBoxLayout):
@@ -262,7 +295,11 @@ class FormWidget(QWidget):
         group_import = QGroupBox("Langkah 2: Impor Hasil JSON")
         layout_import = QVBoxLayout()
         
-        import_label = QLabel("Tempelkan (paste) hasil JSON yang Anda dapatkan dari AI Studio ke dalam kotak di bawah ini.")
+        import_label = QLabel(
+            "Tempelkan (paste) hasil JSON yang Anda dapatkan dari AI Studio ke dalam kotak di bawah ini. "
+            "Satu objek akan mengisi formulir; array atau JSONL (banyak orang) akan ditampilkan "
+            "dalam pratinjau lalu disimpan/diperbarui berdasarkan NIK."
+        )
         import_label.setWordWrap(True)
         
         self.ai_json_input = QTextEdit()
@@ -293,27 +330,43 @@ class FormWidget(QWidget):
 
     @pyqtSlot()
     def on_import_json(self):
-        """Mengambil JSON dari input, mem-parse, dan mengisi formulir."""
+        """
+        Mengambil JSON dari input dan mem-parse. Satu objek mengisi formulir;
+        array/JSONL ditampilkan di pratinjau lalu di-upsert berdasarkan NIK.
+        """
         json_text = self.ai_json_input.toPlainText()
         if not json_text:
             QMessageBox.warning(self, "Input Kosong", "Kotak input JSON masih kosong.")
             return
             
         try:
-            # Hapus ```json ... ``` jika ada
-            if json_text.strip().startswith("```json"):
-                json_text = json_text.strip()[7:-3].strip()
-            
-            data = json.loads(json_text)
-            
-            self.populate_form_with_ai_data(data)
-            
-            QMessageBox.information(self, "Sukses", "Data JSON berhasil diimpor ke formulir!")
-            self.tab_widget.setCurrentIndex(0) # Pindah ke tab formulir
-            self.ai_json_input.clear() # Bersihkan input
-            
-        except json.JSONDecodeError as e:
+            # Terima satu objek, array objek, atau JSONL (```json ... ``` dibuang)
+            records = bulk_import.parse_json_records(json_text)
+        except ValueError as e:
             QMessageBox.critical(self, "Error JSON", f"Format JSON tidak valid. Pastikan Anda menyalin seluruh blok JSON.\n\nError: {e}")
+            return
+
+        try:
+            if len(records) == 1 and isinstance(records[0], dict):
+                # Perilaku lama: satu orang -> isi formulir
+                self.populate_form_with_ai_data(records[0])
+                
+                QMessageBox.information(self, "Sukses", "Data JSON berhasil diimpor ke formulir!")
+                self.tab_widget.setCurrentIndex(0) # Pindah ke tab formulir
+                self.ai_json_input.clear() # Bersihkan input
+                return
+
+            # Banyak orang -> pratinjau lalu upsert berdasarkan NIK
+            success, rencana = bulk_import.rencanakan_upsert(records, self.ai_schema)
+            if not success:
+                QMessageBox.critical(self, "Database Error", rencana)
+                return
+            from ai_batch_dialog import AiBatchDialog
+            dialog = AiBatchDialog(rencana, self)
+            if dialog.exec():
+                self.ai_json_input.clear()
+                self.data_saved.emit()
+            
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Terjadi kesalahan saat mengimpor: {e}")
 
@@ -395,8 +448,7 @@ class FormWidget(QWidget):
         if files:
             for file_path in files:
                 self.files_to_add.add(file_path)
-                item = QListWidgetItem(f"[BARU] {file_path}")
-                self.file_list_widget.addItem(item)
+                self._tambah_item_file(f"[BARU] {file_path}", file_path)
     
     def on_remove_file(self):
         selected_items = self.file_list_widget.selectedItems()
@@ -421,15 +473,60 @@ class FormWidget(QWidget):
         else:
             QMessageBox.information(self, "Info", "Folder belum ada. Simpan data.")
 
+    def _tambah_item_file(self, teks, path, file_hash=None, mtime=None, tooltip=""):
+        """Menambah satu baris ke daftar file dan meminta thumbnail-nya."""
+        item = QListWidgetItem(teks)
+        item.setToolTip(tooltip)
+        item.setData(Qt.ItemDataRole.UserRole, (str(path), file_hash, mtime))
+        self.file_list_widget.addItem(item)
+        self.file_items[str(path)] = item
+        self.thumbnail_loader.request(str(path), file_hash, mtime)
+
     def _populate_file_list(self):
         self.file_list_widget.clear()
-        if self.current_doc_folder and self.current_doc_folder.exists():
-            for file_path in self.current_doc_folder.iterdir():
-                if file_path.is_file(): self.file_list_widget.addItem(file_path.name)
+        self.file_items.clear()
+        self.thumbnail_loader.reset()
+        if self.current_edit_id is not None:
+            success, dokumen = db_manager.get_dokumen(self.current_edit_id)
+            for doc in (dokumen if success else []):
+                if doc['filename'] not in self.files_to_remove:
+                    self._tambah_item_file(
+                        doc['filename'], self.current_doc_folder / doc['filename'],
+                        doc['hash'], doc['mtime'], doc_manager.format_ukuran(doc['ukuran'])
+                    )
+            if success and dokumen:
+                # Mode server: dokumen yang belum ada di folder lokal diunduh di thread lain
+                worker = MirrorWorker(self.current_doc_folder.name, dokumen)
+                worker.signals.finished.connect(self.on_mirror_finished)
+                QThreadPool.globalInstance().start(worker)
+        # File yang belum disimpan tetap ditampilkan (daftar bisa dimuat ulang
+        # saat antrean salin selesai ketika pengguna sedang mengedit)
+        for file_path in self.files_to_add:
+            self._tambah_item_file(f"[BARU] {file_path}", file_path)
+
+    @pyqtSlot(str, int)
+    def on_mirror_finished(self, nik, jumlah):
+        # Ada dokumen yang baru diunduh: muat ulang daftar agar thumbnail-nya dibuat
+        if jumlah and self.current_doc_folder is not None and self.current_doc_folder.name == nik:
+            self._populate_file_list()
+
+    @pyqtSlot(str, int, QImage)
+    def on_thumbnail_ready(self, path, ukuran, image):
+        item = self.file_items.get(path)
+        if item is not None:
+            item.setIcon(QIcon(QPixmap.fromImage(image)))
+
+    def on_preview_file(self, item):
+        """Membuka pratinjau dokumen yang diklik dua kali."""
+        info = item.data(Qt.ItemDataRole.UserRole)
+        if info:
+            path, file_hash, mtime = info
+            from preview_dialog import PreviewDialog
+            PreviewDialog(path, file_hash, mtime, self).exec()
         
     def load_data_for_edit(self, user_id):
         self.bersihkan_form()
-        success, data_row = db_manager.get_data_by_id(user_id)
+        success, data_row = repo.get_by_id(user_id)
         if not success:
             QMessageBox.critical(self, "Error", f"Gagal memuat data: {data_row}")
             return
@@ -464,22 +561,20 @@ class FormWidget(QWidget):
         # Panggil handler secara manual untuk mengatur state read-only NIK KK
         self.on_status_hubungan_changed()
 
-    def simpan_data(self):
-        nik = self.nik_input.text()
-        if not self.nama_input.text() or not nik:
-            QMessageBox.warning(self, "Input Error", "Nama dan NIK wajib diisi!")
-            return
-        if not self.nik_input.hasAcceptableInput():
-            QMessageBox.warning(self, "Input Error", "Format NIK tidak valid.")
-            return
-            
-        data = {
+        # Dibandingkan dalam bentuk yang sama dengan yang akan disimpan
+        # (mis. NULL di DB menjadi string kosong di form)
+        self.current_row_version = data_row['row_version']
+        self.nilai_awal = self._kumpulkan_data()
+
+    def _kumpulkan_data(self):
+        """Isi field formulir sebagai dict (kunci = FIELD_UNTUK_INSERT)."""
+        return {
             "nama": self.nama_input.text(),
             "status": self.status_input.currentText(),
             "keterangan": self.keterangan_input.text(),
             "catatan": self.catatan_input.toPlainText(),
             "status_hubungan": self.status_hubungan_input.currentText(), 
-            "nik": nik, "nik_kk": self.nik_kk_input.text(), "no_kk": self.no_kk_input.text(),
+            "nik": self.nik_input.text(), "nik_kk": self.nik_kk_input.text(), "no_kk": self.no_kk_input.text(),
             "tempat_lahir": self.tempat_lahir_input.text(),
             "tanggal_lahir": self.tanggal_lahir_input.date().toString("yyyy-MM-dd"),
             "alamat": self.alamat_input.toPlainText(),
@@ -487,22 +582,78 @@ class FormWidget(QWidget):
             "nama_ibu": self.nama_ibu_input.text(),
             "email": self.email_input.text(), "password": self.password_input.text(), 
             "no_hp": self.no_hp_input.text(),
-            "files_to_add": self.files_to_add, "files_to_remove": self.files_to_remove
         }
+
+    def simpan_data(self):
+        nik = self.nik_input.text()
+        if not self.nama_input.text() or not nik:
+            QMessageBox.warning(self, "Input Error", "Nama dan NIK wajib diisi!")
+            return
+        if not self.nik_input.hasAcceptableInput():
+            QMessageBox.warning(self, "Input Error", "Format NIK tidak valid.")
+            return
+            
+        data = self._kumpulkan_data()
+        data.update(files_to_add=self.files_to_add, files_to_remove=self.files_to_remove)
         
-        if self.current_edit_id is None:
-            success, message = db_manager.save_data(data)
+        # Salinan dokumen dijalankan di latar belakang setelah data tersimpan
+        is_update = self.current_edit_id is not None
+        rencana = doc_manager.rencana_salinan(nik, self.files_to_add, skip_existing=is_update)
+        
+        if not is_update:
+            success, message = repo.save(data, copy_files=False)
         else:
             data['old_nik'] = self.current_doc_folder.name if self.current_doc_folder else nik
-            success, message = db_manager.update_data(self.current_edit_id, data)
+            data['row_version'] = self.current_row_version
+            data['nilai_awal'] = self.nilai_awal
+            success, message = repo.update(self.current_edit_id, data, copy_files=False)
+            if not success and isinstance(message, dict):
+                if not self._selesaikan_konflik(message):
+                    return
+                data['row_version'] = self.current_row_version
+                success, message = repo.update(self.current_edit_id, data, copy_files=False)
             
         if success:
+            if rencana:
+                self.start_document_copy(rencana)
+                message = (
+                    f"{'Data berhasil diperbarui' if is_update else 'Data berhasil disimpan'}! "
+                    f"{len(rencana)} dokumen sedang disalin di latar belakang."
+                )
             QMessageBox.information(self, "Sukses", message)
             self.bersihkan_form()
             self.data_saved.emit()
+        elif isinstance(message, dict):
+            QMessageBox.warning(self, "Data Diubah di Tempat Lain", message['pesan'])
         else:
             QMessageBox.critical(self, "Database Error", message)
 
+    def _selesaikan_konflik(self, konflik):
+        """
+        Menampilkan perbedaan field saat data sudah diubah di tempat lain.
+        True jika pengguna memilih menimpa (simpan ulang dengan versi terbaru),
+        False jika kembali mengedit atau memuat ulang data tersimpan.
+        """
+        from conflict_dialog import ConflictDialog
+        pilihan = ConflictDialog(konflik, self).exec()
+        if pilihan == ConflictDialog.TIMPA:
+            # Versi terbaru + nilai awal yang sama: hanya field yang diubah
+            # pengguna ini yang ditulis, perubahan lain yang tidak bentrok tetap
+            self.current_row_version = konflik['row_version']
+            return True
+        if pilihan == ConflictDialog.MUAT_ULANG:
+            self.load_data_for_edit(self.current_edit_id)
+        return False
+
+    def start_document_copy(self, rencana):
+        """Memasukkan file ke antrean salin dan menampilkan jendela progresnya."""
+        if self.copy_dialog is None:
+            from copy_dialog import DocumentCopyDialog
+            self.copy_dialog = DocumentCopyDialog(self.copy_manager, self.window())
+        self.copy_manager.enqueue(rencana)
+        self.copy_dialog.show()
+        self.copy_dialog.raise_()
+
     def bersihkan_form(self):
         # Bersihkan semua field input
         self.nama_input.clear()
@@ -525,6 +676,8 @@ class FormWidget(QWidget):
         
         # Bersihkan data manajemen file
         self.file_list_widget.clear()
+        self.file_items.clear()
+        self.thumbnail_loader.reset()
         self.files_to_add.clear()
         self.files_to_remove.clear()
         self.current_doc_folder = None
@@ -535,6 +688,8 @@ class FormWidget(QWidget):
         
         # Reset state
         self.current_edit_id = None
+        self.current_row_version = None
+        self.nilai_awal = None
         self.simpan_btn.setText("Simpan Data")
         self.nik_kk_input.setReadOnly(False)
         
@@ -0,0 +1,171 @@
+# import_dialog.py
+# Berisi QDialog untuk impor massal data pendaftar dari file CSV/JSONL
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit,
+    QProgressBar, QPlainTextEdit, QFileDialog, QMessageBox
+)
+from PyQt6.QtCore import pyqtSignal, pyqtSlot, QThreadPool
+
+from workers import ImportWorker
+
+# Batas jumlah konflik yang ditulis ke log (sisanya hanya dihitung)
+MAKS_KONFLIK_DITAMPILKAN = 1000
+
+
+class ImportDialog(QDialog):
+    """Dialog impor massal. Proses impor berjalan di thread latar belakang."""
+
+    # Dipancarkan setelah impor selesai dan ada data yang tersimpan
+    data_imported = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Impor Massal Data Pendaftar")
+        self.setMinimumWidth(600)
+
+        self.worker = None
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        info_label = QLabel(
+            "Pilih file CSV (pemisah koma/titik koma) atau JSONL (satu objek JSON per baris). "
+            "Nama kolom dipetakan otomatis ke field pendaftaran (misal 'Nama Lengkap' -> nama). "
+            "Baris dengan NIK yang sudah terdaftar akan dilewati dan dilaporkan di bawah."
+        )
+        info_label.setWordWrap(True)
+
+        # --- Pilih File ---
+        file_layout = QHBoxLayout()
+        self.path_input = QLineEdit()
+        self.path_input.setReadOnly(True)
+        self.path_input.setPlaceholderText("Belum ada file dipilih")
+        self.browse_btn = QPushButton("Pilih File...")
+        self.browse_btn.clicked.connect(self.on_browse)
+        file_layout.addWidget(self.path_input)
+        file_layout.addWidget(self.browse_btn)
+
+        # --- Progres ---
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.status_label = QLabel("Siap.")
+
+        self.log_output = QPlainTextEdit()
+        self.log_output.setReadOnly(True)
+        self.log_output.setPlaceholderText("Laporan impor akan muncul di sini...")
+
+        # --- Tombol Aksi ---
+        tombol_layout = QHBoxLayout()
+        self.start_btn = QPushButton("Mulai Impor")
+        self.start_btn.setStyleSheet("background-color: #4CAF50; color: white; padding: 8px; border-radius: 4px;")
+        self.start_btn.setEnabled(False)
+        self.start_btn.clicked.connect(self.on_start)
+        self.cancel_btn = QPushButton("Batalkan")
+        self.cancel_btn.setStyleSheet("background-color: #f44336; color: white; padding: 8px; border-radius: 4px;")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.on_cancel)
+        self.close_btn = QPushButton("Tutup")
+        self.close_btn.clicked.connect(self.close)
+        tombol_layout.addStretch()
+        tombol_layout.addWidget(self.cancel_btn)
+        tombol_layout.addWidget(self.start_btn)
+        tombol_layout.addWidget(self.close_btn)
+
+        layout.addWidget(info_label)
+        layout.addLayout(file_layout)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.log_output)
+        layout.addLayout(tombol_layout)
+
+    @pyqtSlot()
+    def on_browse(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Pilih File Impor", "", "Data Pendaftar (*.csv *.jsonl *.ndjson)"
+        )
+        if path:
+            self.path_input.setText(path)
+            self.start_btn.setEnabled(True)
+
+    @pyqtSlot()
+    def on_start(self):
+        path = self.path_input.text()
+        if not path:
+            return
+
+        self.log_output.clear()
+        self.progress_bar.setValue(0)
+        self.status_label.setText("Mengimpor...")
+        self._set_running(True)
+
+        self.worker = ImportWorker(path)
+        self.worker.signals.progress.connect(self.on_progress)
+        self.worker.signals.finished.connect(self.on_finished)
+        self.pool.start(self.worker)
+
+    @pyqtSlot()
+    def on_cancel(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.status_label.setText("Membatalkan setelah batch saat ini selesai...")
+            self.cancel_btn.setEnabled(False)
+
+    @pyqtSlot(int, int, int)
+    def on_progress(self, persen, diproses, disimpan):
+        self.progress_bar.setValue(persen)
+        self.status_label.setText(f"Diproses: {diproses} baris, tersimpan: {disimpan} data")
+
+    @pyqtSlot(bool, object)
+    def on_finished(self, success, hasil):
+        self.worker = None
+        self._set_running(False)
+
+        if not success:
+            self.status_label.setText("Impor gagal.")
+            QMessageBox.critical(self, "Error", hasil)
+            return
+
+        if not hasil['dibatalkan']:
+            self.progress_bar.setValue(100)
+        konflik = hasil['konflik']
+        ringkasan = (
+            f"{'Dibatalkan' if hasil['dibatalkan'] else 'Selesai'}: "
+            f"{hasil['diproses']} baris diproses, {hasil['disimpan']} data tersimpan, "
+            f"{len(konflik)} baris dilewati."
+        )
+        self.status_label.setText(ringkasan)
+
+        baris_log = [ringkasan]
+        if hasil['kolom_dipetakan']:
+            baris_log.append(f"Kolom dipetakan: {', '.join(hasil['kolom_dipetakan'])}")
+        if hasil['kolom_diabaikan']:
+            baris_log.append(f"Kolom diabaikan: {', '.join(map(str, hasil['kolom_diabaikan']))}")
+        if konflik:
+            baris_log.append("")
+            baris_log.append("Baris yang dilewati:")
+            for nomor_baris, nik, alasan in konflik[:MAKS_KONFLIK_DITAMPILKAN]:
+                baris_log.append(f"  Baris {nomor_baris} (NIK {nik or '-'}): {alasan}")
+            if len(konflik) > MAKS_KONFLIK_DITAMPILKAN:
+                baris_log.append(f"  ... dan {len(konflik) - MAKS_KONFLIK_DITAMPILKAN} baris lainnya.")
+        self.log_output.setPlainText("\n".join(baris_log))
+
+        if hasil['disimpan']:
+            self.data_imported.emit()
+
+    def _set_running(self, running):
+        self.start_btn.setEnabled(not running)
+        self.browse_btn.setEnabled(not running)
+        self.cancel_btn.setEnabled(running)
+        self.close_btn.setEnabled(not running)
+
+    def closeEvent(self, event):
+        # Jangan tutup dialog saat impor masih berjalan
+        if self.worker is not None:
+            event.ignore()
+            return
+        super().closeEvent(event)
@@ -0,0 +1,388 @@
+# instrumentasi.py
+# Pengukuran waktu operasi database untuk diagnosis "aplikasi lambat".
+#
+# Dua sumber peristiwa:
+#   - 'operasi': setiap fungsi publik db_manager (dibungkus lewat
+#     bungkus_modul), termasuk apakah hasilnya (False, pesan);
+#   - 'sql': setiap pernyataan SQL yang dijalankan lewat koneksi
+#     KoneksiTerukur (dipakai db_manager._buka_koneksi). Durasi SQL adalah
+#     waktu execute (prepare + langkah pertama, yang untuk COUNT/ORDER BY/
+#     DML sudah mencakup hampir semua kerjanya); waktu fetch baris besar
+#     tercatat di durasi operasinya.
+#
+# Peristiwa diteruskan ke semua hook yang terpasang (tambah_hook). Bawaan
+# terpasang dua hook: `statistik` (histogram latensi bergulir per operasi
+# dan per SQL) dan `log_lambat` (SQL di atas BATAS_KUERI_LAMBAT_MS ditulis
+# ke FILE_LOG_KUERI_LAMBAT beserta bentuk parameter dan EXPLAIN QUERY PLAN;
+# EXPLAIN dijalankan thread pencatat dengan koneksinya sendiri, bukan di
+# koneksi/thread yang sedang bekerja).
+# Nilai parameter tidak pernah dicatat, hanya tipenya (ada password/NIK).
+# Modul ini sengaja tidak mengimpor PyQt6.
+
+import functools
+import inspect
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+from config import BATAS_KUERI_LAMBAT_MS, FILE_LOG_KUERI_LAMBAT, UKURAN_MAKS_LOG_KUERI_LAMBAT
+
+# Batas atas (ms) setiap kotak histogram; kotak terakhir = di atas 5 detik
+BATAS_KOTAK_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Jumlah sampel terakhir per operasi yang dipakai untuk histogram/persentil
+UKURAN_JENDELA = 1000
+
+# Batas jumlah pernyataan SQL berbeda yang dilacak (sisanya digabung)
+MAKS_SQL_DILACAK = 300
+
+# Jumlah entri kueri lambat terakhir yang disimpan di memori (panel diagnostik)
+JUMLAH_KUERI_LAMBAT_DISIMPAN = 50
+
+_hooks = []
+_kunci_hooks = threading.Lock()
+
+
+class Peristiwa:
+    """Satu pengukuran: jenis ('operasi'/'sql'), nama, durasi_ms, sukses."""
+
+    __slots__ = ('jenis', 'nama', 'durasi_ms', 'sukses', 'sql', 'parameter', 'banyak', 'database')
+
+    def __init__(self, jenis, nama, durasi_ms, sukses, sql=None, parameter=None,
+                 banyak=False, database=None):
+        self.jenis = jenis
+        self.nama = nama
+        self.durasi_ms = durasi_ms
+        self.sukses = sukses
+        self.sql = sql
+        self.parameter = parameter
+        self.banyak = banyak  # True untuk executemany (parameter = list baris)
+        self.database = database  # Path file database (None jika tidak diketahui)
+
+    def bentuk_parameter(self):
+        return bentuk_parameter(self.parameter, self.banyak)
+
+    def rencana_kueri(self, conn):
+        """
+        Hasil EXPLAIN QUERY PLAN untuk pernyataan SQL ini (list baris teks),
+        lewat `conn`: koneksi terpisah ke database yang sama, bukan koneksi
+        yang menjalankan pernyataannya (bisa sedang di tengah transaksi).
+        """
+        if self.sql is None or conn is None:
+            return []
+        parameter = self.parameter
+        if self.banyak:
+            parameter = next(iter(parameter), ()) if parameter is not None else ()
+        try:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {self.sql}", parameter or ()).fetchall()
+        except Exception as e:
+            return [f"(EXPLAIN gagal: {e})"]
+        return [str(row[3]) for row in rows]
+
+
+# --- HOOK ---
+def tambah_hook(hook):
+    """Memasang hook(peristiwa); dipanggil di thread yang menjalankan operasi."""
+    with _kunci_hooks:
+        if hook not in _hooks:
+            _hooks.append(hook)
+
+
+def hapus_hook(hook):
+    with _kunci_hooks:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+def _kirim(peristiwa):
+    for hook in list(_hooks):
+        try:
+            hook(peristiwa)
+        except Exception as e:
+            print(f"Hook instrumentasi gagal: {e}")
+
+
+# --- PENGUKURAN OPERASI ---
+def _gagal(hasil):
+    return isinstance(hasil, tuple) and bool(hasil) and hasil[0] is False
+
+
+def terukur(fungsi, nama=None):
+    """Membungkus fungsi agar setiap panggilannya dikirim sebagai peristiwa 'operasi'."""
+    nama = nama or fungsi.__name__
+
+    if inspect.isgeneratorfunction(fungsi):
+        # Generator (mis. iter_data): yang diukur seluruh iterasinya
+        @functools.wraps(fungsi)
+        def pembungkus_generator(*args, **kwargs):
+            mulai = time.perf_counter()
+            sukses = False
+            try:
+                yield from fungsi(*args, **kwargs)
+                sukses = True
+            finally:
+                if _hooks:
+                    _kirim(Peristiwa('operasi', nama, (time.perf_counter() - mulai) * 1000, sukses))
+        return pembungkus_generator
+
+    @functools.wraps(fungsi)
+    def pembungkus(*args, **kwargs):
+        mulai = time.perf_counter()
+        sukses = False
+        try:
+            hasil = fungsi(*args, **kwargs)
+            sukses = not _gagal(hasil)
+            return hasil
+        finally:
+            if _hooks:
+                _kirim(Peristiwa('operasi', nama, (time.perf_counter() - mulai) * 1000, sukses))
+    return pembungkus
+
+
+def bungkus_modul(namespace, kecuali=()):
+    """
+    Membungkus semua fungsi publik yang didefinisikan di modul `namespace`
+    (globals() modul tersebut) dengan terukur(). Panggilan antar-fungsi di
+    dalam modul ikut terukur karena nama globalnya diganti.
+    """
+    nama_modul = namespace['__name__']
+    for nama, nilai in list(namespace.items()):
+        if (nama.startswith('_') or nama in kecuali or not inspect.isfunction(nilai)
+                or nilai.__module__ != nama_modul):
+            continue
+        namespace[nama] = terukur(nilai)
+
+
+# --- PENGUKURAN SQL ---
+class KursorTerukur(sqlite3.Cursor):
+    """Cursor yang mengirim peristiwa 'sql' untuk setiap execute/executemany."""
+
+    def execute(self, sql, parameter=()):
+        return _ukur_sql(self, sql, parameter, False, super().execute)
+
+    def executemany(self, sql, parameter):
+        if _hooks and not isinstance(parameter, (list, tuple)):
+            parameter = list(parameter)  # Agar bentuknya masih bisa dibaca hook setelah dipakai
+        return _ukur_sql(self, sql, parameter, True, super().executemany)
+
+
+class KoneksiTerukur(sqlite3.Connection):
+    """Koneksi (factory sqlite3.connect) yang semua cursor-nya KursorTerukur."""
+
+    def __init__(self, database, *args, **kwargs):
+        super().__init__(database, *args, **kwargs)
+        # Dicatat absolut: EXPLAIN kueri lambat membuka koneksinya sendiri nanti
+        self.path_database = None if kwargs.get('uri') or database == ":memory:" \
+            else os.path.abspath(database)
+
+    def cursor(self, factory=KursorTerukur):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameter=()):
+        return self.cursor().execute(sql, parameter)
+
+    def executemany(self, sql, parameter):
+        return self.cursor().executemany(sql, parameter)
+
+
+def _ukur_sql(cursor, sql, parameter, banyak, jalankan):
+    if not _hooks:
+        return jalankan(sql, parameter)
+    mulai = time.perf_counter()
+    sukses = False
+    try:
+        hasil = jalankan(sql, parameter)
+        sukses = True
+        return hasil
+    finally:
+        durasi = (time.perf_counter() - mulai) * 1000
+        _kirim(Peristiwa('sql', normalisasi_sql(sql), durasi, sukses, sql, parameter,
+                         banyak, getattr(cursor.connection, 'path_database', None)))
+
+
+_SPASI = re.compile(r"\s+")
+_DAFTAR_PLACEHOLDER = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+def normalisasi_sql(sql):
+    """Kunci pengelompokan SQL: spasi dirapikan, daftar '?, ?, ...' digabung."""
+    return _DAFTAR_PLACEHOLDER.sub("?, ...", _SPASI.sub(" ", sql).strip())
+
+
+def bentuk_parameter(parameter, banyak=False):
+    """Deskripsi tipe parameter tanpa nilainya, mis. '(int, str x3, NoneType)'."""
+    if banyak:
+        baris = list(parameter or [])
+        contoh = bentuk_parameter(baris[0]) if baris else "()"
+        return f"{len(baris)} baris x {contoh}"
+    if parameter is None:
+        return "()"
+    if isinstance(parameter, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameter.items()) + "}"
+    bagian = []
+    for tipe in (type(v).__name__ for v in parameter):
+        if bagian and bagian[-1][0] == tipe:
+            bagian[-1][1] += 1
+        else:
+            bagian.append([tipe, 1])
+    return "(" + ", ".join(t if n == 1 else f"{t} x{n}" for t, n in bagian) + ")"
+
+
+# --- HISTOGRAM ---
+class Histogram:
+    """Histogram latensi bergulir: UKURAN_JENDELA sampel terakhir + penghitung total."""
+
+    def __init__(self, ukuran=UKURAN_JENDELA):
+        self._sampel = deque(maxlen=ukuran)
+        self.jumlah = 0
+        self.gagal = 0
+        self.total_ms = 0.0
+
+    def catat(self, durasi_ms, sukses=True):
+        self._sampel.append(durasi_ms)
+        self.jumlah += 1
+        self.total_ms += durasi_ms
+        if not sukses:
+            self.gagal += 1
+
+    def ringkasan(self):
+        sampel = sorted(self._sampel)
+        kotak = [0] * (len(BATAS_KOTAK_MS) + 1)
+        i = 0
+        for durasi in sampel:
+            while i < len(BATAS_KOTAK_MS) and durasi > BATAS_KOTAK_MS[i]:
+                i += 1
+            kotak[i] += 1
+
+        def persentil(p):
+            return sampel[min(len(sampel) - 1, int(len(sampel) * p))] if sampel else 0.0
+
+        return {
+            'jumlah': self.jumlah,
+            'gagal': self.gagal,
+            'rata_rata_ms': self.total_ms / self.jumlah if self.jumlah else 0.0,
+            'p50_ms': persentil(0.50),
+            'p95_ms': persentil(0.95),
+            'p99_ms': persentil(0.99),
+            'maks_ms': sampel[-1] if sampel else 0.0,
+            'kotak': kotak,
+        }
+
+
+class Statistik:
+    """Hook bawaan: histogram per operasi dan per pernyataan SQL."""
+
+    def __init__(self):
+        self._kunci = threading.Lock()
+        self._data = {'operasi': {}, 'sql': {}}
+
+    def __call__(self, peristiwa):
+        with self._kunci:
+            per_nama = self._data[peristiwa.jenis]
+            histogram = per_nama.get(peristiwa.nama)
+            if histogram is None:
+                nama = peristiwa.nama
+                if peristiwa.jenis == 'sql' and len(per_nama) >= MAKS_SQL_DILACAK:
+                    nama = "(SQL lainnya)"
+                histogram = per_nama.setdefault(nama, Histogram())
+            histogram.catat(peristiwa.durasi_ms, peristiwa.sukses)
+
+    def ringkasan(self, jenis='operasi'):
+        """dict nama -> ringkasan histogram, diurutkan dari total waktu terbesar."""
+        with self._kunci:
+            hasil = {nama: h.ringkasan() for nama, h in self._data[jenis].items()}
+        return dict(sorted(hasil.items(), key=lambda item: -item[1]['rata_rata_ms'] * item[1]['jumlah']))
+
+    def reset(self):
+        with self._kunci:
+            self._data = {'operasi': {}, 'sql': {}}
+
+
+class LogKueriLambat:
+    """Hook bawaan: menulis SQL yang lebih lama dari batas_ms ke file log."""
+
+    def __init__(self, path=FILE_LOG_KUERI_LAMBAT, batas_ms=BATAS_KUERI_LAMBAT_MS,
+                 ukuran_maks=UKURAN_MAKS_LOG_KUERI_LAMBAT):
+        self.path = path
+        self.batas_ms = batas_ms
+        self.ukuran_maks = ukuran_maks
+        self._kunci = threading.Lock()
+        self.terakhir = deque(maxlen=JUMLAH_KUERI_LAMBAT_DISIMPAN)
+        # EXPLAIN dan penulisan file dikerjakan satu thread pencatat, di luar
+        # waktu operasi pemanggil dan dengan koneksinya sendiri
+        self._antrean = queue.SimpleQueue()
+        self._pencatat = None
+
+    def __call__(self, peristiwa):
+        if peristiwa.jenis != 'sql' or peristiwa.durasi_ms < self.batas_ms:
+            return
+        entri = {
+            'waktu': datetime.now().isoformat(sep=' ', timespec='seconds'),
+            'durasi_ms': peristiwa.durasi_ms,
+            'sukses': peristiwa.sukses,
+            'sql': peristiwa.nama,
+            'parameter': peristiwa.bentuk_parameter(),
+            'rencana': [],
+        }
+        self._antrean.put((entri, peristiwa))
+        with self._kunci:
+            if self._pencatat is None:
+                self._pencatat = threading.Thread(target=self._jalankan_pencatat, name="npwp-log-lambat",
+                                                  daemon=True)
+                self._pencatat.start()
+
+    def _jalankan_pencatat(self):
+        koneksi = {}  # path database -> koneksi baca milik thread pencatat
+        while True:
+            entri, peristiwa = self._antrean.get()
+            entri['rencana'] = peristiwa.rencana_kueri(self._koneksi_explain(koneksi, peristiwa.database))
+            with self._kunci:
+                self.terakhir.append(entri)
+                self._tulis(entri)
+
+    @staticmethod
+    def _koneksi_explain(koneksi, database):
+        """Koneksi read-only (sqlite3 biasa, jadi EXPLAIN tidak ikut diukur) ke `database`."""
+        if database is None:
+            return None
+        if database not in koneksi:
+            try:
+                koneksi[database] = sqlite3.connect(f"{Path(database).as_uri()}?mode=ro", uri=True)
+            except sqlite3.Error as e:
+                print(f"Gagal membuka koneksi EXPLAIN: {e}")
+                return None
+        return koneksi[database]
+
+    def _tulis(self, entri):
+        try:
+            if os.path.exists(self.path) and os.path.getsize(self.path) > self.ukuran_maks:
+                os.replace(self.path, self.path + ".1")  # Simpan satu generasi lama saja
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(format_entri(entri) + "\n\n")
+        except OSError as e:
+            print(f"Gagal menulis log kueri lambat: {e}")
+
+
+def format_entri(entri):
+    status = "" if entri['sukses'] else " (GAGAL)"
+    baris = [
+        f"[{entri['waktu']}] {entri['durasi_ms']:.1f} ms{status}",
+        f"SQL: {entri['sql']}",
+        f"Parameter: {entri['parameter']}",
+        "Rencana kueri:",
+    ]
+    baris += [f"  {langkah}" for langkah in entri['rencana']] or ["  (tidak ada)"]
+    return "\n".join(baris)
+
+
+# Hook bawaan untuk seluruh aplikasi
+statistik = Statistik()
+log_lambat = LogKueriLambat()
+tambah_hook(statistik)
+tambah_hook(log_lambat)
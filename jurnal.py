@@ -0,0 +1,229 @@
+# jurnal.py
+# Jurnal operasi (write-ahead) untuk pekerjaan file yang menyertai
+# perubahan database: rename folder NIK, hapus folder, hapus dan salin
+# dokumen. Langkah file dicatat di TABEL_JURNAL dalam transaksi yang SAMA
+# dengan perubahan datanya, baru dikerjakan setelah commit, dan entrinya
+# dihapus setelah langkahnya selesai. Jika aplikasi crash atau listrik
+# padam di antaranya, entri yang tertinggal diulang (atau dibatalkan) saat
+# aplikasi dibuka lagi, sehingga folder tidak pernah tertinggal tidak
+# cocok dengan database. Karena itu pekerjaan file juga aman dijalankan
+# di thread latar belakang.
+#
+# Modul ini hanya mesinnya: fungsi setiap jenis langkah didaftarkan oleh
+# db_manager (LANGKAH_JURNAL) dan harus idempoten. Modul ini sengaja tidak
+# mengimpor PyQt6.
+
+import json
+import os
+import socket
+import threading
+import time
+
+TABEL_JURNAL = 'jurnal_operasi'
+
+# Pemilik entri: entri milik proses lain yang masih hidup tidak diambil alih
+PEMILIK = f"{socket.gethostname()}:{os.getpid()}"
+_HOST = socket.gethostname()
+
+# Entri yang gagal sebanyak ini (termasuk saat pemulihan) dibuang dari
+# jurnal agar tidak diulang terus; tetap muncul di laporan pemulihan
+MAKS_PERCOBAAN = 3
+
+# Satu pelaksana jurnal per proses (pekerja latar belakang bisa bersamaan)
+_kunci = threading.Lock()
+
+# Entri yang dikerjakan sendiri oleh pencatatnya (lihat pegang()); dilewati
+# oleh jalankan() agar tidak dikerjakan dua kali bersamaan
+_dipegang = set()
+
+
+def buat_tabel(cursor):
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {TABEL_JURNAL} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        operasi TEXT NOT NULL,
+        nik TEXT NOT NULL,
+        argumen TEXT NOT NULL,
+        pemilik TEXT NOT NULL,
+        dibuat REAL NOT NULL,
+        percobaan INTEGER NOT NULL DEFAULT 0,
+        pesan TEXT
+    )
+    """)
+
+
+def catat(conn, langkah):
+    """
+    Mencatat langkah (operasi, nik, argumen_dict) ke jurnal. Harus dipanggil
+    di dalam transaksi perubahan data yang bersangkutan. Mengembalikan id
+    entri (urutan eksekusi).
+    """
+    sekarang = time.time()
+    ids = []
+    for operasi, nik, argumen in langkah:
+        cursor = conn.execute(
+            f"INSERT INTO {TABEL_JURNAL} (operasi, nik, argumen, pemilik, dibuat) VALUES (?, ?, ?, ?, ?)",
+            (operasi, nik, json.dumps(argumen, ensure_ascii=False), PEMILIK, sekarang)
+        )
+        ids.append(cursor.lastrowid)
+    return ids
+
+
+def pegang(conn, langkah):
+    """
+    Seperti catat(), dalam transaksinya sendiri, untuk langkah yang
+    dikerjakan pemanggil sendiri (mis. antrean salin GUI dengan progres dan
+    pembatalan) dan bukan lewat jalankan(). Entri tetap di jurnal sampai
+    lepas(); jika proses berhenti lebih dulu, entri dipulihkan saat
+    aplikasi dibuka lagi. Mengembalikan id entri.
+    """
+    with conn:
+        ids = catat(conn, langkah)
+        # Ditandai sebelum commit: jalankan() di thread lain tidak pernah melihatnya bebas
+        _dipegang.update(ids)
+    return ids
+
+
+def lepas(conn, id_entri, pesan_gagal=None):
+    """
+    Mengakhiri entri dari pegang(). Tanpa `pesan_gagal` entri dihapus
+    (selesai atau dibatalkan pengguna); dengan `pesan_gagal` entri ditandai
+    gagal dan diulang saat pemulihan.
+    """
+    try:
+        with conn:
+            if pesan_gagal is None:
+                conn.execute(f"DELETE FROM {TABEL_JURNAL} WHERE id = ?", (id_entri,))
+            else:
+                conn.execute(
+                    f"UPDATE {TABEL_JURNAL} SET percobaan = percobaan + 1, pesan = ? WHERE id = ?",
+                    (pesan_gagal, id_entri)
+                )
+    finally:
+        _dipegang.discard(id_entri)
+
+
+def _kerjakan(conn, entri, pelaksana, pemulihan):
+    """Menjalankan satu entri; dihapus jika berhasil, dicatat gagal jika tidak."""
+    fungsi = pelaksana.get(entri['operasi'])
+    try:
+        if fungsi is None:
+            raise ValueError(f"Operasi jurnal tidak dikenal: {entri['operasi']}")
+        tindakan = fungsi(entri['nik'], pemulihan=pemulihan, **json.loads(entri['argumen']))
+    except Exception as e:
+        with conn:
+            if entri['percobaan'] + 1 >= MAKS_PERCOBAAN:
+                conn.execute(f"DELETE FROM {TABEL_JURNAL} WHERE id = ?", (entri['id'],))
+                return False, f"{e} (dibuang setelah {MAKS_PERCOBAAN} percobaan)"
+            conn.execute(
+                f"UPDATE {TABEL_JURNAL} SET percobaan = percobaan + 1, pesan = ? WHERE id = ?",
+                (str(e), entri['id'])
+            )
+        return False, str(e)
+    with conn:
+        conn.execute(f"DELETE FROM {TABEL_JURNAL} WHERE id = ?", (entri['id'],))
+    return True, tindakan
+
+
+def jalankan(conn, pelaksana, ids=None):
+    """
+    Mengerjakan entri milik proses ini (semua, atau hanya `ids`) berurutan.
+    Mengembalikan daftar (entri, pesan_error) untuk langkah yang gagal;
+    entri yang gagal tetap di jurnal dan dicoba lagi saat pemulihan.
+    """
+    with _kunci:
+        sql = f"SELECT * FROM {TABEL_JURNAL} WHERE pemilik = ? AND percobaan = 0"
+        params = [PEMILIK]
+        if ids is not None:
+            if not ids:
+                return []
+            sql += f" AND id IN ({', '.join(['?'] * len(ids))})"
+            params += list(ids)
+        gagal = []
+        for entri in conn.execute(sql + " ORDER BY id", params).fetchall():
+            if entri['id'] in _dipegang:
+                continue
+            success, pesan = _kerjakan(conn, entri, pelaksana, pemulihan=False)
+            if not success:
+                print(f"Langkah jurnal {entri['operasi']} ({entri['nik']}) gagal: {pesan}")
+                gagal.append((entri, pesan))
+        return gagal
+
+
+def _proses_hidup(pid):
+    """True jika proses `pid` di komputer ini masih berjalan."""
+    if os.name == 'nt':
+        # os.kill(pid, 0) di Windows justru menghentikan proses
+        import ctypes
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return ctypes.get_last_error() == 5  # ERROR_ACCESS_DENIED: ada, milik pengguna lain
+        try:
+            kode = ctypes.c_ulong()
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(kode))) and kode.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _pemilik_berhenti(pemilik, umur_detik, umur_min_detik):
+    """
+    True jika proses pemilik entri sudah tidak berjalan. Di komputer ini
+    dicek langsung lewat PID (instans lain, termasuk cli.py, bisa sedang
+    mengerjakan entrinya); untuk komputer lain hanya bisa ditebak dari umur
+    entri yang lebih dari `umur_min_detik`.
+    """
+    host, _, pid = pemilik.rpartition(':')
+    if host == _HOST and pid.isdigit():
+        return not _proses_hidup(int(pid))
+    return umur_detik > umur_min_detik
+
+
+def tertinggal(conn, umur_min_detik):
+    """
+    Entri yang perlu dipulihkan: milik proses lain yang sudah berhenti
+    (lihat _pemilik_berhenti); entri proses yang masih hidup tidak diambil alih.
+    """
+    sekarang = time.time()
+    return [
+        entri for entri in conn.execute(f"SELECT * FROM {TABEL_JURNAL} ORDER BY id").fetchall()
+        if entri['pemilik'] != PEMILIK
+        and _pemilik_berhenti(entri['pemilik'], sekarang - entri['dibuat'], umur_min_detik)
+    ]
+
+
+def pulihkan(conn, pelaksana, umur_min_detik):
+    """
+    Mengulang (atau membatalkan, sesuai fungsi langkahnya) entri yang
+    tertinggal. Mengembalikan laporan: list dict (id, operasi, nik, waktu,
+    berhasil, tindakan).
+    """
+    with _kunci:
+        laporan = []
+        for entri in tertinggal(conn, umur_min_detik):
+            success, tindakan = _kerjakan(conn, entri, pelaksana, pemulihan=True)
+            laporan.append({
+                'id': entri['id'],
+                'operasi': entri['operasi'],
+                'nik': entri['nik'],
+                'waktu': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entri['dibuat'])),
+                'berhasil': success,
+                'tindakan': tindakan,
+            })
+        return laporan
+
+
+def format_laporan(laporan):
+    """Satu baris teks per entri laporan pemulihan."""
+    return [
+        f"[{e['waktu']}] {e['operasi']} NIK {e['nik']}: "
+        f"{e['tindakan'] if e['berhasil'] else 'GAGAL - ' + e['tindakan']}"
+        for e in laporan
+    ]
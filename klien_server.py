@@ -0,0 +1,412 @@
+# klien_server.py
+# Backend klien untuk mode server (lihat server.py). pasang() mengganti
+# fungsi db_manager yang dipakai GUI dengan versi yang memanggil API HTTP,
+# sehingga widget, model, dan worker tidak perlu diubah: semuanya tetap
+# memanggil db_manager.<fungsi> dan menerima (success, data) yang sama.
+#
+# Dokumen tetap dibuka dari folder lokal (BASE_DOC_FOLDER di folder kerja
+# workstation), yang berfungsi sebagai cermin (mirror) folder di server:
+#   - cermin_dokumen mengunduh file yang belum ada / berbeda ukuran-mtime-nya
+#     (dipanggil GUI lewat MirrorWorker, tidak di thread GUI),
+#   - simpan_dokumen mengunggah ke server lalu menyimpan salinan lokal,
+#   - update_data, delete_data, dan hapus_permanen menerapkan rename/hapus
+#     yang sama ke cermin lokal.
+# Modul ini tidak mengimpor PyQt6.
+
+import http.client
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+import db_manager
+import doc_manager
+import instrumentasi
+from config import PORT_SERVER
+
+# Batas waktu koneksi (detik); operasi berat (VACUUM, reindex) bisa lama
+BATAS_WAKTU = 300
+
+# Batas waktu pengecekan versi data (detik); dipanggil berkala dari thread GUI
+BATAS_WAKTU_VERSI = 2
+
+# Ukuran potongan saat mengalirkan file (byte)
+UKURAN_POTONGAN = 1024 * 1024
+
+
+class GalatServer(Exception):
+    """Server membalas dengan status selain 200."""
+
+
+class BarisJarak(tuple):
+    """
+    Pengganti sqlite3.Row untuk hasil dari server: tuple yang juga bisa
+    diindeks dengan nama kolom dan punya keys(), sehingga tuple(row),
+    row['nik'], dan dict(row) bekerja seperti pada sqlite3.Row.
+    """
+
+    def __new__(cls, kolom, nilai):
+        baris = super().__new__(cls, nilai)
+        baris._kolom = kolom
+        return baris
+
+    def __getitem__(self, kunci):
+        if isinstance(kunci, str):
+            try:
+                kunci = self._kolom.index(kunci)
+            except ValueError:
+                raise IndexError(f"No item with that key: {kunci}")
+        return super().__getitem__(kunci)
+
+    def keys(self):
+        return list(self._kolom)
+
+
+def dekode(nilai):
+    """Kebalikan server.enkode."""
+    if isinstance(nilai, dict):
+        if '$baris' in nilai:
+            kolom = nilai['$baris']
+            if 'daftar' in nilai:
+                return [BarisJarak(kolom, v) for v in nilai['daftar']]
+            return BarisJarak(kolom, nilai['nilai'])
+        return {k: dekode(v) for k, v in nilai.items()}
+    if isinstance(nilai, list):
+        return [dekode(v) for v in nilai]
+    return nilai
+
+
+def _ke_json(nilai):
+    """Argumen yang tidak bisa di-JSON-kan langsung (set, sqlite3.Row)."""
+    if isinstance(nilai, (set, frozenset)):
+        return sorted(nilai)
+    if isinstance(nilai, (sqlite3.Row, BarisJarak)):
+        return dict(zip(nilai.keys(), nilai))
+    raise TypeError(f"Tidak bisa dikirim ke server: {type(nilai).__name__}")
+
+
+class KlienServer:
+    """Koneksi HTTP keep-alive ke server.py, satu per thread."""
+
+    def __init__(self, alamat, token=None):
+        bagian = urlsplit(alamat if "://" in alamat else f"http://{alamat}")
+        self.host = bagian.hostname
+        self.port = bagian.port or PORT_SERVER
+        self.token = token
+        # ident thread -> koneksi (seperti db_manager: data threading.local
+        # di thread QThreadPool hilang setiap kali run() selesai)
+        self._per_thread = {}
+        self._kunci = threading.Lock()
+
+    def _koneksi(self):
+        conn = self._per_thread.get(threading.get_ident())
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=BATAS_WAKTU)
+            with self._kunci:
+                self._per_thread[threading.get_ident()] = conn
+        return conn
+
+    def tutup(self):
+        with self._kunci:
+            for conn in self._per_thread.values():
+                conn.close()
+            self._per_thread.clear()
+
+    def _headers(self, tambahan=None):
+        headers = dict(tambahan or {})
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        return headers
+
+    def kirim(self, metode, path, body=None, headers=None, batas_waktu=BATAS_WAKTU):
+        """
+        Mengirim permintaan dan mengembalikan objek respons yang belum
+        dibaca. Koneksi keep-alive yang sudah diputus server dicoba ulang
+        sekali dengan koneksi baru (body berupa file tidak bisa diulang).
+        `batas_waktu` berlaku untuk permintaan ini saja (termasuk membaca respons).
+        """
+        for percobaan in range(2):
+            conn = self._koneksi()
+            conn.timeout = batas_waktu
+            if conn.sock is not None:
+                conn.sock.settimeout(batas_waktu)
+            try:
+                conn.request(metode, path, body=body, headers=self._headers(headers))
+                return conn.getresponse()
+            except (ConnectionError, http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                    http.client.BadStatusLine):
+                self._putus()
+                if percobaan or hasattr(body, 'read'):
+                    raise
+            except BaseException:
+                # Mis. unggahan dibatalkan di tengah body: koneksi tidak bisa dipakai ulang
+                self._putus()
+                raise
+
+    def _putus(self):
+        with self._kunci:
+            conn = self._per_thread.pop(threading.get_ident(), None)
+        if conn is not None:
+            conn.close()
+
+    def json(self, metode, path, data=None, batas_waktu=BATAS_WAKTU):
+        body = json.dumps(data, default=_ke_json).encode('utf-8') if data is not None else None
+        resp = self.kirim(metode, path, body, {'Content-Type': 'application/json'} if body else None, batas_waktu)
+        try:
+            isi = json.loads(resp.read() or b"{}")
+        except BaseException:
+            # Mis. batas waktu habis di tengah respons: koneksi tidak sinkron lagi
+            self._putus()
+            raise
+        if resp.status != 200:
+            raise GalatServer(isi.get('error', f"HTTP {resp.status}"))
+        return isi
+
+    def panggil(self, nama, *args, **kwargs):
+        """Memanggil db_manager.<nama> di server; hasil tuple dikembalikan sebagai tuple."""
+        hasil = dekode(self.json('POST', f"/api/{nama}", {'args': args, 'kwargs': kwargs})['hasil'])
+        return tuple(hasil) if isinstance(hasil, list) and not isinstance(hasil, BarisJarak) else hasil
+
+    def alirkan_data(self, kwargs, cancel_check=None):
+        """Generator batch baris dari POST /stream/iter_data."""
+        resp = self.kirim('POST', "/stream/iter_data", json.dumps({'kwargs': kwargs}).encode('utf-8'),
+                          {'Content-Type': 'application/json'})
+        if resp.status != 200:
+            raise GalatServer(json.loads(resp.read() or b"{}").get('error', f"HTTP {resp.status}"))
+        kolom = kwargs.get('columns') or db_manager.KOLOM_DB
+        try:
+            for baris in resp:
+                if cancel_check is not None and cancel_check():
+                    raise sqlite3.OperationalError("interrupted")
+                data = json.loads(baris)
+                if isinstance(data, dict):
+                    raise GalatServer(data.get('error'))
+                yield [BarisJarak(kolom, v) for v in data]
+        finally:
+            if not resp.isclosed():
+                # Respons belum habis: koneksi tidak bisa dipakai ulang
+                resp.close()
+                self._putus()
+
+    def unduh(self, nik, filename, tujuan):
+        """Mengunduh satu dokumen ke `tujuan` (atomik lewat file .part)."""
+        resp = self.kirim('GET', f"/dokumen/{quote(nik)}/{quote(filename)}")
+        if resp.status != 200:
+            raise GalatServer(json.loads(resp.read() or b"{}").get('error', f"HTTP {resp.status}"))
+        tujuan = Path(tujuan)
+        tujuan.parent.mkdir(parents=True, exist_ok=True)
+        sementara = tujuan.parent / f".{tujuan.name}.part"
+        try:
+            with open(sementara, 'wb') as f:
+                while potongan := resp.read(UKURAN_POTONGAN):
+                    f.write(potongan)
+            doc_manager.ganti_file(sementara, tujuan)
+        finally:
+            if sementara.exists():
+                sementara.unlink()
+        mtime = resp.getheader('X-Mtime')
+        if mtime:
+            os.utime(tujuan, (float(mtime), float(mtime)))
+
+    def unggah(self, source_path, nik, filename, progress_cb=None, cancel_check=None):
+        """Mengunggah satu file ke folder NIK di server; mengembalikan info (ukuran, mtime, hash)."""
+        total = os.path.getsize(source_path)
+        with open(source_path, 'rb') as f:
+            resp = self.kirim(
+                'PUT', f"/dokumen/{quote(nik)}/{quote(filename)}",
+                _FileTerpantau(f, total, progress_cb, cancel_check),
+                {'Content-Length': str(total), 'Content-Type': 'application/octet-stream'},
+            )
+        isi = json.loads(resp.read() or b"{}")
+        if resp.status != 200:
+            raise GalatServer(isi.get('error', f"HTTP {resp.status}"))
+        return isi['hasil']
+
+
+class _FileTerpantau:
+    """Pembungkus file untuk body unggahan: melaporkan progres dan bisa dibatalkan."""
+
+    def __init__(self, f, total, progress_cb, cancel_check):
+        self.f = f
+        self.total = total
+        self.progress_cb = progress_cb
+        self.cancel_check = cancel_check
+        self.terkirim = 0
+
+    def read(self, n=-1):
+        if self.cancel_check is not None and self.cancel_check():
+            raise doc_manager.SalinanDibatalkan()
+        potongan = self.f.read(UKURAN_POTONGAN if n is None or n < 0 else n)
+        self.terkirim += len(potongan)
+        if self.progress_cb is not None:
+            self.progress_cb(self.terkirim, self.total)
+        return potongan
+
+
+# --- PEMASANGAN KE db_manager / doc_manager ---
+def _pesan_tidak_terhubung(e):
+    return f"Server tidak dapat dihubungi: {e}"
+
+
+def _jarak(klien, nama):
+    """Fungsi pengganti db_manager.<nama> yang memanggil server."""
+    def fungsi(*args, **kwargs):
+        try:
+            return klien.panggil(nama, *args, **kwargs)
+        except GalatServer as e:
+            return False, str(e)
+        except OSError as e:
+            return False, _pesan_tidak_terhubung(e)
+    fungsi.__name__ = nama
+    return fungsi
+
+
+def _cermin_dokumen(klien, nik, dokumen):
+    """Mengunduh dokumen yang belum ada / berbeda di folder lokal; mengembalikan jumlah yang diunduh."""
+    folder = doc_manager.folder_dokumen(nik)
+    diunduh = 0
+    for doc in dokumen:
+        path = folder / doc['filename']
+        try:
+            st = path.stat()
+            if st.st_size == doc['ukuran'] and abs(st.st_mtime - doc['mtime']) < 1:
+                continue
+        except FileNotFoundError:
+            pass
+        try:
+            klien.unduh(nik, doc['filename'], path)
+            diunduh += 1
+        except (GalatServer, OSError) as e:
+            print(f"Gagal mengunduh {doc['filename']}: {e}")
+    return diunduh
+
+
+def _rapikan_cermin(fungsi, *args):
+    """Menerapkan hapus ke cermin lokal; kegagalannya tidak membatalkan hasil dari server."""
+    try:
+        fungsi(*args)
+    except OSError as e:
+        print(f"Gagal merapikan cermin dokumen lokal: {e}")
+
+
+def pasang(alamat, token=None):
+    """
+    Mengalihkan db_manager ke server di `alamat` (mis. http://server:8765).
+    Dipanggil sekali sebelum GUI memakai database. Mengembalikan KlienServer.
+    """
+    klien = KlienServer(alamat, token)
+    simpan_lokal = doc_manager.simpan_dokumen
+
+    def init_db(progress_cb=None, cancel_check=None):
+        try:
+            status = klien.json('GET', "/status")
+        except (GalatServer, OSError) as e:
+            return False, _pesan_tidak_terhubung(e)
+        Path(db_manager.BASE_DOC_FOLDER).mkdir(exist_ok=True)
+        return True, f"Terhubung ke server {alamat} (skema v{status['versi_skema']})."
+
+    def get_data_version():
+        # Nomor urut log perubahan terakhir di server; naik di setiap commit.
+        # Batas waktu pendek: dipanggil berkala dari thread GUI
+        return klien.json('GET', "/versi", batas_waktu=BATAS_WAKTU_VERSI)['versi']
+
+    def iter_data(search_term="", columns=None, batch_size=1000, cancel_check=None, filters=None):
+        kwargs = {'search_term': search_term, 'columns': columns, 'batch_size': batch_size,
+                  'filters': filters}
+        yield from klien.alirkan_data(kwargs, cancel_check)
+
+    def catat_dokumen(nik, filenames):
+        # Server sudah mencatat dokumen saat unggahan selesai
+        return True, len(filenames)
+
+    def cermin_dokumen(nik, dokumen):
+        try:
+            return True, _cermin_dokumen(klien, nik, dokumen)
+        except (ValueError, OSError) as e:
+            return False, f"Gagal menyamakan dokumen lokal: {e}"
+
+    def unggah_semua(hasil, data, awalan, skip_existing):
+        # Pengganti salin_semua untuk copy_files=True: file diunggah satu per satu
+        gagal = []
+        rencana = doc_manager.rencana_salinan(data['nik'], data.get('files_to_add', set()), skip_existing)
+        for source_path, dest_path in rencana:
+            try:
+                simpan_dokumen(source_path, dest_path)
+            except Exception as e:
+                gagal.append(f"{Path(source_path).name}: {e}")
+        if gagal:
+            return True, f"{awalan}, tetapi beberapa dokumen gagal diunggah:\n" + "\n".join(gagal)
+        return hasil
+
+    def save_data(data, copy_files=True):
+        hasil = _jarak(klien, 'save_data')(data, copy_files=False)
+        if hasil[0] and copy_files:
+            return unggah_semua(hasil, data, "Data tersimpan", skip_existing=False)
+        return hasil
+
+    # jalankan_berkas diabaikan: jurnal folder dikerjakan server saat itu juga
+    def update_data(id_to_update, data, copy_files=True, jalankan_berkas=True):
+        hasil = _jarak(klien, 'update_data')(id_to_update, data, copy_files=False)
+        if hasil[0]:
+            baru = doc_manager.folder_dokumen(data.get('nik'))
+            if doc_manager.nik_valid(data.get('old_nik')):
+                lama = doc_manager.folder_dokumen(data.get('old_nik'))
+                if lama != baru and lama.exists() and not baru.exists():
+                    os.rename(lama, baru)
+            for filename in data.get('files_to_remove', set()):
+                _rapikan_cermin(doc_manager.hapus_dokumen, baru, filename)
+            if copy_files:
+                return unggah_semua(hasil, data, "Data diperbarui", skip_existing=True)
+        return hasil
+
+    def delete_data(id_to_delete, data_row=None, jalankan_berkas=True):
+        if data_row is None:
+            success, data_row = _jarak(klien, 'get_data_by_id')(id_to_delete)
+            if not success:
+                return False, "Data tidak ditemukan untuk dihapus."
+        hasil = _jarak(klien, 'delete_data')(id_to_delete)
+        if hasil[0] and doc_manager.nik_valid(data_row['nik']):
+            _rapikan_cermin(doc_manager.hapus_folder, doc_manager.folder_dokumen(data_row['nik']))
+        return hasil
+
+    def hapus_permanen(ids, jalankan_berkas=True):
+        hasil = _jarak(klien, 'hapus_permanen')(ids)
+        if hasil[0]:
+            for nik in filter(doc_manager.nik_valid, hasil[1]):
+                _rapikan_cermin(doc_manager.hapus_folder, doc_manager.folder_dokumen(nik))
+        return hasil
+
+    def close_connections():
+        klien.tutup()
+
+    def simpan_dokumen(source_path, dest_path, progress_cb=None, cancel_check=None):
+        dest_path = Path(dest_path)
+        klien.unggah(source_path, dest_path.parent.name, dest_path.name, progress_cb, cancel_check)
+        return simpan_lokal(source_path, dest_path)
+
+    lokal = {
+        'init_db': init_db, 'get_data_version': get_data_version, 'iter_data': iter_data,
+        'catat_dokumen': catat_dokumen, 'cermin_dokumen': cermin_dokumen, 'save_data': save_data,
+        'update_data': update_data, 'delete_data': delete_data, 'hapus_permanen': hapus_permanen,
+    }
+    for nama in lokal:
+        setattr(db_manager, nama, instrumentasi.terukur(lokal[nama], nama))
+    for nama in (server_fungsi() - set(lokal)):
+        setattr(db_manager, nama, instrumentasi.terukur(_jarak(klien, nama), nama))
+    db_manager.perlu_migrasi = lambda: False  # Migrasi dijalankan oleh server
+    db_manager.jalankan_jurnal = lambda ids=None: []  # Jurnal folder dikerjakan server
+    # Unggahan dokumen tidak dijurnal: yang terputus diulang dari antrean salin
+    db_manager.mulai_salinan = lambda source_path, dest_path: None
+    db_manager.akhiri_salinan = lambda id_jurnal, pesan_gagal=None: None
+    db_manager.bersihkan_sampah = lambda *args, **kwargs: (True, (0, False))  # Dibersihkan server
+    db_manager.close_connections = close_connections
+    doc_manager.simpan_dokumen = simpan_dokumen
+    return klien
+
+
+def server_fungsi():
+    """Nama fungsi db_manager yang tersedia lewat /api (sama dengan server.py)."""
+    import server
+    return server.FUNGSI_BACA | server.FUNGSI_TULIS
@@ -1,20 +1,23 @@
 # main.py
 # File utama untuk menjalankan aplikasi
 
+import startup_timing  # Paling awal: titik nol laporan waktu startup
+
 import sys
 import os
-from dotenv import load_dotenv, set_key
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QStackedWidget, QMessageBox,
-    QInputDialog, QLineEdit
+    QInputDialog, QLineEdit, QSplashScreen
 )
-from PyQt6.QtGui import QAction, QFont
+from PyQt6.QtGui import QAction, QFont, QPixmap
+from PyQt6.QtCore import Qt, QTimer, QThreadPool
 
 import db_manager
-from form_widget import FormWidget
-from view_widget import ViewWidget
-from detail_widget import DetailWidget
-from about_dialog import AboutDialog # <-- IMPORT BARU
+from config import RETENSI_SAMPAH_HARI, INTERVAL_PEMBERSIH_MENIT
+from repository import repo
+from migration_dialog import PersiapanDatabase
+# Halaman dan dialog lain diimpor saat pertama kali dibuka (lihat properti
+# halaman di MainWindow) agar tidak memperlambat startup
 
 # Tentukan nama file env
 ENV_FILE_PATH = ".myenv"
@@ -22,10 +25,24 @@ ENV_FILE_PATH = ".myenv"
 
 class MainWindow(QMainWindow):
     """Jendela utama aplikasi."""
+
+    # Jeda (ms) setelah startup sebelum pembersih Tempat Sampah pertama berjalan
+    PURGE_START_DELAY_MS = 60 * 1000
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle('Aplikasi Pendaftaran NPWP')
         self.setGeometry(100, 100, 800, 700)
+
+        # --- PEMBERSIH TEMPAT SAMPAH (LATAR BELAKANG) ---
+        self.purge_pool = QThreadPool(self)
+        self.purge_pool.setMaxThreadCount(1)
+        self.purge_pool.setExpiryTimeout(-1)  # Koneksi DB per thread: thread tidak diganti (lihat db_manager)
+        self.purge_worker = None
+        self.purge_timer = QTimer(self)
+        self.purge_timer.setInterval(INTERVAL_PEMBERSIH_MENIT * 60 * 1000)
+        self.purge_timer.timeout.connect(self.start_trash_purge)
+        # --- AKHIR PEMBERSIH ---
         
         self.setup_main_widgets() 
         self.setup_menu()         
@@ -38,6 +55,19 @@ class MainWindow(QMainWindow):
         
         file_menu = menu_bar.addMenu('File')
         
+        import_action = QAction('Impor Massal (CSV/JSONL)...', self)
+        import_action.triggered.connect(self.show_import_dialog)
+        file_menu.addAction(import_action)
+        
+        reindex_action = QAction('Bangun Ulang Indeks Pencarian', self)
+        reindex_action.triggered.connect(self.rebuild_search_index)
+        file_menu.addAction(reindex_action)
+
+        reconcile_action = QAction('Sinkronkan Indeks Dokumen', self)
+        reconcile_action.triggered.connect(self.reconcile_documents)
+        file_menu.addAction(reconcile_action)
+        file_menu.addSeparator()
+        
         exit_action = QAction('Keluar', self)
         exit_action.triggered.connect(self.close)
         file_menu.addAction(exit_action)
@@ -49,44 +79,161 @@ class MainWindow(QMainWindow):
         view_data_action = QAction('Lihat Data Pendaftaran', self)
         view_data_action.triggered.connect(self.show_view_page)
         nav_menu.addAction(view_data_action)
+        trash_action = QAction('Tempat Sampah', self)
+        trash_action.triggered.connect(self.show_trash_dialog)
+        nav_menu.addAction(trash_action)
 
         # --- MENU BARU ---
         help_menu = menu_bar.addMenu('Bantuan')
         about_action = QAction('Tentang Aplikasi', self)
         about_action.triggered.connect(self.show_about_dialog)
         help_menu.addAction(about_action)
+        startup_action = QAction('Waktu Startup', self)
+        startup_action.triggered.connect(self.show_startup_timing)
+        help_menu.addAction(startup_action)
+        diagnostics_action = QAction('Diagnostik', self)
+        diagnostics_action.triggered.connect(self.show_diagnostics)
+        help_menu.addAction(diagnostics_action)
         # --- AKHIR PERUBAHAN ---
 
     def setup_main_widgets(self):
         self.stacked_widget = QStackedWidget()
-        self.form_page = FormWidget()
-        self.view_page = ViewWidget()
-        self.detail_page = DetailWidget()
-        self.stacked_widget.addWidget(self.form_page)
-        self.stacked_widget.addWidget(self.view_page)
-        self.stacked_widget.addWidget(self.detail_page)
         self.setCentralWidget(self.stacked_widget)
-        self.form_page.data_saved.connect(self.handle_data_saved)
-        self.view_page.edit_requested.connect(self.handle_edit_request)
-        self.view_page.delete_requested.connect(self.handle_delete_request)
-        self.view_page.detail_requested.connect(self.handle_detail_request)
-        self.detail_page.back_requested.connect(self.show_view_page)
+        # Halaman dibuat saat pertama kali dibutuhkan (lihat properti di bawah),
+        # jadi hanya halaman pertama yang dibangun sebelum jendela tampil
+        self._form_page = None
+        self._view_page = None
+        self._detail_page = None
+        self._diagnostics_dialog = None
+
+    # --- HALAMAN (DIBUAT SAAT PERTAMA DIBUKA) ---
+    @property
+    def form_page(self):
+        if self._form_page is None:
+            from form_widget import FormWidget
+            self._form_page = FormWidget()
+            self.stacked_widget.addWidget(self._form_page)
+            self._form_page.data_saved.connect(self.handle_data_saved)
+            startup_timing.tandai("Halaman formulir dibuat")
+        return self._form_page
+
+    @property
+    def view_page(self):
+        if self._view_page is None:
+            from view_widget import ViewWidget
+            self._view_page = ViewWidget()
+            self.stacked_widget.addWidget(self._view_page)
+            self._view_page.edit_requested.connect(self.handle_edit_request)
+            self._view_page.delete_requested.connect(self.handle_delete_request)
+            self._view_page.detail_requested.connect(self.handle_detail_request)
+            self._view_page.trash_requested.connect(self.show_trash_dialog)
+            startup_timing.tandai("Halaman daftar dibuat")
+        return self._view_page
+
+    @property
+    def detail_page(self):
+        if self._detail_page is None:
+            from detail_widget import DetailWidget
+            self._detail_page = DetailWidget()
+            self.stacked_widget.addWidget(self._detail_page)
+            self._detail_page.back_requested.connect(self.show_view_page)
+            startup_timing.tandai("Halaman detail dibuat")
+        return self._detail_page
+
+    def _refresh_view_page(self):
+        """Memperbarui halaman daftar hanya jika sudah pernah dibuat."""
+        if self._view_page is not None:
+            self._view_page.refresh_changes()
+    # --- AKHIR HALAMAN ---
     
     # --- FUNGSI BARU ---
     def show_about_dialog(self):
         """Menampilkan dialog 'Tentang Aplikasi'."""
         try:
+            from about_dialog import AboutDialog
             dialog = AboutDialog(self)
             dialog.exec()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Gagal membuka dialog: {e}")
     # --- AKHIR FUNGSI BARU ---
+
+    def show_startup_timing(self):
+        """Menampilkan laporan waktu startup aplikasi."""
+        QMessageBox.information(
+            self, "Waktu Startup",
+            f"<pre>{startup_timing.laporan()}</pre>"
+        )
     
+    def show_diagnostics(self):
+        """Menampilkan panel diagnostik (statistik waktu kueri, kueri lambat)."""
+        if self._diagnostics_dialog is None:
+            from diagnostics_dialog import DiagnosticsDialog
+            self._diagnostics_dialog = DiagnosticsDialog(self)
+        self._diagnostics_dialog.show()
+        self._diagnostics_dialog.raise_()
+
+    def show_import_dialog(self):
+        """Menampilkan dialog impor massal CSV/JSONL."""
+        from import_dialog import ImportDialog
+        dialog = ImportDialog(self)
+        dialog.data_imported.connect(self._refresh_view_page)
+        dialog.exec()
+
+    def rebuild_search_index(self):
+        """Membangun ulang indeks pencarian FTS5 atas permintaan pengguna."""
+        success, message = db_manager.rebuild_search_index()
+        if success:
+            QMessageBox.information(self, "Sukses", message)
+            if self._view_page is not None:
+                self._view_page.load_data()
+        else:
+            QMessageBox.critical(self, "Error", message)
+
+    def reconcile_documents(self):
+        """Menyamakan tabel dokumen dengan isi folder dokumen_npwp."""
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            success, hasil = db_manager.reconcile_dokumen()
+        finally:
+            QApplication.restoreOverrideCursor()
+        if success:
+            QMessageBox.information(
+                self, "Sukses",
+                f"Indeks dokumen disinkronkan: {hasil['ditambah']} ditambah, "
+                f"{hasil['diperbarui']} diperbarui, {hasil['dihapus']} dihapus."
+            )
+        else:
+            QMessageBox.critical(self, "Error", hasil)
+
+    def closeEvent(self, event):
+        """Memastikan penyalinan dokumen tidak terputus tanpa konfirmasi."""
+        copy_manager = self._form_page.copy_manager if self._form_page is not None else None
+        if copy_manager is not None and copy_manager.pending_count():
+            reply = QMessageBox.question(
+                self, "Penyalinan Belum Selesai",
+                f"Masih ada {copy_manager.pending_count()} dokumen yang sedang disalin.\n\n"
+                f"Batalkan penyalinan dan keluar?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                event.ignore()
+                return
+            copy_manager.cancel_all()
+            copy_manager.wait_for_done()
+        # Pembersih berhenti setelah batch yang sedang berjalan (sisanya dilanjutkan nanti)
+        self.purge_timer.stop()
+        if self.purge_worker is not None:
+            self.purge_worker.cancel()
+        self.purge_pool.waitForDone()
+        super().closeEvent(event)
+
     def navigate_to_form_page(self):
         self.stacked_widget.setCurrentWidget(self.form_page)
 
     def show_view_page(self):
-        self.view_page.load_data() 
+        # Hanya baris yang berubah sejak terakhir dilihat yang diperbarui
+        self.view_page.refresh_changes()
         self.stacked_widget.setCurrentWidget(self.view_page)
         self.setWindowTitle('Aplikasi Pendaftaran NPWP - Lihat Data')
 
@@ -108,35 +255,148 @@ class MainWindow(QMainWindow):
         self.stacked_widget.setCurrentWidget(self.detail_page)
         self.setWindowTitle(f'Aplikasi Pendaftaran NPWP - Detail Data (ID: {user_id})')
 
-    def handle_delete_request(self, user_id):
-        success, data = db_manager.get_data_by_id(user_id)
-        if not success:
-            QMessageBox.critical(self, "Error", data)
-            return
-        nama = data['nama']; nik = data['nik']
+    def handle_delete_request(self, user_ids):
+        """Memindahkan satu atau beberapa data terpilih ke Tempat Sampah."""
+        if len(user_ids) == 1:
+            success, data = repo.get_by_id(user_ids[0])
+            if not success:
+                QMessageBox.critical(self, "Error", data)
+                return
+            pertanyaan = f"Pindahkan data berikut ke Tempat Sampah?\n\nNama: {data['nama']}\nNIK: {data['nik']}"
+        else:
+            pertanyaan = f"Pindahkan {len(user_ids)} data terpilih ke Tempat Sampah?"
         reply = QMessageBox.question(
             self, "Konfirmasi Hapus", 
-            f"Apakah Anda yakin ingin menghapus data:\n\nNama: {nama}\nNIK: {nik}\n\n"
-            f"Tindakan ini juga akan MENGHAPUS SELURUH FOLDER dokumen terkait secara permanen.",
+            f"{pertanyaan}\n\nData bisa dipulihkan dari Tempat Sampah selama {RETENSI_SAMPAH_HARI} hari. "
+            f"Setelah itu data dan SELURUH FOLDER dokumen terkait dihapus permanen.",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
             QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            success, message = db_manager.delete_data(user_id)
+            # Hanya menandai baris (satu transaksi); folder dokumen tidak disentuh
+            success, hasil = repo.pindahkan_ke_sampah(user_ids)
             if success:
-                QMessageBox.information(self, "Sukses", message)
-                self.view_page.load_data() 
+                self.view_page.refresh_changes()
+                QMessageBox.information(self, "Sukses", f"{hasil} data dipindahkan ke Tempat Sampah.")
             else:
-                QMessageBox.critical(self, "Error", message)
+                QMessageBox.critical(self, "Error", hasil)
+
+    def show_trash_dialog(self):
+        """Menampilkan Tempat Sampah (pulihkan / hapus permanen)."""
+        from trash_dialog import TrashDialog
+        dialog = TrashDialog(self)
+        dialog.data_restored.connect(self._refresh_view_page)
+        dialog.permanently_deleted.connect(self.run_pending_journal)
+        dialog.exec()
+
+    def run_pending_journal(self):
+        """
+        Mengerjakan langkah folder dokumen yang tertunda di jurnal (mis. hapus
+        folder setelah hapus permanen) di latar belakang; langkahnya sudah
+        tercatat bersama DELETE sehingga aman jika aplikasi ditutup.
+        """
+        from workers import JournalWorker
+        worker = JournalWorker()
+        worker.signals.finished.connect(self.on_journal_finished)
+        QThreadPool.globalInstance().start(worker)
+
+    def on_journal_finished(self, gagal):
+        if gagal:
+            QMessageBox.warning(
+                self, "Folder Dokumen",
+                "Beberapa langkah folder dokumen gagal dan akan diulang saat aplikasi dibuka lagi:\n\n"
+                + "\n".join(gagal)
+            )
+
+    def schedule_trash_purge(self):
+        """Menjadwalkan pembersih Tempat Sampah: sekali setelah startup, lalu berkala."""
+        QTimer.singleShot(self.PURGE_START_DELAY_MS, self.start_trash_purge)
+        self.purge_timer.start()
+
+    def start_trash_purge(self):
+        """Menghapus permanen data yang melewati masa simpan, di thread latar belakang."""
+        if self.purge_worker is not None:
+            return  # Masih berjalan
+        from workers import PurgeWorker
+        self.purge_worker = PurgeWorker()
+        self.purge_worker.signals.finished.connect(self.on_purge_finished)
+        self.purge_pool.start(self.purge_worker)
+
+    def on_purge_finished(self, jumlah, pesan):
+        self.purge_worker = None
+        if pesan:
+            print(pesan)
+        elif jumlah:
+            print(f"Pembersih Tempat Sampah: {jumlah} data melewati {RETENSI_SAMPAH_HARI} hari dan dihapus permanen.")
+
+    def show_recovery_report(self):
+        """Menampilkan langkah folder dokumen yang diperbaiki saat startup (jika ada)."""
+        laporan = db_manager.get_laporan_pemulihan()
+        if not laporan:
+            return
+        import jurnal
+        QMessageBox.information(
+            self, "Pemulihan Operasi Dokumen",
+            f"Aplikasi sebelumnya berhenti sebelum {len(laporan)} langkah folder dokumen selesai. "
+            f"Hasil penyelesaiannya sekarang (juga dicatat di pemulihan_jurnal.log):\n\n" + "\n".join(jurnal.format_laporan(laporan))
+        )
+
+def _path_aset(nama):
+    """Path file di folder assets, juga saat berjalan dari hasil build PyInstaller."""
+    dasar = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(dasar, 'assets', nama)
+
+def _startup_selesai():
+    startup_timing.tandai("Event loop berjalan")
+    if startup_timing.aktif():
+        print(startup_timing.laporan())
 
 # --- Main execution ---
 if __name__ == '__main__':
-    db_manager.init_db() 
+    startup_timing.tandai("Modul utama dimuat")
+    # Mode server: --server http://host:8765 (atau env NPWP_SERVER) memakai
+    # database di komputer server lewat API, bukan file .db lokal/SMB
+    alamat_server = os.environ.get("NPWP_SERVER")
+    if "--server" in sys.argv:
+        i = sys.argv.index("--server")
+        alamat_server = sys.argv[i + 1] if i + 1 < len(sys.argv) else None
+        del sys.argv[i:i + 2]
+    if alamat_server:
+        import klien_server
+        klien_server.pasang(alamat_server, os.environ.get("NPWP_SERVER_TOKEN"))
     app = QApplication(sys.argv)
+    # Thread kumpulan global tidak kedaluwarsa: koneksi DB per thread tetap
+    # dipakai ulang dan tidak bertambah (lihat db_manager.get_connection)
+    QThreadPool.globalInstance().setExpiryTimeout(-1)
+    # Tutup koneksi DB dengan rapi (PRAGMA optimize) saat aplikasi keluar
+    app.aboutToQuit.connect(db_manager.close_connections)
     app.setStyle("Fusion") 
     font = QFont()
     font.setPointSize(10)
     app.setFont(font)
+    startup_timing.tandai("QApplication dibuat")
+
+    splash = QSplashScreen(QPixmap(_path_aset("icon.png")).scaledToWidth(256, Qt.TransformationMode.SmoothTransformation))
+    splash.showMessage("Memuat aplikasi...", Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignHCenter)
+    splash.show()
+    app.processEvents()
+    startup_timing.tandai("Splash tampil")
+
+    # Migrasi skema (jika ada) tampil dengan dialog progres; jika tidak,
+    # init_db berjalan di latar belakang sementara jendela utama dibangun
+    persiapan_db = PersiapanDatabase()
+    persiapan_db.mulai(splash)
+    startup_timing.tandai("Pemeriksaan skema database")
     window = MainWindow()
+    startup_timing.tandai("Jendela utama dibuat")
+    if not persiapan_db.tunggu(splash):
+        sys.exit(1)
+    startup_timing.tandai("Database siap")
+
     window.show()
+    splash.finish(window)
+    startup_timing.tandai("Jendela tampil")
+    QTimer.singleShot(0, _startup_selesai)
+    QTimer.singleShot(0, window.show_recovery_report)
+    window.schedule_trash_purge()
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,139 @@
+# migrasi.py
+# Mesin migrasi skema database berbasis PRAGMA user_version.
+# Setiap langkah migrasi punya nomor versi urut; saat aplikasi dibuka hanya
+# langkah dengan nomor di atas user_version yang dijalankan, jadi DB yang
+# sudah terbaru hanya membaca satu PRAGMA. Pengisian data yang panjang
+# (backfill) dijalankan per potongan rentang id, masing-masing dalam
+# transaksi sendiri, dan posisinya disimpan di tabel TABEL_PROGRES sehingga
+# migrasi yang terputus (aplikasi ditutup, listrik padam) dilanjutkan dari
+# potongan terakhir. Modul ini sengaja tidak mengimpor PyQt6.
+
+# Tabel posisi pengisian yang sedang berjalan (satu baris per versi)
+TABEL_PROGRES = 'skema_migrasi'
+
+# Jumlah id per potongan pengisian (satu transaksi per potongan)
+UKURAN_POTONGAN = 5000
+
+
+class MigrasiDibatalkan(Exception):
+    """Dilempar saat cancel_check() bernilai True di antara potongan."""
+
+
+def versi_skema(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def versi_terbaru(langkah):
+    return langkah[-1][0] if langkah else 0
+
+
+def perlu_migrasi(conn, langkah):
+    return versi_skema(conn) < versi_terbaru(langkah)
+
+
+class KonteksLangkah:
+    """
+    Diberikan ke setiap fungsi langkah migrasi: koneksi, pelaporan progres,
+    dan pengisian bertahap yang bisa dilanjutkan.
+    """
+
+    def __init__(self, conn, versi, deskripsi, progress_cb=None, cancel_check=None):
+        self.conn = conn
+        self.versi = versi
+        self.deskripsi = deskripsi
+        self._progress_cb = progress_cb
+        self._cancel_check = cancel_check
+
+    def lapor(self, selesai, total, keterangan=None):
+        if self._progress_cb:
+            self._progress_cb(keterangan or self.deskripsi, selesai, total)
+
+    def cek_batal(self):
+        if self._cancel_check and self._cancel_check():
+            raise MigrasiDibatalkan()
+
+    def rencanakan_pengisian(self, batas):
+        """
+        Mencatat bahwa langkah ini perlu mengisi data sampai id `batas`.
+        Panggil di dalam transaksi yang sama dengan pembuatan tabel/kolom
+        tujuan, supaya crash di antaranya tidak meninggalkan tabel kosong
+        yang dianggap sudah terisi.
+        """
+        self.conn.execute(
+            f"INSERT OR IGNORE INTO {TABEL_PROGRES} (versi, posisi, batas) VALUES (?, 0, ?)",
+            (self.versi, batas or 0)
+        )
+
+    def ada_pengisian(self):
+        """True jika langkah ini punya pengisian yang belum selesai."""
+        return self._progres() is not None
+
+    def jalankan_pengisian(self, sql, ukuran=UKURAN_POTONGAN):
+        """
+        Menjalankan `sql` (dua parameter: id_mulai, id_akhir untuk rentang
+        id_mulai < id <= id_akhir) per potongan sampai batas yang direncanakan.
+        Tidak melakukan apa pun jika tidak ada pengisian yang direncanakan.
+        """
+        progres = self._progres()
+        if progres is None:
+            return
+        posisi, batas = progres
+        self.lapor(posisi, batas)
+        while posisi < batas:
+            self.cek_batal()
+            akhir = min(posisi + ukuran, batas)
+            with self.conn:
+                self.conn.execute(sql, (posisi, akhir))
+                self.conn.execute(
+                    f"UPDATE {TABEL_PROGRES} SET posisi = ? WHERE versi = ?", (akhir, self.versi)
+                )
+            posisi = akhir
+            self.lapor(posisi, batas)
+
+    def _progres(self):
+        return self.conn.execute(
+            f"SELECT posisi, batas FROM {TABEL_PROGRES} WHERE versi = ?", (self.versi,)
+        ).fetchone()
+
+
+def jalankan(conn, langkah, progress_cb=None, cancel_check=None):
+    """
+    Menjalankan langkah migrasi yang belum diterapkan, berurutan.
+    `langkah` adalah list (versi, deskripsi, fungsi(konteks)) dengan versi
+    naik. progress_cb(keterangan, selesai, total). Mengembalikan
+    (success, pesan). Langkah harus idempoten: jika terputus, langkah yang
+    sama dijalankan lagi dari awal (pengisian bertahap dilanjutkan).
+    """
+    versi = versi_skema(conn)
+    if versi >= versi_terbaru(langkah):
+        return True, "Skema database sudah terbaru."
+
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS {TABEL_PROGRES} (
+        versi INTEGER PRIMARY KEY,
+        posisi INTEGER NOT NULL,
+        batas INTEGER NOT NULL
+    )
+    """)
+    conn.commit()
+
+    try:
+        for nomor, deskripsi, fungsi in langkah:
+            if nomor <= versi:
+                continue
+            print(f"Menjalankan migrasi {nomor}: {deskripsi}...")
+            konteks = KonteksLangkah(conn, nomor, deskripsi, progress_cb, cancel_check)
+            konteks.cek_batal()
+            fungsi(konteks)
+            # user_version ikut transaksi, jadi versi dan progres selalu konsisten
+            with conn:
+                conn.execute(f"DELETE FROM {TABEL_PROGRES} WHERE versi = ?", (nomor,))
+                conn.execute(f"PRAGMA user_version = {int(nomor)}")
+            versi = nomor
+    except MigrasiDibatalkan:
+        conn.rollback()
+        return False, "Migrasi dibatalkan. Proses akan dilanjutkan saat aplikasi dibuka lagi."
+    except Exception as e:
+        conn.rollback()
+        return False, f"Migrasi ke versi {versi + 1} gagal: {e}"
+    return True, f"Skema database diperbarui ke versi {versi}."
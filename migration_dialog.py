@@ -0,0 +1,88 @@
+# migration_dialog.py
+# Berisi dialog progres untuk migrasi skema database saat aplikasi dibuka.
+# Dialog hanya muncul jika ada langkah migrasi yang belum diterapkan.
+
+from PyQt6.QtWidgets import QProgressDialog, QMessageBox
+from PyQt6.QtCore import Qt, QThreadPool, pyqtSlot
+
+import db_manager
+from workers import MigrationWorker
+
+
+class MigrationDialog(QProgressDialog):
+    """Menampilkan progres migrasi; tombol batal berhenti setelah potongan berjalan."""
+
+    def __init__(self, parent=None):
+        super().__init__("Memperbarui struktur database...", "Batalkan", 0, 0, parent)
+        self.setWindowTitle("Pembaruan Database")
+        self.setWindowModality(Qt.WindowModality.ApplicationModal)
+        self.setMinimumDuration(0)
+        self.setMinimumWidth(420)
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.worker = MigrationWorker()
+        self.worker.signals.progress.connect(self.on_progress)
+        self.worker.signals.finished.connect(self.on_finished)
+        self.canceled.connect(self.worker.cancel)
+
+    def run(self):
+        """Menjalankan migrasi dan menunggu sampai selesai. Mengembalikan (success, pesan)."""
+        self.pool.start(self.worker)
+        self.exec()
+        # Jika dibatalkan, dialog tertutup lebih dulu; tunggu potongan terakhir selesai
+        self.pool.waitForDone()
+        return self.worker.hasil or (False, "Migrasi tidak selesai.")
+
+    @pyqtSlot(str, int, int)
+    def on_progress(self, keterangan, selesai, total):
+        self.setMaximum(max(total, 0))
+        self.setValue(min(selesai, total) if total else 0)
+        if total:
+            self.setLabelText(f"{keterangan}\n{selesai} dari {total}")
+        else:
+            self.setLabelText(keterangan)
+
+    @pyqtSlot(bool, str)
+    def on_finished(self, success, message):
+        self.accept()
+
+
+class PersiapanDatabase:
+    """
+    Menyiapkan database saat startup. mulai() memeriksa versi skema: jika
+    ada migrasi, dialog progres ditampilkan dan ditunggu sampai selesai;
+    jika tidak, init_db berjalan di thread latar belakang sementara jendela
+    utama dibangun. tunggu() mengembalikan True jika DB siap.
+    """
+
+    def __init__(self):
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(1)
+        self.worker = None
+        self.hasil = None
+
+    def mulai(self, parent=None):
+        if db_manager.perlu_migrasi():
+            self.hasil = MigrationDialog(parent).run()
+            return
+        self.worker = MigrationWorker()
+        self.pool.start(self.worker)
+
+    def tunggu(self, parent=None):
+        if self.hasil is None:
+            self.pool.waitForDone()
+            self.hasil = self.worker.hasil or (False, "Inisialisasi database tidak selesai.")
+        success, message = self.hasil
+        if not success:
+            QMessageBox.critical(parent, "Pembaruan Database", message)
+        return success
+
+
+def jalankan_migrasi(parent=None):
+    """Menyiapkan database dan menunggu sampai selesai. True jika DB siap."""
+    persiapan = PersiapanDatabase()
+    persiapan.mulai(parent)
+    return persiapan.tunggu(parent)
@@ -0,0 +1,72 @@
+# preview_dialog.py
+# Berisi QDialog untuk melihat pratinjau satu dokumen (gambar atau
+# halaman pertama PDF) tanpa membuka file explorer
+
+import os
+import platform
+import subprocess
+from pathlib import Path
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QScrollArea, QMessageBox
+)
+from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtCore import Qt, pyqtSlot
+
+import thumbnail_cache
+from workers import ThumbnailLoader
+
+
+class PreviewDialog(QDialog):
+    """Pratinjau dokumen; gambar di-render di latar belakang lewat cache thumbnail."""
+
+    def __init__(self, path, file_hash=None, mtime=None, parent=None):
+        super().__init__(parent)
+        self.path = Path(path)
+        self.setWindowTitle(f"Pratinjau - {self.path.name}")
+        self.resize(800, 900)
+
+        self.init_ui()
+
+        self.loader = ThumbnailLoader(self)
+        self.loader.thumbnail_ready.connect(self.on_preview_ready)
+        if thumbnail_cache.bisa_dipratinjau(self.path):
+            self.loader.request(str(self.path), file_hash, mtime, thumbnail_cache.UKURAN_PRATINJAU)
+        else:
+            self.image_label.setText("Pratinjau tidak tersedia untuk jenis file ini.")
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.image_label = QLabel("Memuat pratinjau...")
+        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setWidget(self.image_label)
+
+        tombol_layout = QHBoxLayout()
+        open_btn = QPushButton("Buka File")
+        open_btn.setStyleSheet("background-color: #5bc0de; color: white; padding: 6px; border-radius: 4px;")
+        open_btn.clicked.connect(self.on_open_file)
+        close_btn = QPushButton("Tutup")
+        close_btn.clicked.connect(self.close)
+        tombol_layout.addStretch()
+        tombol_layout.addWidget(open_btn)
+        tombol_layout.addWidget(close_btn)
+
+        layout.addWidget(scroll)
+        layout.addLayout(tombol_layout)
+
+    @pyqtSlot(str, int, QImage)
+    def on_preview_ready(self, path, ukuran, image):
+        self.image_label.setPixmap(QPixmap.fromImage(image))
+
+    def on_open_file(self):
+        """Membuka file dengan aplikasi bawaan sistem operasi."""
+        path = str(self.path.resolve())
+        try:
+            if platform.system() == "Windows": os.startfile(path)
+            elif platform.system() == "Darwin": subprocess.Popen(["open", path])
+            else: subprocess.Popen(["xdg-open", path])
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Tidak bisa membuka file: {e}")
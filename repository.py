@@ -0,0 +1,196 @@
+# repository.py
+# Lapisan repository di atas db_manager untuk record pendaftar.
+# Record lengkap di-cache per ID (dan dipetakan dari NIK) dalam LRU
+# berukuran tetap, sehingga halaman detail, form edit, dan konfirmasi hapus
+# tidak membaca baris yang sama berulang kali. Penulisan lewat repository
+# langsung meng-invalidasi entri terkait; perubahan dari koneksi lain
+# (thread latar belakang atau workstation lain) terdeteksi lewat
+# PRAGMA data_version, lalu hanya ID yang tercatat di log perubahan sejak
+# pengecekan terakhir yang dibuang dari cache.
+# Modul ini sengaja tidak mengimpor PyQt6.
+
+import threading
+from collections import OrderedDict
+
+import db_manager
+from config import KAPASITAS_CACHE_RECORD
+
+
+class RepositoriPendaftar:
+    """Identity map + LRU untuk baris pendaftar (sqlite3.Row, read-only)."""
+
+    def __init__(self, kapasitas=KAPASITAS_CACHE_RECORD):
+        self.kapasitas = kapasitas
+        self._cache = OrderedDict()  # id -> Row (urutan = LRU)
+        self._id_per_nik = {}        # nik -> id
+        self._kunci = threading.Lock()
+        # data_version terakhir per thread (ident; data threading.local di
+        # thread QThreadPool hilang setiap kali run() selesai)
+        self._versi = {}
+        self._seq = None  # Nomor urut log perubahan yang sudah diterapkan ke cache
+        self._kunci_log = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidasi = 0
+
+    # --- Baca ---
+    def get_by_id(self, id_pendaftar):
+        """Sama seperti db_manager.get_data_by_id, tetapi memakai cache."""
+        self._cek_perubahan_luar()
+        with self._kunci:
+            row = self._cache.get(id_pendaftar)
+            if row is not None:
+                self._cache.move_to_end(id_pendaftar)
+                self.hits += 1
+                return True, row
+            self.misses += 1
+
+        success, row = db_manager.get_data_by_id(id_pendaftar)
+        if success:
+            self._simpan(row)
+        return success, row
+
+    def get_by_nik(self, nik):
+        """Sama seperti db_manager.get_data_by_nik, tetapi memakai cache."""
+        self._cek_perubahan_luar()
+        with self._kunci:
+            id_pendaftar = self._id_per_nik.get(nik)
+            row = self._cache.get(id_pendaftar) if id_pendaftar is not None else None
+            if row is not None:
+                self._cache.move_to_end(id_pendaftar)
+                self.hits += 1
+                return True, row
+            self.misses += 1
+
+        success, row = db_manager.get_data_by_nik(nik)
+        if success:
+            self._simpan(row)
+        return success, row
+
+    # --- Tulis (meneruskan ke db_manager lalu invalidasi) ---
+    def save(self, data, copy_files=True):
+        hasil = db_manager.save_data(data, copy_files)
+        self.invalidate(nik=data.get('nik'))
+        return hasil
+
+    def update(self, id_pendaftar, data, copy_files=True):
+        hasil = db_manager.update_data(id_pendaftar, data, copy_files)
+        # Entri lama dibuang lewat ID (beserta NIK lamanya); NIK baru bisa
+        # masih dipetakan ke entri lain yang sudah usang
+        self.invalidate(id_pendaftar)
+        self.invalidate(nik=data.get('nik'))
+        return hasil
+
+    def delete(self, id_pendaftar, jalankan_berkas=True):
+        """Menghapus data; baris yang sudah di-cache dipakai ulang untuk mencari folder NIK."""
+        success, row = self.get_by_id(id_pendaftar)
+        if not success:
+            return False, "Data tidak ditemukan untuk dihapus."
+        hasil = db_manager.delete_data(id_pendaftar, row, jalankan_berkas)
+        self.invalidate(id_pendaftar, row['nik'])
+        return hasil
+
+    def pindahkan_ke_sampah(self, ids):
+        hasil = db_manager.pindahkan_ke_sampah(ids)
+        for id_pendaftar in ids:
+            self.invalidate(id_pendaftar)
+        return hasil
+
+    def pulihkan(self, ids):
+        hasil = db_manager.pulihkan_dari_sampah(ids)
+        for id_pendaftar in ids:
+            self.invalidate(id_pendaftar)
+        return hasil
+
+    def hapus_permanen(self, ids, jalankan_berkas=True):
+        hasil = db_manager.hapus_permanen(ids, jalankan_berkas)
+        for id_pendaftar in ids:
+            self.invalidate(id_pendaftar)
+        return hasil
+
+    def upsert_batch(self, records):
+        hasil = db_manager.upsert_data_batch(records)
+        for data in records:
+            self.invalidate(nik=data.get('nik'))
+        return hasil
+
+    # --- Cache ---
+    def invalidate(self, id_pendaftar=None, nik=None):
+        """Membuang entri berdasarkan ID dan/atau NIK."""
+        with self._kunci:
+            if nik is not None and id_pendaftar is None:
+                id_pendaftar = self._id_per_nik.get(nik)
+            row = self._cache.pop(id_pendaftar, None) if id_pendaftar is not None else None
+            if row is not None:
+                self._id_per_nik.pop(row['nik'], None)
+                self.invalidasi += 1
+            if nik is not None:
+                self._id_per_nik.pop(nik, None)
+
+    def clear(self):
+        with self._kunci:
+            self.invalidasi += len(self._cache)
+            self._cache.clear()
+            self._id_per_nik.clear()
+
+    def stats(self):
+        """Statistik cache: hits, misses, rasio_hit, ukuran, kapasitas, invalidasi."""
+        with self._kunci:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'rasio_hit': self.hits / total if total else 0.0,
+                'ukuran': len(self._cache),
+                'kapasitas': self.kapasitas,
+                'invalidasi': self.invalidasi,
+            }
+
+    def _simpan(self, row):
+        with self._kunci:
+            self._cache[row['id']] = row
+            self._cache.move_to_end(row['id'])
+            self._id_per_nik[row['nik']] = row['id']
+            while len(self._cache) > self.kapasitas:
+                _, lama = self._cache.popitem(last=False)
+                self._id_per_nik.pop(lama['nik'], None)
+
+    def _cek_perubahan_luar(self):
+        """Jika koneksi lain sudah meng-commit sejak pengecekan terakhir, terapkan log perubahannya."""
+        try:
+            versi = db_manager.get_data_version()
+        except Exception as e:
+            print(f"Gagal membaca data_version: {e}")
+            self.clear()
+            return
+        ident = threading.get_ident()
+        terakhir = self._versi.get(ident)
+        self._versi[ident] = versi
+        if terakhir != versi:
+            self._terapkan_log_perubahan()
+
+    def _terapkan_log_perubahan(self):
+        """
+        Membuang entri yang ID-nya muncul di log perubahan setelah self._seq.
+        Jika log tidak lengkap (dipangkas, DB diganti, atau terlalu banyak
+        perubahan) seluruh cache dikosongkan.
+        """
+        with self._kunci_log:
+            if self._seq is None:
+                success, hasil = db_manager.get_seq_perubahan()
+                perubahan, seq = (None, hasil) if success else (None, None)
+            else:
+                success, hasil = db_manager.get_perubahan_sejak(self._seq)
+                perubahan, seq = hasil if success else (None, None)
+            if not success:
+                print(hasil)
+            self._seq = seq
+        if perubahan is None:
+            self.clear()
+            return
+        for id_pendaftar, _ in perubahan:
+            self.invalidate(id_pendaftar)
+
+
+# Instance bersama untuk seluruh aplikasi
+repo = RepositoriPendaftar()
@@ -0,0 +1,481 @@
+# server.py
+# Mode server opsional: satu komputer memegang pendaftaran_npwp.db (di disk
+# lokalnya, bukan network drive) dan workstation lain mengaksesnya lewat
+# API HTTP JSON, tanpa membuka file SQLite lewat SMB.
+#
+#   python server.py --folder D:\DataNPWP --host 0.0.0.0 --port 8765 --token RAHASIA
+#   python main.py --server http://komputer-server:8765   (di workstation)
+#
+# Dibangun di atas asyncio (tanpa dependensi tambahan). Koneksi SQLite tetap
+# milik db_manager (satu per thread), sehingga:
+#   - semua penulisan berjalan di SATU thread penulis (satu koneksi tulis,
+#     tidak ada perebutan lock antar-penulis),
+#   - pembacaan berjalan di kumpulan thread pembaca (satu koneksi per thread,
+#     WAL mengizinkan baca paralel dengan tulis).
+#
+# Endpoint:
+#   GET  /status                       versi skema dan versi data
+#   GET  /versi                        versi data (pengganti PRAGMA data_version)
+#   POST /api/<fungsi>                 {"args": [...], "kwargs": {...}} -> hasil fungsi db_manager
+#   POST /stream/iter_data             hasil iter_data sebagai JSON per baris (chunked)
+#   GET  /dokumen/<nik>/<nama_file>    unduh dokumen (dialirkan)
+#   PUT  /dokumen/<nik>/<nama_file>    unggah dokumen (dialirkan, Content-Length wajib)
+# Hanya fungsi di FUNGSI_BACA/FUNGSI_TULIS yang bisa dipanggil. Klien untuk
+# aplikasi ada di klien_server.py. Tanpa --host server hanya mendengarkan
+# 127.0.0.1; alamat lain wajib memakai token. Modul ini tidak mengimpor PyQt6.
+
+import asyncio
+import inspect
+import ipaddress
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import db_manager
+import doc_manager
+from config import (
+    BASE_DOC_FOLDER, PORT_SERVER, JUMLAH_PEMBACA_SERVER, JEDA_PEMBERSIH_DETIK, INTERVAL_PEMBERSIH_MENIT
+)
+
+# Fungsi db_manager yang boleh dipanggil lewat /api/<fungsi>
+FUNGSI_BACA = {
+    'count_data', 'load_page', 'load_data_page', 'load_data', 'get_data_by_id',
+    'get_data_by_nik', 'get_data_by_niks', 'get_dokumen', 'get_total_dokumen',
+    'get_pendaftar_tanpa_dokumen', 'get_facet_counts', 'count_keluarga',
+    'load_keluarga_page', 'get_seq_perubahan', 'get_perubahan_sejak', 'load_sampah',
+}
+FUNGSI_TULIS = {
+    'save_data', 'save_data_batch', 'upsert_data_batch', 'update_data', 'delete_data',
+    'rebuild_search_index', 'reconcile_dokumen', 'periksa_integritas', 'optimasi_database',
+    'pindahkan_ke_sampah', 'pulihkan_dari_sampah', 'hapus_permanen',
+}
+
+# Parameter yang hanya boleh diisi pemanggil di proses yang sama (baris DB
+# yang dipercaya, callback); permintaan API yang mengisinya ditolak
+PARAMETER_INTERNAL = {'data_row', 'progress_cb', 'cancel_check'}
+
+# Parameter yang selalu ditentukan server, berapa pun nilai dari klien:
+# file dari workstation diunggah terpisah lewat PUT /dokumen, dan langkah
+# jurnal folder dikerjakan server saat itu juga
+PARAMETER_SERVER = {'copy_files': False, 'jalankan_berkas': True}
+
+# Ukuran potongan saat mengalirkan file (byte)
+UKURAN_POTONGAN = 1024 * 1024
+
+# Batas body JSON (byte); dokumen tidak terkena batas ini karena dialirkan
+MAKS_BODY_JSON = 64 * 1024 * 1024
+
+# Batas baris header per permintaan
+MAKS_HEADER = 100
+
+STATUS_HTTP = {
+    200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+    405: "Method Not Allowed", 409: "Conflict", 411: "Length Required",
+    413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+
+class GalatHttp(Exception):
+    """Galat yang dikirim ke klien sebagai respons JSON {'error': pesan}."""
+
+    def __init__(self, status, pesan):
+        super().__init__(pesan)
+        self.status = status
+        self.pesan = pesan
+
+
+# --- ENKODE HASIL ---
+# sqlite3.Row tidak bisa langsung di-JSON-kan; baris dikirim sebagai
+# {"$baris": [kolom...], "nilai": [...]} dan list baris dengan kolom yang
+# sama sebagai {"$baris": [kolom...], "daftar": [[...], ...]} agar nama
+# kolom tidak diulang per baris. klien_server.dekode membalikkannya.
+def enkode(nilai):
+    if isinstance(nilai, sqlite3.Row):
+        return {'$baris': nilai.keys(), 'nilai': list(nilai)}
+    if isinstance(nilai, (list, tuple)):
+        if nilai and all(isinstance(v, sqlite3.Row) for v in nilai):
+            return {'$baris': nilai[0].keys(), 'daftar': [list(v) for v in nilai]}
+        return [enkode(v) for v in nilai]
+    if isinstance(nilai, dict):
+        return {k: enkode(v) for k, v in nilai.items()}
+    if isinstance(nilai, (set, frozenset)):
+        return [enkode(v) for v in nilai]
+    return nilai
+
+
+def nama_aman(nama):
+    """True jika `nama` boleh dipakai sebagai satu komponen path (NIK / nama file)."""
+    return bool(nama) and nama not in ('.', '..') and Path(nama).name == nama \
+        and '\\' not in nama and not doc_manager.is_file_sementara(nama)
+
+
+def host_lokal(host):
+    """True jika `host` hanya bisa dijangkau dari komputer ini."""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class Permintaan:
+    def __init__(self, metode, path, headers, reader):
+        self.metode = metode
+        self.path = path
+        self.headers = headers
+        self.reader = reader
+        self.body_dibaca = False
+
+    def body_tersisa(self):
+        """True jika body permintaan belum dibaca (koneksi tidak sinkron lagi)."""
+        return not self.body_dibaca and self.headers.get('content-length', '0') not in ('', '0')
+
+    def panjang_body(self):
+        try:
+            return int(self.headers.get('content-length', ''))
+        except ValueError:
+            raise GalatHttp(411, "Header Content-Length wajib diisi.")
+
+    async def json(self):
+        panjang = self.panjang_body()
+        if panjang > MAKS_BODY_JSON:
+            raise GalatHttp(413, "Body terlalu besar.")
+        body = await self.reader.readexactly(panjang) if panjang else b"{}"
+        self.body_dibaca = True
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise GalatHttp(400, "Body bukan JSON yang valid.")
+
+
+class ServerNpwp:
+    """Server HTTP asyncio di atas db_manager."""
+
+    def __init__(self, host="127.0.0.1", port=PORT_SERVER, jumlah_pembaca=JUMLAH_PEMBACA_SERVER,
+                 token=None):
+        if not token and not host_lokal(host):
+            raise ValueError(f"Server di alamat {host} wajib memakai token (--token atau NPWP_SERVER_TOKEN).")
+        self.host = host
+        self.port = port
+        self.token = token
+        self.penulis = ThreadPoolExecutor(1, thread_name_prefix="npwp-penulis")
+        self.pembaca = ThreadPoolExecutor(jumlah_pembaca, thread_name_prefix="npwp-pembaca")
+        self._server = None
+        self._pembersih = None
+
+    # --- SIKLUS HIDUP ---
+    async def mulai(self):
+        # init_db (migrasi) di thread penulis: koneksinya menjadi koneksi tulis
+        success, pesan = await self._tulis(db_manager.init_db)
+        if not success:
+            raise RuntimeError(pesan)
+        self._server = await asyncio.start_server(self._tangani_koneksi, self.host, self.port)
+        alamat = ", ".join(str(s.getsockname()[:2]) for s in self._server.sockets)
+        print(f"Server NPWP berjalan di {alamat}")
+        self._pembersih = asyncio.create_task(self._bersihkan_sampah_berkala())
+
+    async def jalan_selamanya(self):
+        await self.mulai()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def tutup(self):
+        if self._pembersih is not None:
+            self._pembersih.cancel()
+        if self._server is not None:
+            self._server.close()
+        self.pembaca.shutdown(wait=True, cancel_futures=True)
+        self.penulis.shutdown(wait=True)
+        db_manager.close_connections()
+
+    async def _tulis(self, fungsi, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.penulis, lambda: fungsi(*args, **kwargs)
+        )
+
+    async def _baca(self, fungsi, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.pembaca, lambda: fungsi(*args, **kwargs)
+        )
+
+    async def _bersihkan_sampah_berkala(self):
+        """
+        Pembersih Tempat Sampah milik server (workstation tidak menjalankannya):
+        satu batch per giliran thread penulis, dengan jeda di antara batch agar
+        permintaan tulis dari workstation tetap dilayani.
+        """
+        while True:
+            total = 0
+            while True:
+                success, hasil = await self._tulis(db_manager.bersihkan_sampah)
+                if not success:
+                    print(hasil)
+                    break
+                jumlah, masih_ada = hasil
+                total += jumlah
+                if not masih_ada:
+                    break
+                await asyncio.sleep(JEDA_PEMBERSIH_DETIK)
+            if total:
+                print(f"Pembersih Tempat Sampah: {total} data dihapus permanen.")
+            await asyncio.sleep(INTERVAL_PEMBERSIH_MENIT * 60)
+
+    # --- HTTP ---
+    async def _tangani_koneksi(self, reader, writer):
+        try:
+            while True:
+                permintaan = await self._baca_permintaan(reader)
+                if permintaan is None:
+                    break
+                try:
+                    await self._rute(permintaan, writer)
+                except GalatHttp as e:
+                    await self._kirim_galat(writer, permintaan, e.status, e.pesan)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as e:
+                    print(f"Galat server pada {permintaan.metode} {permintaan.path}: {e}")
+                    await self._kirim_galat(writer, permintaan, 500, str(e))
+                if permintaan.headers.get('connection', '').lower() == 'close' or permintaan.body_tersisa():
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def _baca_permintaan(self, reader):
+        baris = await reader.readline()
+        if not baris:
+            return None
+        try:
+            metode, target, _ = baris.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise ConnectionError("Baris permintaan tidak valid")
+        headers = {}
+        for _ in range(MAKS_HEADER):
+            baris = await reader.readline()
+            if baris in (b'\r\n', b'\n', b''):
+                break
+            nama, _, nilai = baris.decode('latin-1').partition(':')
+            headers[nama.strip().lower()] = nilai.strip()
+        return Permintaan(metode.upper(), unquote(urlsplit(target).path), headers, reader)
+
+    async def _rute(self, permintaan, writer):
+        if self.token and permintaan.headers.get('authorization') != f"Bearer {self.token}":
+            raise GalatHttp(401, "Token tidak valid.")
+        bagian = [b for b in permintaan.path.split('/') if b]
+        metode = permintaan.metode
+
+        if bagian == ['status'] and metode == 'GET':
+            await self._kirim_json(writer, 200, await self._baca(self._status))
+        elif bagian == ['versi'] and metode == 'GET':
+            success, seq = await self._baca(db_manager.get_seq_perubahan)
+            await self._kirim_json(writer, 200 if success else 500, {'versi': seq} if success else {'error': seq})
+        elif len(bagian) == 2 and bagian[0] == 'api' and metode == 'POST':
+            await self._panggil_api(bagian[1], permintaan, writer)
+        elif bagian == ['stream', 'iter_data'] and metode == 'POST':
+            await self._alirkan_data(permintaan, writer)
+        elif len(bagian) == 3 and bagian[0] == 'dokumen':
+            if not (doc_manager.nik_valid(bagian[1]) and nama_aman(bagian[2])):
+                raise GalatHttp(400, "NIK atau nama file tidak valid.")
+            if metode == 'GET':
+                await self._unduh(bagian[1], bagian[2], writer)
+            elif metode == 'PUT':
+                await self._unggah(bagian[1], bagian[2], permintaan, writer)
+            else:
+                raise GalatHttp(405, "Metode tidak didukung.")
+        else:
+            raise GalatHttp(404, f"Tidak ada endpoint {metode} {permintaan.path}")
+
+    def _status(self):
+        conn = db_manager.get_connection()
+        return {
+            'versi_skema': conn.execute("PRAGMA user_version").fetchone()[0],
+            'versi': db_manager.get_seq_perubahan()[1],
+        }
+
+    async def _panggil_api(self, nama, permintaan, writer):
+        if nama not in FUNGSI_BACA and nama not in FUNGSI_TULIS:
+            raise GalatHttp(404, f"Fungsi '{nama}' tidak tersedia.")
+        body = await permintaan.json()
+        args, kwargs = body.get('args', []), body.get('kwargs', {})
+        if not isinstance(args, list) or not isinstance(kwargs, dict):
+            raise GalatHttp(400, "'args' harus list dan 'kwargs' harus object.")
+        fungsi = getattr(db_manager, nama)
+        try:
+            terikat = inspect.signature(fungsi).bind(*args, **kwargs)
+        except TypeError as e:
+            raise GalatHttp(400, f"Argumen untuk '{nama}' tidak valid: {e}")
+        internal = PARAMETER_INTERNAL & set(terikat.arguments)
+        if internal:
+            raise GalatHttp(400, f"Parameter {', '.join(sorted(internal))} tidak boleh diisi lewat API.")
+        for parameter, nilai in PARAMETER_SERVER.items():
+            if parameter in inspect.signature(fungsi).parameters:
+                terikat.arguments[parameter] = nilai
+        args, kwargs = terikat.args, terikat.kwargs
+        jalankan = self._tulis if nama in FUNGSI_TULIS else self._baca
+        hasil = await jalankan(fungsi, *args, **kwargs)
+        await self._kirim_json(writer, 200, {'hasil': enkode(hasil)})
+
+    async def _alirkan_data(self, permintaan, writer):
+        """iter_data di thread pembaca, dialirkan per batch lewat antrean terbatas."""
+        body = await permintaan.json()
+        loop = asyncio.get_running_loop()
+        antrean = asyncio.Queue(maxsize=4)
+        batal = threading.Event()
+        SELESAI = object()
+
+        def produsen():
+            try:
+                for rows in db_manager.iter_data(*body.get('args', []), cancel_check=batal.is_set,
+                                                 **body.get('kwargs', {})):
+                    asyncio.run_coroutine_threadsafe(antrean.put([list(r) for r in rows]), loop).result()
+                hasil = SELESAI
+            except Exception as e:
+                hasil = e
+            asyncio.run_coroutine_threadsafe(antrean.put(hasil), loop).result()
+
+        tugas = loop.run_in_executor(self.pembaca, produsen)
+        try:
+            await self._kirim_header(writer, 200, {'Content-Type': 'application/x-ndjson',
+                                                   'Transfer-Encoding': 'chunked'})
+            while True:
+                item = await antrean.get()
+                if item is SELESAI:
+                    break
+                if isinstance(item, Exception):
+                    await self._kirim_potongan(writer, json.dumps({'error': str(item)}).encode() + b"\n")
+                    break
+                await self._kirim_potongan(writer, json.dumps(item, ensure_ascii=False).encode() + b"\n")
+            await self._kirim_potongan(writer, b"")
+        finally:
+            batal.set()
+            # Kosongkan antrean agar produsen tidak tertahan saat klien putus
+            while not tugas.done():
+                try:
+                    antrean.get_nowait()
+                except asyncio.QueueEmpty:
+                    await asyncio.sleep(0.01)
+
+    async def _unduh(self, nik, nama_file, writer):
+        path = doc_manager.folder_dokumen(nik) / nama_file
+        try:
+            f = await self._baca(open, path, 'rb')
+        except FileNotFoundError:
+            raise GalatHttp(404, "Dokumen tidak ditemukan.")
+        try:
+            st = os.fstat(f.fileno())
+            await self._kirim_header(writer, 200, {
+                'Content-Type': 'application/octet-stream',
+                'Content-Length': str(st.st_size),
+                'X-Mtime': repr(st.st_mtime),
+            })
+            while True:
+                potongan = await self._baca(f.read, UKURAN_POTONGAN)
+                if not potongan:
+                    break
+                writer.write(potongan)
+                await writer.drain()
+        finally:
+            f.close()
+
+    async def _unggah(self, nik, nama_file, permintaan, writer):
+        panjang = permintaan.panjang_body()
+        success, row = await self._baca(db_manager.get_data_by_nik, nik)
+        if not success:
+            raise GalatHttp(404, f"NIK '{nik}' tidak terdaftar.")
+
+        Path(BASE_DOC_FOLDER).mkdir(exist_ok=True)
+        fd, path_sementara = tempfile.mkstemp(prefix=".unggah_", suffix=".part", dir=BASE_DOC_FOLDER)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                sisa = panjang
+                while sisa > 0:
+                    potongan = await permintaan.reader.read(min(UKURAN_POTONGAN, sisa))
+                    if not potongan:
+                        raise ConnectionError("Unggahan terputus")
+                    await self._baca(f.write, potongan)
+                    sisa -= len(potongan)
+            permintaan.body_dibaca = True
+            info = await self._tulis(self._simpan_unggahan, path_sementara, nik, nama_file)
+        finally:
+            if os.path.exists(path_sementara):
+                os.remove(path_sementara)
+        await self._kirim_json(writer, 200, {'hasil': info})
+
+    @staticmethod
+    def _simpan_unggahan(path_sementara, nik, nama_file):
+        tujuan = doc_manager.folder_dokumen(nik) / nama_file
+        doc_manager.simpan_dokumen(path_sementara, tujuan)
+        db_manager.catat_dokumen(nik, [nama_file])
+        st = tujuan.stat()
+        return {
+            'ukuran': st.st_size, 'mtime': st.st_mtime,
+            'hash': doc_manager.hash_tercatat(tujuan.parent).get(nama_file),
+        }
+
+    # --- RESPONS ---
+    @staticmethod
+    async def _kirim_header(writer, status, headers):
+        baris = [f"HTTP/1.1 {status} {STATUS_HTTP.get(status, '')}"]
+        baris += [f"{nama}: {nilai}" for nama, nilai in headers.items()]
+        writer.write(("\r\n".join(baris) + "\r\n\r\n").encode('latin-1'))
+        await writer.drain()
+
+    async def _kirim_json(self, writer, status, data, headers=None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        await self._kirim_header(writer, status, dict({
+            'Content-Type': 'application/json; charset=utf-8',
+            'Content-Length': str(len(body)),
+        }, **(headers or {})))
+        writer.write(body)
+        await writer.drain()
+
+    async def _kirim_galat(self, writer, permintaan, status, pesan):
+        # Body yang belum dibaca (mis. unggahan ditolak) tidak dibuang: koneksi ditutup
+        headers = {'Connection': 'close'} if permintaan.body_tersisa() else None
+        await self._kirim_json(writer, status, {'error': pesan}, headers)
+
+    @staticmethod
+    async def _kirim_potongan(writer, data):
+        writer.write(f"{len(data):x}\r\n".encode('latin-1') + data + b"\r\n")
+        await writer.drain()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Server API NPWP untuk beberapa workstation.")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Alamat yang didengarkan (default: hanya komputer ini; "
+                             "mis. 0.0.0.0 untuk semua, wajib dengan --token)")
+    parser.add_argument("--port", type=int, default=PORT_SERVER)
+    parser.add_argument("--folder", help="Folder data (berisi database dan dokumen_npwp)")
+    parser.add_argument("--pembaca", type=int, default=JUMLAH_PEMBACA_SERVER,
+                        help="Jumlah koneksi/thread pembaca")
+    parser.add_argument("--token", default=os.environ.get("NPWP_SERVER_TOKEN"),
+                        help="Token yang wajib dikirim klien (default: env NPWP_SERVER_TOKEN)")
+    args = parser.parse_args()
+
+    if args.folder:
+        os.chdir(args.folder)
+    try:
+        server = ServerNpwp(args.host, args.port, args.pembaca, args.token)
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        asyncio.run(server.jalan_selamanya())
+    except KeyboardInterrupt:
+        print("Server dihentikan.")
+    finally:
+        server.tutup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# startup_timing.py
+# Pencatat waktu startup aplikasi. main.py mengimpor modul ini paling awal
+# lalu menandai setiap tahap (QApplication, database, halaman pertama,
+# jendela tampil). Laporan bisa dilihat lewat menu Bantuan > Waktu Startup,
+# atau dicetak ke konsol dengan `python main.py --startup-timing`
+# (atau variabel lingkungan NPWP_STARTUP_TIMING=1).
+# Modul ini sengaja tidak mengimpor PyQt6.
+
+import os
+import sys
+import time
+
+# Titik nol: saat modul ini dimuat (setelah interpreter Python siap)
+_MULAI = time.perf_counter()
+
+# list (nama_tahap, detik_sejak_mulai)
+_tahap = []
+
+
+def tandai(nama):
+    """Mencatat bahwa tahap `nama` selesai sekarang."""
+    _tahap.append((nama, time.perf_counter() - _MULAI))
+
+
+def total_ms():
+    return (_tahap[-1][1] if _tahap else 0.0) * 1000
+
+
+def laporan():
+    """Teks laporan: durasi setiap tahap dan waktu kumulatif (ms)."""
+    baris = [f"{'Tahap':<34}{'Durasi':>10}{'Kumulatif':>12}"]
+    sebelumnya = 0.0
+    for nama, detik in _tahap:
+        baris.append(f"{nama:<34}{(detik - sebelumnya) * 1000:>8.1f}ms{detik * 1000:>10.1f}ms")
+        sebelumnya = detik
+    return "\n".join(baris)
+
+
+def aktif():
+    """True jika laporan diminta dicetak ke konsol."""
+    return "--startup-timing" in sys.argv or os.environ.get("NPWP_STARTUP_TIMING") == "1"
@@ -0,0 +1,300 @@
+# table_model.py
+# Model tabel virtual (QAbstractTableModel) untuk ViewWidget.
+# Data diambil per 'halaman' dari db_manager saat pengguna menggulir,
+# dan hanya sejumlah halaman terakhir yang disimpan di memori. Hanya kolom
+# daftar (KOLOM_DAFTAR) yang diambil; password ikut diambil saat ditampilkan.
+
+from collections import OrderedDict
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+import db_manager
+from config import KOLOM_DAFTAR
+
+
+class PendaftaranTableModel(QAbstractTableModel):
+    """Model tabel yang memuat data pendaftaran secara bertahap (lazy)."""
+
+    PAGE_SIZE = 200        # Jumlah baris per halaman yang diambil dari DB
+    MAX_CACHED_PAGES = 8   # Jendela terlihat + prefetch yang disimpan di memori
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._search_term = ""
+        self._filters = {}     # Filter facet {kolom: nilai}
+        self._show_password = False
+        self._total = 0        # Jumlah baris yang cocok di DB
+        self._loaded = 0       # Jumlah baris yang sudah 'dibuka' lewat fetchMore
+        self._pages = OrderedDict()  # nomor_halaman -> list baris (LRU)
+        # nomor_halaman -> id terakhir halaman sebelumnya (keyset pagination).
+        # Disimpan terus (hanya satu angka per halaman) walau halamannya dibuang.
+        self._page_after_ids = {0: None}
+        self._set_columns(False)
+        self.last_error = None
+
+    def _set_columns(self, with_password):
+        self._columns = ["id"] + [kol for kol in KOLOM_DAFTAR if kol != "id"]
+        if with_password:
+            self._columns.append("password")
+        self._headers = db_manager.get_headers(self._columns)
+
+    # --- API untuk ViewWidget ---
+    def reload(self, search_term="", filters=None):
+        """Mengosongkan cache dan memuat ulang jumlah baris dari DB."""
+        success, total = db_manager.count_data(search_term, filters=filters)
+        if not success:
+            self.apply_result(search_term, 0, [], filters)
+            self.last_error = total
+            return False
+        self.apply_result(search_term, total, None, filters)
+        return True
+
+    def apply_result(self, search_term, total, first_page=None, filters=None):
+        """
+        Mengganti isi model dengan hasil pencarian yang sudah dihitung
+        (misalnya oleh SearchWorker di thread lain). first_page boleh None;
+        halaman pertama akan diambil saat dibutuhkan.
+        """
+        self.beginResetModel()
+        self._search_term = search_term
+        self._filters = dict(filters or {})
+        self._pages.clear()
+        self._page_after_ids = {0: None}
+        self._total = total
+        self._loaded = min(self.PAGE_SIZE, self._total)
+        if first_page is not None:
+            self._simpan_halaman(0, first_page)
+        self.last_error = None
+        self.endResetModel()
+
+    def terapkan_perubahan(self, perubahan):
+        """
+        Menerapkan perubahan [(id, operasi)] dari log perubahan DB sebagai
+        patch per baris (insert/update/delete) tanpa reset model, sehingga
+        posisi gulir dan pilihan di view tetap. Mengembalikan False jika ada
+        perubahan yang posisinya tidak bisa dipastikan (hasil pencarian
+        berurut relevansi, atau baris yang sudah tidak ada di cache halaman);
+        pemanggil sebaiknya memuat ulang model.
+        """
+        if not perubahan:
+            return True
+        if self._search_term or len(perubahan) > self.PAGE_SIZE:
+            return False
+
+        ids = [id_pendaftar for id_pendaftar, _ in perubahan]
+        success, rows = db_manager.load_page(
+            None, len(ids), filters=dict(self._filters, id=ids), columns=self._columns
+        )
+        if not success:
+            self.last_error = rows
+            return False
+        cocok = {r[0]: tuple(r) for r in rows}  # Baris yang (masih) tampil
+        success, total_baru = db_manager.count_data(filters=self._filters)
+        if not success:
+            self.last_error = total_baru
+            return False
+
+        posisi_cache = {
+            row[0]: page_no * self.PAGE_SIZE + i
+            for page_no, page in self._pages.items() for i, row in enumerate(page)
+        }
+        semua_dimuat = self._loaded >= self._total
+
+        def posisi_baru(id_pendaftar):
+            # Urutan daftar id menurun: posisi = jumlah baris cocok ber-id lebih besar
+            success, lebih_kecil_sama = db_manager.count_data(
+                filters=self._filters, after_id=id_pendaftar + 1
+            )
+            return total_baru - lebih_kecil_sama if success else None
+
+        # 1. Rencana: tentukan patch setiap baris sebelum model diubah
+        ubah, hapus, sisip = [], [], []
+        for id_pendaftar, operasi in perubahan:
+            posisi = posisi_cache.get(id_pendaftar)
+            if posisi is not None:
+                if id_pendaftar in cocok:
+                    ubah.append(posisi)
+                else:
+                    hapus.append(posisi)
+                continue
+            if operasi == 'I' and id_pendaftar not in cocok:
+                continue  # Baris baru yang tidak lolos filter
+            posisi = posisi_baru(id_pendaftar)
+            if posisi is None:
+                return False
+            if posisi >= self._loaded and not semua_dimuat:
+                continue  # Di luar bagian yang sudah digulir; cukup jumlah total
+            if operasi == 'I':
+                sisip.append(posisi)
+            elif id_pendaftar in cocok or posisi < self._loaded:
+                return False  # Mungkin sudah tampil di baris yang tidak di-cache
+
+        if self._loaded - len(hapus) + len(sisip) > total_baru:
+            return False
+
+        # 2. Update di tempat (posisi masih sesuai halaman di cache)
+        for posisi in ubah:
+            page = self._pages[posisi // self.PAGE_SIZE]
+            page[posisi % self.PAGE_SIZE] = cocok[page[posisi % self.PAGE_SIZE][0]]
+            self.dataChanged.emit(
+                self.index(posisi, 0), self.index(posisi, self.columnCount() - 1)
+            )
+
+        # 3. Hapus dari bawah ke atas agar posisi di atasnya tidak bergeser
+        for posisi in sorted(hapus, reverse=True):
+            self.beginRemoveRows(QModelIndex(), posisi, posisi)
+            self._loaded -= 1
+            self.endRemoveRows()
+
+        # 4. Sisipkan dari atas ke bawah; posisi dihitung dari keadaan akhir DB,
+        #    jadi setiap baris di atasnya sudah benar saat disisipkan
+        for posisi in sorted(sisip):
+            posisi = min(posisi, self._loaded)
+            self.beginInsertRows(QModelIndex(), posisi, posisi)
+            self._loaded += 1
+            self.endInsertRows()
+
+        self._total = total_baru
+        if hapus or sisip:
+            # Baris bergeser: halaman dan batas keyset diambil ulang saat dibutuhkan
+            self._pages.clear()
+            self._page_after_ids = {0: None}
+        return True
+
+    def row_of_id(self, id_pendaftar, perkiraan=None):
+        """Nomor baris untuk ID di halaman yang sudah di-cache (atau None)."""
+        if perkiraan is not None and self.id_at(perkiraan) == id_pendaftar:
+            return perkiraan
+        for page_no, page in self._pages.items():
+            for i, row in enumerate(page):
+                if row[0] == id_pendaftar:
+                    return page_no * self.PAGE_SIZE + i
+        return None
+
+    def set_show_password(self, show):
+        """
+        Menampilkan/menyembunyikan kolom password. Password tidak diambil dari
+        DB sama sekali selama disembunyikan, jadi halaman di cache dibuang dan
+        diambil ulang dengan kolom tambahan saat digulir.
+        """
+        if show == self._show_password:
+            return
+        self._show_password = show
+        self.beginResetModel()
+        self._set_columns(show)
+        self._pages.clear()
+        self.endResetModel()
+
+    def columns(self):
+        """Kolom DB yang sedang diambil (kolom 'id' selalu pertama)."""
+        return list(self._columns)
+
+    def id_at(self, row):
+        """Mengembalikan ID pendaftar di baris tertentu (atau None)."""
+        row_data = self._row(row)
+        if row_data is None:
+            return None
+        return row_data[0]
+
+    def total_rows(self):
+        return self._total
+
+    def current_search_term(self):
+        """Teks pencarian yang sedang diterapkan pada isi model."""
+        return self._search_term
+
+    def current_filters(self):
+        """Filter facet yang sedang diterapkan pada isi model."""
+        return dict(self._filters)
+
+    # --- Implementasi QAbstractTableModel ---
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal and 0 <= section < len(self._headers):
+            return self._headers[section]
+        if orientation == Qt.Orientation.Vertical:
+            return str(section + 1)
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        row_data = self._row(index.row())
+        if row_data is None:
+            return None
+
+        col_value = row_data[index.column()]
+        return "" if col_value is None else str(col_value)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._loaded < self._total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        tambahan = min(self.PAGE_SIZE, self._total - self._loaded)
+        if tambahan <= 0:
+            return
+        # Prefetch halaman berikutnya sebelum baris ditampilkan
+        self._page(self._loaded // self.PAGE_SIZE)
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + tambahan - 1)
+        self._loaded += tambahan
+        self.endInsertRows()
+
+    # --- Cache halaman ---
+    def _row(self, row):
+        if row < 0 or row >= self._loaded:
+            return None
+        page = self._page(row // self.PAGE_SIZE)
+        offset = row % self.PAGE_SIZE
+        if page is None or offset >= len(page):
+            return None
+        return page[offset]
+
+    def _page(self, page_no):
+        """Mengambil halaman dari cache, atau dari DB jika belum ada."""
+        page = self._pages.get(page_no)
+        if page is not None:
+            self._pages.move_to_end(page_no)
+            return page
+
+        after_id = self._page_after_ids.get(page_no, -1)
+        if not self._search_term and after_id != -1:
+            # Daftar biasa: keyset (id < id_terakhir_halaman_sebelumnya)
+            success, rows = db_manager.load_page(
+                after_id, self.PAGE_SIZE, filters=self._filters, columns=self._columns
+            )
+        else:
+            # Hasil pencarian diurutkan menurut relevansi, jadi pakai OFFSET
+            success, rows = db_manager.load_data_page(
+                self._search_term, page_no * self.PAGE_SIZE, self.PAGE_SIZE,
+                columns=self._columns, filters=self._filters
+            )
+        if not success:
+            self.last_error = rows
+            print(rows)
+            return None
+        return self._simpan_halaman(page_no, rows)
+
+    def _simpan_halaman(self, page_no, rows):
+        # Simpan sebagai tuple biasa agar ringan di memori
+        page = [tuple(r) for r in rows]
+        self._pages[page_no] = page
+        if page:
+            self._page_after_ids[page_no + 1] = page[-1][0]
+        while len(self._pages) > self.MAX_CACHED_PAGES:
+            self._pages.popitem(last=False)  # Buang halaman paling lama
+        return page
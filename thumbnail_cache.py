@@ -0,0 +1,174 @@
+# thumbnail_cache.py
+# Membuat thumbnail/pratinjau dokumen (gambar dan halaman pertama PDF) dan
+# menyimpannya di cache disk LRU dengan batas ukuran. Kunci cache adalah
+# hash isi file + mtime + ukuran target, jadi file yang sama di beberapa
+# folder NIK hanya di-decode sekali. Hanya memakai QtGui (QImage), yang
+# aman dipakai dari thread latar belakang.
+
+import hashlib
+import os
+import threading
+import uuid
+from pathlib import Path
+
+from PyQt6.QtCore import QSize, Qt
+from PyQt6.QtGui import QImage, QImageReader
+
+from config import THUMBNAIL_FOLDER, UKURAN_CACHE_THUMBNAIL
+
+# Ukuran standar (sisi terpanjang, piksel)
+UKURAN_THUMBNAIL = 96
+UKURAN_PRATINJAU = 900
+
+_EKSTENSI_GAMBAR = {
+    ".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp", ".tif", ".tiff",
+}
+
+_qpdf = None  # Kelas QPdfDocument, False jika QtPdf tidak ada (None = belum dicek)
+
+
+def _kelas_pdf():
+    """QtPdf baru dimuat saat PDF pertama dipratinjau (tidak membebani startup)."""
+    global _qpdf
+    if _qpdf is None:
+        try:
+            from PyQt6.QtPdf import QPdfDocument
+            _qpdf = QPdfDocument
+        except ImportError:  # Build PyQt6 tanpa modul QtPdf: PDF tidak dipratinjau
+            _qpdf = False
+    return _qpdf or None
+
+
+def bisa_dipratinjau(filename):
+    ekstensi = Path(filename).suffix.lower()
+    return ekstensi in _EKSTENSI_GAMBAR or (ekstensi == ".pdf" and _kelas_pdf() is not None)
+
+
+class _CacheDisk:
+    """
+    Cache file PNG di THUMBNAIL_FOLDER. Urutan LRU memakai mtime file cache
+    (diperbarui setiap kali dibaca); jika total melebihi batas, file yang
+    paling lama tidak dipakai dihapus lebih dulu.
+    """
+
+    def __init__(self, folder, batas_byte):
+        self.folder = Path(folder)
+        self.batas_byte = batas_byte
+        self._kunci = threading.Lock()
+        self._total = None  # Dihitung sekali saat pertama dipakai
+
+    def path(self, kunci):
+        return self.folder / kunci[:2] / f"{kunci}.png"
+
+    def ambil(self, kunci):
+        path = self.path(kunci)
+        image = QImage(str(path))
+        if image.isNull():
+            return None
+        try:
+            os.utime(path)  # Tandai baru dipakai
+        except OSError:
+            pass
+        return image
+
+    def simpan(self, kunci, image):
+        path = self.path(kunci)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.part")
+        if not image.save(str(tmp_path), "PNG"):
+            return
+        os.replace(tmp_path, path)
+        with self._kunci:
+            if self._total is None:
+                self._total = sum(p.stat().st_size for p in self.folder.glob("*/*.png"))
+            else:
+                self._total += path.stat().st_size
+            if self._total > self.batas_byte:
+                self._pangkas()
+
+    def _pangkas(self):
+        """Menghapus file tertua sampai total di bawah 80% batas."""
+        files = []
+        for p in self.folder.glob("*/*.png"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        files.sort()
+        total = sum(ukuran for _, ukuran, _ in files)
+        target = self.batas_byte * 0.8
+        for _, ukuran, p in files:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+                total -= ukuran
+            except FileNotFoundError:
+                pass
+        self._total = total
+
+
+cache = _CacheDisk(THUMBNAIL_FOLDER, UKURAN_CACHE_THUMBNAIL)
+
+
+def kunci_cache(path, file_hash, mtime, ukuran):
+    """Kunci cache: hash isi (atau path jika hash belum ada) + mtime + ukuran."""
+    identitas = file_hash or str(Path(path).resolve())
+    return hashlib.sha1(f"{identitas}:{mtime}:{ukuran}".encode("utf-8")).hexdigest()
+
+
+def _render_gambar(path, ukuran):
+    reader = QImageReader(str(path))
+    reader.setAutoTransform(True)  # Hormati orientasi EXIF hasil scan HP
+    asli = reader.size()
+    if asli.isValid() and max(asli.width(), asli.height()) > ukuran:
+        # Decode langsung pada resolusi kecil (JPEG bisa men-decode skala 1/8)
+        reader.setScaledSize(asli.scaled(ukuran, ukuran, Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    return None if image.isNull() else image
+
+
+def _render_pdf(path, ukuran):
+    QPdfDocument = _kelas_pdf()
+    if QPdfDocument is None:
+        return None
+    doc = QPdfDocument(None)
+    try:
+        if doc.load(str(path)) != QPdfDocument.Error.None_ or doc.pageCount() == 0:
+            return None
+        halaman = doc.pagePointSize(0)
+        target = QSize(int(halaman.width()), int(halaman.height()))
+        target.scale(ukuran, ukuran, Qt.AspectRatioMode.KeepAspectRatio)
+        image = doc.render(0, target)
+        return None if image.isNull() else image
+    finally:
+        doc.close()
+
+
+def ambil_thumbnail(path, file_hash=None, mtime=None, ukuran=UKURAN_THUMBNAIL):
+    """
+    Mengembalikan QImage thumbnail/pratinjau untuk `path`, dari cache jika
+    ada, atau di-render lalu disimpan ke cache. None jika format tidak
+    didukung atau file rusak. Dipanggil dari thread latar belakang.
+    """
+    if not bisa_dipratinjau(path):
+        return None
+    if mtime is None:
+        mtime = Path(path).stat().st_mtime
+    kunci = kunci_cache(path, file_hash, mtime, ukuran)
+
+    image = cache.ambil(kunci)
+    if image is not None:
+        return image
+
+    if Path(path).suffix.lower() == ".pdf":
+        image = _render_pdf(path, ukuran)
+    else:
+        image = _render_gambar(path, ukuran)
+    if image is not None:
+        try:
+            cache.simpan(kunci, image)
+        except OSError as e:
+            print(f"Gagal menyimpan thumbnail ke cache: {e}")
+    return image
@@ -0,0 +1,158 @@
+# trash_dialog.py
+# Berisi QDialog "Tempat Sampah": daftar data yang dihapus dari daftar
+# utama (soft delete), dengan pencarian, pulihkan, dan hapus permanen.
+# Data yang tidak dipulihkan dihapus permanen oleh pembersih latar
+# belakang setelah RETENSI_SAMPAH_HARI hari.
+
+from datetime import datetime, timedelta
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
+    QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox
+)
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+
+from config import RETENSI_SAMPAH_HARI
+from repository import repo
+import db_manager
+
+
+class TrashDialog(QDialog):
+    """Data di Tempat Sampah; bisa dipilih banyak sekaligus."""
+
+    # Data dipulihkan (daftar utama perlu diperbarui)
+    data_restored = pyqtSignal()
+    # Data dihapus permanen; folder dokumennya menunggu di jurnal
+    permanently_deleted = pyqtSignal()
+
+    KOLOM = ["Nama", "NIK", "No KK", "Status", "Dihapus Pada", "Dihapus Permanen"]
+    BATAS_TAMPIL = 1000
+    SEARCH_DEBOUNCE_MS = 300
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Tempat Sampah")
+        self.setMinimumSize(850, 450)
+        self.init_ui()
+        self.load_data()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        info = QLabel(
+            f"Data yang dihapus disimpan di sini selama {RETENSI_SAMPAH_HARI} hari dan bisa dipulihkan. "
+            f"Setelah itu data beserta folder dokumennya dihapus permanen secara otomatis."
+        )
+        info.setWordWrap(True)
+        layout.addWidget(info)
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Cari Nama, NIK, Alamat, Pekerjaan, Keterangan, atau Catatan...")
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.load_data)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        layout.addWidget(self.search_input)
+
+        self.table = QTableWidget(0, len(self.KOLOM))
+        self.table.setHorizontalHeaderLabels(self.KOLOM)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SelectionMode.ExtendedSelection)
+        self.table.verticalHeader().setVisible(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.itemSelectionChanged.connect(self._perbarui_tombol)
+        layout.addWidget(self.table)
+
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        tombol_layout = QHBoxLayout()
+        self.restore_btn = QPushButton("Pulihkan")
+        self.restore_btn.setStyleSheet("background-color: #5cb85c; color: white; padding: 8px; border-radius: 4px;")
+        self.restore_btn.clicked.connect(self.on_restore)
+        self.purge_btn = QPushButton("Hapus Permanen")
+        self.purge_btn.setStyleSheet("background-color: #d9534f; color: white; padding: 8px; border-radius: 4px;")
+        self.purge_btn.clicked.connect(self.on_purge)
+        close_btn = QPushButton("Tutup")
+        close_btn.clicked.connect(self.accept)
+        tombol_layout.addWidget(self.restore_btn)
+        tombol_layout.addWidget(self.purge_btn)
+        tombol_layout.addStretch()
+        tombol_layout.addWidget(close_btn)
+        layout.addLayout(tombol_layout)
+
+    def load_data(self):
+        success, hasil = db_manager.load_sampah(self.search_input.text(), self.BATAS_TAMPIL)
+        if not success:
+            QMessageBox.critical(self, "Error", hasil)
+            return
+        total, rows = hasil
+        self.table.setRowCount(len(rows))
+        for row_no, row in enumerate(rows):
+            nilai = [row['nama'], row['nik'], row['no_kk'], row['status'], row['dihapus_pada'],
+                     self._jadwal_hapus(row['dihapus_pada'])]
+            for col, teks in enumerate(nilai):
+                item = QTableWidgetItem("" if teks is None else str(teks))
+                if col == 0:
+                    item.setData(Qt.ItemDataRole.UserRole, row['id'])
+                self.table.setItem(row_no, col, item)
+        self.summary_label.setText(
+            f"{total} data di Tempat Sampah" if len(rows) == total
+            else f"Menampilkan {len(rows)} dari {total} data di Tempat Sampah"
+        )
+        self._perbarui_tombol()
+
+    @staticmethod
+    def _jadwal_hapus(dihapus_pada):
+        try:
+            return (datetime.strptime(dihapus_pada, "%Y-%m-%d %H:%M:%S")
+                    + timedelta(days=RETENSI_SAMPAH_HARI)).strftime("%Y-%m-%d")
+        except (TypeError, ValueError):
+            return ""
+
+    def _id_terpilih(self):
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        return [self.table.item(row, 0).data(Qt.ItemDataRole.UserRole) for row in rows]
+
+    def _perbarui_tombol(self):
+        jumlah = len(self.table.selectionModel().selectedRows())
+        self.restore_btn.setEnabled(jumlah > 0)
+        self.purge_btn.setEnabled(jumlah > 0)
+        self.restore_btn.setText(f"Pulihkan ({jumlah})" if jumlah > 1 else "Pulihkan")
+        self.purge_btn.setText(f"Hapus Permanen ({jumlah})" if jumlah > 1 else "Hapus Permanen")
+
+    def on_restore(self):
+        ids = self._id_terpilih()
+        if not ids:
+            return
+        success, hasil = repo.pulihkan(ids)
+        if not success:
+            QMessageBox.critical(self, "Error", hasil)
+            return
+        self.load_data()
+        self.data_restored.emit()
+
+    def on_purge(self):
+        ids = self._id_terpilih()
+        if not ids:
+            return
+        reply = QMessageBox.question(
+            self, "Konfirmasi Hapus Permanen",
+            f"Hapus permanen {len(ids)} data?\n\n"
+            f"Data dan SELURUH FOLDER dokumen terkait akan dihapus dan tidak bisa dipulihkan.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        # Folder dihapus di latar belakang (langkahnya sudah tercatat di jurnal)
+        success, hasil = repo.hapus_permanen(ids, jalankan_berkas=False)
+        if not success:
+            QMessageBox.critical(self, "Error", hasil)
+            return
+        self.load_data()
+        self.permanently_deleted.emit()
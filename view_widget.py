@@ -1,26 +1,67 @@
 # view_widget.py
 # Berisi kelas QWidget untuk menampilkan data dalam tabel
 
+import os
+
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QPushButton, QMessageBox, 
-    QTableWidget, QTableWidgetItem, QHeaderView, QMenu,
-    QHBoxLayout, QLineEdit, QCheckBox 
+    QTableView, QHeaderView, QMenu,
+    QHBoxLayout, QLineEdit, QCheckBox, QFileDialog, QProgressDialog,
+    QComboBox, QLabel, QTreeView, QStackedWidget
 )
-from PyQt6.QtCore import pyqtSignal, Qt
-from PyQt6.QtGui import QAction
+from PyQt6.QtCore import pyqtSignal, pyqtSlot, Qt, QTimer, QThreadPool
+from PyQt6.QtGui import QAction, QKeySequence, QShortcut
 
-import db_manager 
+import db_manager
+from config import KOLOM_FACET
+from family_model import KeluargaTreeModel
+from table_model import PendaftaranTableModel
+from workers import SearchWorker, ExportWorker
 
 class ViewWidget(QWidget):
     """Widget untuk menampilkan data dalam tabel."""
     
     # Sinyal
     edit_requested = pyqtSignal(int)
-    delete_requested = pyqtSignal(int)
+    delete_requested = pyqtSignal(list)  # Daftar ID (bisa banyak baris terpilih)
     detail_requested = pyqtSignal(int)
+    trash_requested = pyqtSignal()
     
+    # Jeda (ms) setelah ketikan terakhir sebelum pencarian dijalankan
+    SEARCH_DEBOUNCE_MS = 300
+    # Interval (ms) pengecekan perubahan dari koneksi/workstation lain
+    CHANGE_POLL_MS = 2000
+
     def __init__(self):
         super().__init__()
+        
+        # --- STATE PENCARIAN LATAR BELAKANG ---
+        self.search_generation = 0     # Naik setiap ada pencarian baru
+        self.active_search = None      # SearchWorker yang sedang berjalan
+        self.search_filters = {}       # Filter facet milik pencarian terakhir
+        self.search_pool = QThreadPool(self)
+        self.search_pool.setMaxThreadCount(1)
+        self.search_pool.setExpiryTimeout(-1)  # Koneksi DB per thread: thread tidak diganti (lihat db_manager)
+        
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.start_search)
+        # --- AKHIR STATE ---
+
+        # --- STATE REFRESH INKREMENTAL ---
+        self.change_seq = None         # seq log perubahan yang sudah diterapkan (None = belum dimuat)
+        self.search_change_seq = 0     # seq saat pencarian terakhir dimulai
+        self.data_version = None       # PRAGMA data_version terakhir yang dilihat
+        self.change_timer = QTimer(self)
+        self.change_timer.setInterval(self.CHANGE_POLL_MS)
+        self.change_timer.timeout.connect(self.check_external_changes)
+        self.change_timer.start()
+        # --- AKHIR STATE ---
+        
+        self.export_worker = None
+        self.export_progress = None
+        
         self.init_ui()
 
     def init_ui(self):
@@ -30,7 +71,7 @@ class ViewWidget(QWidget):
         
         # 1. Buat widget
         self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText("Cari berdasarkan Nama atau NIK...")
+        self.search_input.setPlaceholderText("Cari Nama, NIK, Alamat, Pekerjaan, Keterangan, atau Catatan...")
         
         self.refresh_btn = QPushButton("Refresh Data")
         self.refresh_btn.setStyleSheet("background-color: #008CBA; color: white; padding: 8px; border-radius: 4px;")
@@ -39,60 +80,148 @@ class ViewWidget(QWidget):
         self.show_password_check = QCheckBox("Tampilkan Password")
         # --- AKHIR PERUBAHAN ---
         
+        self.export_btn = QPushButton("Ekspor...")
+        self.export_btn.setStyleSheet("background-color: #5cb85c; color: white; padding: 8px; border-radius: 4px;")
+
+        self.trash_btn = QPushButton("Tempat Sampah")
+        self.trash_btn.setStyleSheet("padding: 8px; border-radius: 4px;")
+        
+        # --- FILTER FACET (jumlah per nilai dari cache DB) ---
+        self.facet_combos = {}
+        facet_layout = QHBoxLayout()
+        for kolom in KOLOM_FACET:
+            combo = QComboBox()
+            combo.setSizeAdjustPolicy(QComboBox.SizeAdjustPolicy.AdjustToContents)
+            combo.currentIndexChanged.connect(self.on_facet_changed)
+            facet_layout.addWidget(QLabel(f"{kolom.replace('_', ' ').title()}:"))
+            facet_layout.addWidget(combo)
+            self.facet_combos[kolom] = combo
+        facet_layout.addStretch()
+        self.group_kk_check = QCheckBox("Kelompokkan per KK")
+        self.group_kk_check.toggled.connect(self.on_group_mode_changed)
+        self.family_count_label = QLabel("")
+        facet_layout.addWidget(self.family_count_label)
+        facet_layout.addWidget(self.group_kk_check)
+        
         # 2. Atur layout
         button_layout = QHBoxLayout()
         button_layout.addWidget(self.search_input) # Tambahkan kotak pencarian
         button_layout.addWidget(self.refresh_btn) # Tambahkan tombol refresh
         button_layout.addWidget(self.show_password_check) # <-- Tambahkan checkbox
         button_layout.addStretch()
+        button_layout.addWidget(self.trash_btn)
+        button_layout.addWidget(self.export_btn)
 
         # 3. Hubungkan sinyal
         self.refresh_btn.clicked.connect(self.clear_search_and_refresh)
-        self.search_input.textChanged.connect(self.load_data)
-        self.show_password_check.toggled.connect(self.load_data) # <-- Hubungkan checkbox
+        self.export_btn.clicked.connect(self.on_export)
+        self.trash_btn.clicked.connect(self.trash_requested)
+        self.search_input.textChanged.connect(self.on_search_text_changed)
+        self.show_password_check.toggled.connect(self.toggle_password_visibility) # <-- Hubungkan checkbox
         
         # --- Akhir Perubahan Layout ---
 
-        self.table_widget = QTableWidget()
-        self.table_widget.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table_widget.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table_widget.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        # --- TABEL VIRTUAL (MODEL/VIEW) ---
+        self.table_model = PendaftaranTableModel(self)
+        self.table_widget = QTableView()
+        self.table_widget.setModel(self.table_model)
+        self.table_widget.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.table_widget.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table_widget.setSelectionMode(QTableView.SelectionMode.ExtendedSelection)
+        self.table_widget.verticalHeader().setDefaultSectionSize(24)
+        self.table_widget.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        self._atur_kolom()
         
         self.table_widget.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.table_widget.customContextMenuRequested.connect(self.show_context_menu)
+
+        # --- TAMPILAN PER KARTU KELUARGA (POHON, ANGGOTA DIMUAT SAAT DIBUKA) ---
+        self.tree_model = KeluargaTreeModel(self)
+        self.tree_widget = QTreeView()
+        self.tree_widget.setModel(self.tree_model)
+        self.tree_widget.setEditTriggers(QTreeView.EditTrigger.NoEditTriggers)
+        self.tree_widget.setUniformRowHeights(True)
+        self.tree_widget.setAlternatingRowColors(True)
+        self.tree_widget.setSelectionMode(QTreeView.SelectionMode.ExtendedSelection)
+        self.tree_widget.header().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        self.tree_widget.setColumnWidth(0, 180)
+        self.tree_widget.setColumnWidth(1, 220)
+        self.tree_widget.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.tree_widget.customContextMenuRequested.connect(self.show_tree_context_menu)
+
+        self.view_stack = QStackedWidget()
+        self.view_stack.addWidget(self.table_widget)
+        self.view_stack.addWidget(self.tree_widget)
         
         layout.addLayout(button_layout)
-        layout.addWidget(self.table_widget)
+        layout.addLayout(facet_layout)
+        layout.addWidget(self.view_stack)
         self.setLayout(layout)
 
+        # Tombol Delete: pindahkan semua baris terpilih ke Tempat Sampah
+        delete_shortcut = QShortcut(QKeySequence.StandardKey.Delete, self.view_stack)
+        delete_shortcut.setContext(Qt.ShortcutContext.WidgetWithChildrenShortcut)
+        delete_shortcut.activated.connect(self.on_delete_shortcut)
+
     def show_context_menu(self, position):
         """Menampilkan menu Edit/Hapus saat baris diklik kanan."""
         
-        item = self.table_widget.itemAt(position)
-        if item is None:
+        index = self.table_widget.indexAt(position)
+        if not index.isValid():
             return 
 
-        row = item.row()
+        row = index.row()
         
         try:
-            user_id_item = self.table_widget.item(row, 0)
-            user_id = int(user_id_item.text())
-        except (AttributeError, ValueError, TypeError) as e:
+            user_id = int(self.table_model.id_at(row))
+        except (ValueError, TypeError) as e:
             print(f"Error mendapatkan ID dari baris {row}: {e}")
             return
 
+        self._tampilkan_menu_aksi(user_id, self.table_widget.mapToGlobal(position))
+
+    def show_tree_context_menu(self, position):
+        """Menu Edit/Hapus untuk baris anggota di tampilan per KK."""
+        index = self.tree_widget.indexAt(position)
+        user_id = self.tree_model.id_at(index)
+        if user_id is None:
+            return
+        self._tampilkan_menu_aksi(user_id, self.tree_widget.viewport().mapToGlobal(position))
+
+    def _id_terpilih(self):
+        """ID semua baris pendaftar yang dipilih di tampilan aktif (urut tampilan)."""
+        if self.group_kk_check.isChecked():
+            indexes = sorted(self.tree_widget.selectionModel().selectedRows(),
+                             key=lambda i: (i.parent().row(), i.row()))
+            ids = [self.tree_model.id_at(index) for index in indexes]
+        else:
+            rows = sorted(index.row() for index in self.table_widget.selectionModel().selectedRows())
+            ids = [self.table_model.id_at(row) for row in rows]
+        return [int(user_id) for user_id in ids if user_id is not None]
+
+    @pyqtSlot()
+    def on_delete_shortcut(self):
+        ids = self._id_terpilih()
+        if ids:
+            self.delete_requested.emit(ids)
+
+    def _tampilkan_menu_aksi(self, user_id, global_position):
+        # Hapus berlaku untuk semua baris terpilih jika baris yang diklik ikut terpilih
+        ids = self._id_terpilih()
+        if user_id not in ids:
+            ids = [user_id]
+
         context_menu = QMenu(self)
         
         detail_action = QAction("Lihat Detail Data", self)
         edit_action = QAction("Edit Data Ini", self)
-        delete_action = QAction("Hapus Data Ini", self)
+        delete_action = QAction("Hapus Data Ini" if len(ids) == 1 else f"Hapus {len(ids)} Data Terpilih", self)
         
         context_menu.addAction(detail_action)
         context_menu.addSeparator()
         context_menu.addAction(edit_action)
         context_menu.addAction(delete_action)
         
-        global_position = self.table_widget.mapToGlobal(position)
         selected_action = context_menu.exec(global_position)
         
         if selected_action == detail_action:
@@ -100,85 +229,339 @@ class ViewWidget(QWidget):
         elif selected_action == edit_action:
             self.edit_requested.emit(user_id)
         elif selected_action == delete_action:
-            self.delete_requested.emit(user_id)
+            self.delete_requested.emit(ids)
 
     # --- FUNGSI BARU ---
     def clear_search_and_refresh(self):
         """Membersihkan kotak pencarian dan memuat ulang data."""
-        # Hentikan sinyal sementara agar clear() tidak memicu load_data
+        # Hentikan sinyal sementara agar clear() tidak memicu pencarian
         self.search_input.blockSignals(True)
         self.search_input.clear()
         self.search_input.blockSignals(False)
+        for combo in self.facet_combos.values():
+            combo.blockSignals(True)
+            combo.setCurrentIndex(0)
+            combo.blockSignals(False)
         
         # Panggil load_data secara manual
         self.load_data()
 
+    # --- PENCARIAN DEBOUNCE DI THREAD LATAR BELAKANG ---
+    @pyqtSlot(str)
+    def on_search_text_changed(self, text):
+        """Menunda pencarian sampai pengguna berhenti mengetik."""
+        self._cancel_active_search()
+        self.search_timer.start()
+
+    @pyqtSlot()
+    def start_search(self):
+        """Menjalankan pencarian untuk teks saat ini di thread latar belakang."""
+        self._cancel_active_search()
+        self.search_generation += 1
+        self.search_filters = self._filter_aktif()
+        # Perubahan setelah titik ini akan diterapkan lagi sebagai patch
+        self.search_change_seq = self._baca_seq_perubahan()
+
+        if self.group_kk_check.isChecked():
+            self.change_seq = self.search_change_seq
+            self._reload_tree()
+            return
+        
+        worker = SearchWorker(
+            self.search_generation, self.search_input.text(), self.table_model.PAGE_SIZE,
+            self.table_model.columns(), self.search_filters
+        )
+        worker.signals.finished.connect(self.on_search_finished)
+        worker.signals.failed.connect(self.on_search_failed)
+        self.active_search = worker
+        self.search_pool.start(worker)
+
+    def _cancel_active_search(self):
+        """Membatalkan pencarian yang masih berjalan (hasilnya akan dibuang)."""
+        if self.active_search is not None:
+            self.active_search.cancel()
+            self.active_search = None
+
+    @pyqtSlot(int, str, int, list)
+    def on_search_finished(self, generation, search_term, total, first_page):
+        # Abaikan hasil dari pencarian yang sudah usang
+        if generation != self.search_generation:
+            return
+        self.active_search = None
+        self.change_seq = self.search_change_seq
+        self.table_model.apply_result(search_term, total, first_page, self.search_filters)
+        self.table_widget.scrollToTop()
+        self._atur_kolom()
+
+    @pyqtSlot(int, str)
+    def on_search_failed(self, generation, message):
+        if generation != self.search_generation:
+            return
+        self.active_search = None
+        QMessageBox.critical(self, "Error", message)
+    # --- AKHIR PENCARIAN ---
+
+    # --- REFRESH INKREMENTAL (LOG PERUBAHAN) ---
+    def _baca_seq_perubahan(self):
+        success, seq = db_manager.get_seq_perubahan()
+        if not success:
+            print(seq)
+            return self.change_seq or 0
+        return seq
+
+    def _baca_data_version(self):
+        """data_version terbaru; jika gagal (mis. server tidak menjawab) versi lama dipertahankan."""
+        try:
+            return db_manager.get_data_version()
+        except Exception as e:
+            print(f"Gagal membaca versi data: {e}")
+            return self.data_version
+
+    @pyqtSlot()
+    def check_external_changes(self):
+        """
+        Dipanggil berkala. PRAGMA data_version hanya berubah jika koneksi lain
+        (thread latar belakang atau workstation lain) meng-commit, jadi
+        pengecekan ini murah dan log perubahan baru dibaca saat perlu.
+        """
+        if not self.isVisible() or self.active_search is not None:
+            return
+        versi = self._baca_data_version()
+        if versi == self.data_version:
+            return
+        self.data_version = versi
+        self.refresh_changes()
+
+    def refresh_changes(self):
+        """
+        Menerapkan perubahan sejak pemuatan terakhir sebagai patch per baris.
+        Jika perubahan terlalu banyak atau posisinya tidak pasti, model dimuat
+        ulang dengan posisi gulir dan pilihan dipertahankan.
+        """
+        if self.change_seq is None:
+            self.load_data()  # Belum pernah dimuat: muat penuh sekali
+            return
+        if self.active_search is not None:
+            return  # Hasil pencarian yang sedang berjalan sudah memuat data terbaru
+        success, hasil = db_manager.get_perubahan_sejak(self.change_seq)
+        if not success:
+            print(hasil)
+            return
+        perubahan, seq = hasil
+        if perubahan == []:
+            self.change_seq = seq
+            return
+
+        self.refresh_facets()
+        if self.group_kk_check.isChecked():
+            # Pohon memuat anggota saat dibuka; cukup muat ulang tingkat atas
+            self._reload_tree(scroll_to_top=False)
+        elif perubahan is None or not self.table_model.terapkan_perubahan(perubahan):
+            self._muat_ulang_pertahankan_posisi()
+        self.change_seq = seq
+
+    def _muat_ulang_pertahankan_posisi(self):
+        """Memuat ulang model tabel tanpa kembali ke atas atau kehilangan pilihan."""
+        scroll = self.table_widget.verticalScrollBar().value()
+        baris_dimuat = self.table_model.rowCount()
+        current = self.table_widget.currentIndex()
+        id_terpilih = self.table_model.id_at(current.row()) if current.isValid() else None
+
+        if not self.table_model.reload(self.table_model.current_search_term(), self.search_filters):
+            QMessageBox.critical(self, "Error", self.table_model.last_error)
+            return
+        while self.table_model.rowCount() < baris_dimuat and self.table_model.canFetchMore():
+            self.table_model.fetchMore()
+        self._atur_kolom()
+
+        if id_terpilih is not None:
+            baris = self.table_model.row_of_id(id_terpilih, current.row())
+            if baris is not None:
+                self.table_widget.selectRow(baris)
+        self.table_widget.verticalScrollBar().setValue(scroll)
+    # --- AKHIR REFRESH INKREMENTAL ---
+
+    # --- TAMPILAN PER KARTU KELUARGA ---
+    @pyqtSlot(bool)
+    def on_group_mode_changed(self, grouped):
+        self.view_stack.setCurrentWidget(self.tree_widget if grouped else self.table_widget)
+        self.show_password_check.setEnabled(not grouped)
+        if not grouped:
+            self.family_count_label.setText("")
+        self.load_data()
+
+    def _reload_tree(self, scroll_to_top=True):
+        """Memuat ulang pohon keluarga (jumlah + halaman pertama, anggota belum)."""
+        if not self.tree_model.reload(self.search_input.text(), self.search_filters):
+            QMessageBox.critical(self, "Error", self.tree_model.last_error)
+            return
+        if scroll_to_top:
+            self.tree_widget.scrollToTop()
+        self.family_count_label.setText(f"{self.tree_model.total_keluarga()} keluarga")
+    # --- AKHIR TAMPILAN PER KARTU KELUARGA ---
+
+    # --- FILTER FACET ---
+    def _filter_aktif(self):
+        """Filter {kolom: nilai} dari combo facet yang tidak berisi 'Semua'."""
+        filters = {}
+        for kolom, combo in self.facet_combos.items():
+            nilai = combo.currentData()
+            if nilai is not None:
+                filters[kolom] = nilai
+        return filters
+
+    @pyqtSlot()
+    def on_facet_changed(self):
+        """Filter facet diterapkan langsung (tanpa jeda debounce)."""
+        self.search_timer.stop()
+        self.start_search()
+
+    def refresh_facets(self):
+        """Memperbarui daftar nilai dan jumlahnya tanpa mengubah pilihan."""
+        success, counts = db_manager.get_facet_counts()
+        if not success:
+            print(counts)
+            return
+        for kolom, combo in self.facet_combos.items():
+            dipilih = combo.currentData()
+            nilai_counts = counts.get(kolom, [])
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItem(f"Semua ({sum(j for _, j in nilai_counts)})", None)
+            for nilai, jumlah in nilai_counts:
+                combo.addItem(f"{nilai or '(Kosong)'} ({jumlah})", nilai)
+            indeks = combo.findData(dipilih) if dipilih is not None else 0
+            if indeks < 0:
+                # Nilai terpilih sudah tidak punya data; tetap pertahankan filternya
+                combo.addItem(f"{dipilih or '(Kosong)'} (0)", dipilih)
+                indeks = combo.count() - 1
+            combo.setCurrentIndex(indeks)
+            combo.blockSignals(False)
+    # --- AKHIR FILTER FACET ---
+
+    # --- EKSPOR STREAMING ---
+    @pyqtSlot()
+    def on_export(self):
+        """Mengekspor data (sesuai pencarian saat ini) ke CSV/JSONL/XLSX."""
+        if self.export_worker is not None:
+            return
+
+        filter_csv = "CSV (*.csv)"
+        filter_jsonl = "JSON Lines (*.jsonl)"
+        filter_xlsx = "Excel (*.xlsx)"
+        path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Ekspor Data", "data_pendaftaran.csv",
+            ";;".join([filter_csv, filter_jsonl, filter_xlsx])
+        )
+        if not path:
+            return
+
+        fmt = os.path.splitext(path)[1].lower().lstrip(".")
+        if fmt not in ("csv", "jsonl", "xlsx"):
+            fmt = {filter_jsonl: "jsonl", filter_xlsx: "xlsx"}.get(selected_filter, "csv")
+            path = f"{path}.{fmt}"
+
+        reply = QMessageBox.question(
+            self, "Kolom Password",
+            "Sertakan kolom PASSWORD di file ekspor?\n\n"
+            "Pilih 'No' jika file akan dibagikan ke pihak lain.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        include_password = reply == QMessageBox.StandardButton.Yes
+
+        self.export_progress = QProgressDialog("Mengekspor data...", "Batalkan", 0, 100, self)
+        self.export_progress.setWindowTitle("Ekspor Data")
+        self.export_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.export_progress.setMinimumDuration(0)
+        self.export_progress.setAutoClose(False)
+        self.export_progress.setAutoReset(False)
+
+        self.export_worker = ExportWorker(
+            path, fmt, self.table_model.current_search_term(), include_password,
+            self.table_model.current_filters()
+        )
+        self.export_worker.signals.progress.connect(self.on_export_progress)
+        self.export_worker.signals.finished.connect(self.on_export_finished)
+        self.export_progress.canceled.connect(self.export_worker.cancel)
+        self.export_btn.setEnabled(False)
+        QThreadPool.globalInstance().start(self.export_worker)
+
+    @pyqtSlot(int, int)
+    def on_export_progress(self, ditulis, total):
+        if self.export_progress is None:
+            return
+        self.export_progress.setValue(int(ditulis * 100 / total) if total else 100)
+        self.export_progress.setLabelText(f"Mengekspor data... {ditulis} dari {total} baris")
+
+    @pyqtSlot(bool, str)
+    def on_export_finished(self, success, message):
+        cancelled = self.export_progress is not None and self.export_progress.wasCanceled()
+        if self.export_progress is not None:
+            self.export_progress.close()
+            self.export_progress = None
+        self.export_worker = None
+        self.export_btn.setEnabled(True)
+
+        if success:
+            QMessageBox.information(self, "Sukses", message)
+        elif cancelled:
+            QMessageBox.information(self, "Info", message)
+        else:
+            QMessageBox.critical(self, "Error", message)
+    # --- AKHIR EKSPOR ---
+
+    @pyqtSlot(bool)
+    def toggle_password_visibility(self, checked):
+        """Menampilkan/menyembunyikan kolom password (diambil dari DB hanya jika tampil)."""
+        self.table_model.set_show_password(checked)
+        self._atur_kolom()
+
     # --- FUNGSI DIPERBARUI ---
     def load_data(self):
-        """Mengambil data dari db_manager dan menampilkannya di tabel."""
+        """Memuat ulang model tabel virtual dengan teks pencarian saat ini."""
+        
+        # Batalkan pencarian tertunda agar hasilnya tidak menimpa data ini
+        self.search_timer.stop()
+        self._cancel_active_search()
+        self.search_generation += 1
         
         # Ambil teks pencarian dari input
         search_term = self.search_input.text()
         
-        # Kirim teks pencarian ke db_manager
-        success, data, headers = db_manager.load_data(search_term)
+        self.refresh_facets()
+        self.search_filters = self._filter_aktif()
+        # Dibaca sebelum memuat: perubahan sesudahnya diterapkan sebagai patch
+        self.change_seq = self._baca_seq_perubahan()
+        self.data_version = self._baca_data_version()
+
+        if self.group_kk_check.isChecked():
+            self._reload_tree()
+            return
         
-        if success:
-            if not data:
-                self.table_widget.setRowCount(0)
-                self.table_widget.setColumnCount(len(headers))
-                self.table_widget.setHorizontalHeaderLabels(headers)
-                return
-
-            self.table_widget.setColumnCount(len(headers))
-            self.table_widget.setHorizontalHeaderLabels(headers)
-            self.table_widget.setRowCount(len(data))
-            
-            # --- LOGIKA PENYAMARAN PASSWORD BARU ---
-            try:
-                # Cari indeks kolom 'Password'
-                password_col_index = headers.index("Password")
-            except ValueError:
-                password_col_index = -1 # Password tidak ditemukan
-                
-            is_password_shown = self.show_password_check.isChecked()
-            # --- AKHIR LOGIKA BARU ---
-
-            for row_idx, row_data in enumerate(data):
-                for col_idx, col_value in enumerate(row_data):
-                    
-                    item_text = str(col_value)
-                    
-                    # --- LOGIKA PENYAMARAN BARU ---
-                    # Jika ini kolom password DAN checkbox tidak dicentang
-                    if col_idx == password_col_index and not is_password_shown:
-                        if item_text and item_text != "None":
-                            item_text = "••••••••" # Samarkan data
-                        else:
-                            item_text = "" # Biarkan kosong jika memang kosong
-                    # --- AKHIR LOGIKA BARU ---
-                    
-                    item = QTableWidgetItem(item_text)
-                    self.table_widget.setItem(row_idx, col_idx, item)
-            
-            try:
-                self.table_widget.setColumnHidden(0, True) # Sembunyikan kolom ID
-            except Exception as e:
-                print(f"Gagal menyembunyikan kolom ID: {e}")
-
-            try:
-                # Atur agar kolom alamat, keterangan, dan catatan bisa melebar
-                alamat_col = headers.index("Alamat")
-                self.table_widget.horizontalHeader().setSectionResizeMode(alamat_col, QHeaderView.ResizeMode.Stretch)
-                ket_col = headers.index("Keterangan")
-                self.table_widget.horizontalHeader().setSectionResizeMode(ket_col, QHeaderView.ResizeMode.Stretch)
-                
-                # --- BLOK DIPERBARUI ---
-                catatan_col = headers.index("Catatan")
-                self.table_widget.horizontalHeader().setSectionResizeMode(catatan_col, QHeaderView.ResizeMode.Stretch)
-                # --- AKHIR PERUBAHAN ---
-            except ValueError:
-                pass # Abaikan jika salah satu kolom tidak ada
+        # Model hanya menghitung jumlah baris; isi baris diambil saat digulir
+        if not self.table_model.reload(search_term, self.search_filters):
+            QMessageBox.critical(self, "Error", self.table_model.last_error)
+            return
 
-        else:
-            QMessageBox.critical(self, "Error", data)
\ No newline at end of file
+        self.table_widget.scrollToTop()
+        self.table_widget.resizeColumnsToContents()
+        self._atur_kolom()
+
+    def _atur_kolom(self):
+        """Menyembunyikan kolom ID dan melebarkan kolom teks panjang."""
+        headers = [
+            self.table_model.headerData(i, Qt.Orientation.Horizontal)
+            for i in range(self.table_model.columnCount())
+        ]
+        try:
+            self.table_widget.setColumnHidden(0, True) # Sembunyikan kolom ID
+        except Exception as e:
+            print(f"Gagal menyembunyikan kolom ID: {e}")
+
+        # Atur agar kolom teks panjang bisa melebar (alamat/catatan tidak
+        # diambil untuk daftar, lihat KOLOM_DAFTAR)
+        header = self.table_widget.horizontalHeader()
+        for nama_kolom in ("Alamat", "Keterangan", "Catatan"):
+            if nama_kolom in headers:
+                header.setSectionResizeMode(headers.index(nama_kolom), QHeaderView.ResizeMode.Stretch)
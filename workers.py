@@ -0,0 +1,463 @@
+# workers.py
+# Berisi pekerja (QRunnable) untuk menjalankan operasi database
+# di thread latar belakang agar UI tetap responsif.
+
+import threading
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage
+
+import bulk_import
+import db_manager
+import doc_manager
+import thumbnail_cache
+from config import JEDA_PEMBERSIH_DETIK
+
+
+class SearchSignals(QObject):
+    """Sinyal dari SearchWorker. QRunnable tidak bisa punya sinyal sendiri."""
+    # generasi, search_term, total, halaman_pertama
+    finished = pyqtSignal(int, str, int, list)
+    # generasi, pesan_error
+    failed = pyqtSignal(int, str)
+
+
+class SearchWorker(QRunnable):
+    """
+    Menjalankan pencarian (hitung baris + halaman pertama) di thread lain.
+    Setiap pencarian diberi nomor 'generasi'; hasil yang generasinya sudah
+    tidak terbaru dibuang oleh ViewWidget.
+    """
+
+    def __init__(self, generation, search_term, page_size, columns=None, filters=None):
+        super().__init__()
+        self.generation = generation
+        self.search_term = search_term
+        self.page_size = page_size
+        self.columns = columns
+        self.filters = filters
+        self.signals = SearchSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Menandai pencarian sebagai usang; kueri yang berjalan akan dihentikan."""
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def run(self):
+        if self.is_cancelled():
+            return
+
+        success, total = db_manager.count_data(
+            self.search_term, cancel_check=self.is_cancelled, filters=self.filters
+        )
+        if self.is_cancelled():
+            return
+        if not success:
+            self.signals.failed.emit(self.generation, total)
+            return
+
+        success, rows = db_manager.load_data_page(
+            self.search_term, 0, self.page_size, cancel_check=self.is_cancelled,
+            columns=self.columns, filters=self.filters
+        )
+        if self.is_cancelled():
+            return
+        if not success:
+            self.signals.failed.emit(self.generation, rows)
+            return
+
+        self.signals.finished.emit(self.generation, self.search_term, total, [tuple(r) for r in rows])
+
+
+class MigrationSignals(QObject):
+    """Sinyal dari MigrationWorker."""
+    # keterangan, selesai, total
+    progress = pyqtSignal(str, int, int)
+    # success, pesan
+    finished = pyqtSignal(bool, str)
+
+
+class MigrationWorker(QRunnable):
+    """Menjalankan db_manager.init_db (migrasi skema) di thread latar belakang."""
+
+    def __init__(self):
+        super().__init__()
+        self.signals = MigrationSignals()
+        self._cancelled = threading.Event()
+        self.hasil = None  # (success, pesan), juga tersedia tanpa event loop
+
+    def cancel(self):
+        """Meminta migrasi berhenti setelah potongan yang sedang berjalan."""
+        self._cancelled.set()
+
+    def run(self):
+        try:
+            self.hasil = db_manager.init_db(
+                progress_cb=self.signals.progress.emit,
+                cancel_check=self._cancelled.is_set,
+            )
+        finally:
+            # Kumpulan thread milik dialog/persiapan startup: thread-nya tidak dipakai lagi
+            db_manager.tutup_koneksi_thread()
+        self.signals.finished.emit(*self.hasil)
+
+
+class ImportSignals(QObject):
+    """Sinyal dari ImportWorker."""
+    # persen, diproses, disimpan
+    progress = pyqtSignal(int, int, int)
+    # success, laporan (dict) atau pesan error (str)
+    finished = pyqtSignal(bool, object)
+
+
+class ImportWorker(QRunnable):
+    """Menjalankan bulk_import.import_file di thread latar belakang."""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.signals = ImportSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Meminta impor berhenti setelah chunk yang sedang disimpan."""
+        self._cancelled.set()
+
+    def run(self):
+        try:
+            success, hasil = bulk_import.import_file(
+                self.path,
+                progress_cb=self.signals.progress.emit,
+                cancel_check=self._cancelled.is_set,
+            )
+        finally:
+            # Kumpulan thread milik ImportDialog ikut berhenti saat dialog ditutup
+            db_manager.tutup_koneksi_thread()
+        self.signals.finished.emit(success, hasil)
+
+
+class ExportSignals(QObject):
+    """Sinyal dari ExportWorker."""
+    # ditulis, total
+    progress = pyqtSignal(int, int)
+    # success, pesan
+    finished = pyqtSignal(bool, str)
+
+
+class ExportWorker(QRunnable):
+    """Menjalankan export_manager.export_data di thread latar belakang."""
+
+    def __init__(self, path, fmt, search_term, include_password, filters=None):
+        super().__init__()
+        self.path = path
+        self.fmt = fmt
+        self.search_term = search_term
+        self.include_password = include_password
+        self.filters = filters
+        self.signals = ExportSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def run(self):
+        import export_manager  # Dimuat saat ekspor pertama, bukan saat startup
+        success, message = export_manager.export_data(
+            self.path, self.fmt, self.search_term, self.include_password,
+            progress_cb=self.signals.progress.emit,
+            cancel_check=self._cancelled.is_set,
+            filters=self.filters,
+        )
+        self.signals.finished.emit(success, message)
+
+
+class JournalSignals(QObject):
+    """Sinyal dari JournalWorker."""
+    # daftar pesan langkah yang gagal (kosong jika semua berhasil)
+    finished = pyqtSignal(list)
+
+
+class JournalWorker(QRunnable):
+    """
+    Mengerjakan langkah folder dokumen yang tertunda di jurnal (mis. hapus
+    folder setelah delete_data(..., jalankan_berkas=False)) di thread lain.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.signals = JournalSignals()
+
+    def run(self):
+        gagal = db_manager.jalankan_jurnal()
+        self.signals.finished.emit([f"{entri['operasi']} NIK {entri['nik']}: {pesan}" for entri, pesan in gagal])
+
+
+class PurgeSignals(QObject):
+    """Sinyal dari PurgeWorker."""
+    # jumlah data yang dihapus permanen, pesan_error ('' jika berhasil)
+    finished = pyqtSignal(int, str)
+
+
+class PurgeWorker(QRunnable):
+    """
+    Pembersih Tempat Sampah: menghapus permanen data yang melewati masa
+    simpan per batch kecil (db_manager.bersihkan_sampah), dengan jeda di
+    antara batch agar penyimpanan dan penulis lain tidak tersendat.
+    """
+
+    def __init__(self, jeda_detik=JEDA_PEMBERSIH_DETIK):
+        super().__init__()
+        self.signals = PurgeSignals()
+        self.jeda_detik = jeda_detik
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def run(self):
+        total = 0
+        while not self._cancelled.is_set():
+            success, hasil = db_manager.bersihkan_sampah()
+            if not success:
+                self.signals.finished.emit(total, hasil)
+                return
+            jumlah, masih_ada = hasil
+            total += jumlah
+            if not masih_ada:
+                break
+            self._cancelled.wait(self.jeda_detik)
+        self.signals.finished.emit(total, "")
+
+
+class MirrorSignals(QObject):
+    """Sinyal dari MirrorWorker."""
+    # nik, jumlah file yang diunduh
+    finished = pyqtSignal(str, int)
+
+
+class MirrorWorker(QRunnable):
+    """
+    Mengunduh dokumen yang belum ada di folder lokal (mode server, lihat
+    db_manager.cermin_dokumen) di thread lain agar GUI tidak menunggu server.
+    """
+
+    def __init__(self, nik, dokumen):
+        super().__init__()
+        self.nik = nik
+        self.dokumen = dokumen
+        self.signals = MirrorSignals()
+
+    def run(self):
+        success, hasil = db_manager.cermin_dokumen(self.nik, self.dokumen)
+        if not success:
+            print(hasil)
+        self.signals.finished.emit(self.nik, hasil if success else 0)
+
+
+# --- ANTREAN SALIN DOKUMEN ---
+class CopySignals(QObject):
+    """Sinyal dari CopyFileWorker."""
+    # task_id, disalin, total
+    progress = pyqtSignal(int, int, int)
+    # task_id, status, pesan
+    finished = pyqtSignal(int, str, str)
+
+
+class CopyFileWorker(QRunnable):
+    """
+    Menyimpan satu file ke penyimpanan dokumen di thread latar belakang.
+    Entri jurnalnya (db_manager.mulai_salinan) diakhiri di sini, bukan di
+    thread GUI, agar tetap tercatat walau aplikasi sedang ditutup.
+    """
+
+    def __init__(self, task_id, source_path, dest_path, cancel_event, jurnal_id=None):
+        super().__init__()
+        self.task_id = task_id
+        self.source_path = source_path
+        self.dest_path = dest_path
+        self.cancel_event = cancel_event
+        self.jurnal_id = jurnal_id
+        self.signals = CopySignals()
+
+    def run(self):
+        if self.cancel_event.is_set():
+            db_manager.akhiri_salinan(self.jurnal_id)
+            self.signals.finished.emit(self.task_id, DocumentCopyManager.DIBATALKAN, "")
+            return
+        try:
+            doc_manager.simpan_dokumen(
+                self.source_path, self.dest_path,
+                progress_cb=lambda disalin, total: self.signals.progress.emit(self.task_id, disalin, total),
+                cancel_check=self.cancel_event.is_set,
+            )
+            dest_path = Path(self.dest_path)
+            db_manager.catat_dokumen(dest_path.parent.name, [dest_path.name])
+            db_manager.akhiri_salinan(self.jurnal_id)
+            self.signals.finished.emit(self.task_id, DocumentCopyManager.SELESAI, "")
+        except doc_manager.SalinanDibatalkan:
+            db_manager.akhiri_salinan(self.jurnal_id)
+            self.signals.finished.emit(self.task_id, DocumentCopyManager.DIBATALKAN, "")
+        except Exception as e:
+            db_manager.akhiri_salinan(self.jurnal_id, str(e))
+            self.signals.finished.emit(self.task_id, DocumentCopyManager.GAGAL, str(e))
+
+
+class DocumentCopyManager(QObject):
+    """
+    Antrean penyalinan dokumen ke BASE_DOC_FOLDER/<nik>. Setiap file menjadi
+    satu tugas di QThreadPool sendiri, dengan progres per file, pembatalan,
+    dan percobaan ulang untuk tugas yang gagal/dibatalkan.
+    """
+
+    MENUNGGU = "Menunggu"
+    MENYALIN = "Menyalin"
+    SELESAI = "Selesai"
+    GAGAL = "Gagal"
+    DIBATALKAN = "Dibatalkan"
+
+    # task_id, nama_file, folder_tujuan
+    task_added = pyqtSignal(int, str, str)
+    # task_id, disalin, total
+    task_progress = pyqtSignal(int, int, int)
+    # task_id, status, pesan
+    task_status_changed = pyqtSignal(int, str, str)
+    # Dipancarkan saat antrean kosong lagi
+    all_finished = pyqtSignal()
+
+    def __init__(self, parent=None, max_threads=2):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.pool.setExpiryTimeout(-1)  # Koneksi DB per thread: thread tidak diganti (lihat db_manager)
+        self._next_id = 1
+        # task_id -> dict(source, dest, status, cancel_event, jurnal_id)
+        self.tasks = {}
+
+    def enqueue(self, rencana):
+        """Menambahkan pasangan (sumber, tujuan) ke antrean. Mengembalikan daftar task_id."""
+        ids = []
+        for source_path, dest_path in rencana:
+            task_id = self._next_id
+            self._next_id += 1
+            self.tasks[task_id] = {
+                'source': source_path, 'dest': dest_path,
+                'status': self.MENUNGGU, 'cancel_event': None, 'jurnal_id': None,
+            }
+            self.task_added.emit(task_id, Path(source_path).name, str(Path(dest_path).parent))
+            self._start(task_id)
+            ids.append(task_id)
+        return ids
+
+    def _start(self, task_id):
+        task = self.tasks[task_id]
+        task['cancel_event'] = threading.Event()
+        task['status'] = self.MENYALIN
+        self.task_status_changed.emit(task_id, self.MENYALIN, "")
+
+        # Dicatat di jurnal sebelum disalin; entri percobaan sebelumnya yang
+        # gagal diganti entri baru
+        db_manager.akhiri_salinan(task['jurnal_id'])
+        task['jurnal_id'] = db_manager.mulai_salinan(task['source'], task['dest'])
+        worker = CopyFileWorker(task_id, task['source'], task['dest'], task['cancel_event'], task['jurnal_id'])
+        worker.signals.progress.connect(self.task_progress)
+        worker.signals.finished.connect(self._on_finished)
+        self.pool.start(worker)
+
+    def _on_finished(self, task_id, status, message):
+        self.tasks[task_id]['status'] = status
+        self.task_status_changed.emit(task_id, status, message)
+        if self.pending_count() == 0:
+            self.all_finished.emit()
+
+    def cancel(self, task_id):
+        task = self.tasks.get(task_id)
+        if task and task['status'] == self.MENYALIN:
+            task['cancel_event'].set()
+
+    def cancel_all(self):
+        for task_id in list(self.tasks):
+            self.cancel(task_id)
+
+    def retry(self, task_id):
+        """Menjalankan ulang tugas yang gagal atau dibatalkan."""
+        task = self.tasks.get(task_id)
+        if task and task['status'] in (self.GAGAL, self.DIBATALKAN):
+            self._start(task_id)
+
+    def retry_failed(self):
+        for task_id, task in list(self.tasks.items()):
+            if task['status'] in (self.GAGAL, self.DIBATALKAN):
+                self._start(task_id)
+
+    def clear_finished(self):
+        """Membuang tugas yang sudah selesai dari daftar."""
+        for task_id in [t for t, task in self.tasks.items() if task['status'] == self.SELESAI]:
+            del self.tasks[task_id]
+
+    def pending_count(self):
+        return sum(1 for task in self.tasks.values() if task['status'] == self.MENYALIN)
+
+    def wait_for_done(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
+
+
+class ThumbnailSignals(QObject):
+    # generasi, path, ukuran, QImage (null jika tidak bisa dipratinjau)
+    finished = pyqtSignal(int, str, int, QImage)
+
+
+class ThumbnailWorker(QRunnable):
+    """Membuat (atau mengambil dari cache) satu thumbnail di thread lain."""
+
+    def __init__(self, generation, path, file_hash, mtime, ukuran):
+        super().__init__()
+        self.generation = generation
+        self.path = path
+        self.file_hash = file_hash
+        self.mtime = mtime
+        self.ukuran = ukuran
+        self.signals = ThumbnailSignals()
+
+    def run(self):
+        try:
+            image = thumbnail_cache.ambil_thumbnail(self.path, self.file_hash, self.mtime, self.ukuran)
+        except Exception as e:
+            print(f"Gagal membuat thumbnail {self.path}: {e}")
+            image = None
+        self.signals.finished.emit(self.generation, str(self.path), self.ukuran, image or QImage())
+
+
+class ThumbnailLoader(QObject):
+    """
+    Antrean thumbnail untuk satu daftar file. Setiap kali daftar diisi ulang,
+    panggil reset(): hasil dari generasi sebelumnya diabaikan dan tugas yang
+    belum mulai dibuang.
+    """
+
+    # path, ukuran, QImage
+    thumbnail_ready = pyqtSignal(str, int, QImage)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+        self.generation = 0
+
+    def reset(self):
+        self.generation += 1
+        self.pool.clear()
+
+    def request(self, path, file_hash=None, mtime=None, ukuran=thumbnail_cache.UKURAN_THUMBNAIL):
+        if not thumbnail_cache.bisa_dipratinjau(path):
+            return
+        worker = ThumbnailWorker(self.generation, path, file_hash, mtime, ukuran)
+        worker.signals.finished.connect(self._on_finished)
+        self.pool.start(worker)
+
+    def _on_finished(self, generation, path, ukuran, image):
+        if generation == self.generation and not image.isNull():
+            self.thumbnail_ready.emit(path, ukuran, image)